@@ -5,12 +5,19 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
+
+Perfil soportado en la Raspberry Pi (un solo proceso: es el dueño de los GPIO):
+    uvicorn api.asgi:application --host 0.0.0.0 --port 8000 --workers 1 --limit-concurrency 500
 """
 
 import os
 
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
+# Sin WhiteNoise (sólo síncrono): los estáticos los sirve ASGIStaticFilesHandler
+# y el resto de las peticiones recorre el middleware sin hilos
+os.environ.setdefault('SERVIDOR_ASGI', '1')
 
-application = get_asgi_application()
+application = ASGIStaticFilesHandler(get_asgi_application())
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 import environ
 from datetime import timedelta
@@ -36,6 +37,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.MetricasMiddleware',
+    'apps.core.middleware.EscrituraMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -43,10 +46,17 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.PerfilMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# WhiteNoise es sólo síncrono: bajo ASGI haría que toda la cadena de middleware
+# corra en un hilo por petición. api/asgi.py lo quita y sirve los estáticos aparte.
+SERVIDOR_ASGI = env.bool('SERVIDOR_ASGI', default=False)
+if SERVIDOR_ASGI:
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'api.urls'
 
 TEMPLATES = [
@@ -66,6 +76,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'api.wsgi.application'
+ASGI_APPLICATION = 'api.asgi.application'
 
 
 # Database
@@ -90,6 +101,60 @@ else:
         }
     }
 
+# Modo edge (apps/core/sincronizacion.py): la Pi escribe en SQLite local y
+# `manage.py sincronizar` sube los cambios a la central (mismas variables
+# NAME/USER/PASSWORD/HOST/PORT que producción).
+# - EDGE_DB: archivo SQLite local; WAL + synchronous=NORMAL para escrituras rápidas
+# - SYNC_CADA: segundos entre sincronizaciones; SYNC_LOTE: cambios por lote
+EDGE = env.bool('EDGE', default=False)
+if EDGE:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': env('EDGE_DB', default=BASE_DIR / 'edge.sqlite3'),
+            'OPTIONS': {
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA busy_timeout=5000',
+                'transaction_mode': 'IMMEDIATE',
+            },
+        },
+        'central': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': env('NAME'),
+            'USER': env('USER'),
+            'PASSWORD': env('PASSWORD'),
+            'HOST': env('HOST'),
+            'PORT': env('PORT'),
+            'OPTIONS': {'connect_timeout': 5},
+        },
+    }
+SYNC_CADA = env.float('SYNC_CADA', default=5)
+SYNC_LOTE = env.int('SYNC_LOTE', default=1000)
+
+# Réplica de lectura para reportes y analítica (apps/core/routers.py)
+# - REPLICA_HOST / REPLICA_PORT: réplica de la primaria en producción
+# - REPLICA_LOCAL: segundo alias sobre la misma base para probar el ruteo en desarrollo
+# - REPLICA_RETRASO_MAXIMO: segundos de retraso tolerados antes de volver a la primaria
+# - REPLICA_DESPUES_ESCRITURA: segundos después de una escritura del mismo cliente en que se lee de la primaria
+# - REPLICA_CONSULTA_CADA: cada cuánto se mide el retraso
+if MODE == 'production' and env('REPLICA_HOST', default=None):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': env('REPLICA_HOST'),
+        'PORT': env('REPLICA_PORT', default=DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+elif env.bool('REPLICA_LOCAL', default=False):
+    DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['apps.core.routers.RouterReplica']
+REPLICA_RETRASO_MAXIMO = env.float('REPLICA_RETRASO_MAXIMO', default=10)
+REPLICA_DESPUES_ESCRITURA = env.float('REPLICA_DESPUES_ESCRITURA', default=2)
+REPLICA_CONSULTA_CADA = env.float('REPLICA_CONSULTA_CADA', default=5)
+
+# Caché compartida entre workers (p. ej. CACHE_URL=rediscache://127.0.0.1:6379/1
+# o filecache:///var/tmp/cortes); por defecto en memoria del proceso.
+CACHES = {'default': env.cache('CACHE_URL', default='locmemcache://')}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -150,6 +215,12 @@ REST_FRAMEWORK = {
 
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
+    ),
+
+    'DEFAULT_RENDERER_CLASSES': (
+        'apps.core.renderers.ORJSONRenderer',
+        'apps.core.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     )
     
 }
@@ -159,6 +230,59 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(minutes=9999),
 }
 
+# Watchdog de sensor y cierre de jornada (apps/core/watchdog.py)
+# - WATCHDOG_FACTOR_PARO: alarma si no llega conteo en FACTOR * tiempo_entre_canales
+# - WATCHDOG_ACCION_PARO: sirena | linea | pausar
+# - WATCHDOG_ACCION_CIERRE: sirena | linea | pausar | finalizar
+WATCHDOG_ACTIVO = env.bool('WATCHDOG_ACTIVO', default=MODE == 'production')
+WATCHDOG_FACTOR_PARO = env.float('WATCHDOG_FACTOR_PARO', default=3.0)
+WATCHDOG_ACCION_PARO = env('WATCHDOG_ACCION_PARO', default='sirena')
+WATCHDOG_ACCION_CIERRE = env('WATCHDOG_ACCION_CIERRE', default='sirena')
+
+# Filtro del sensor de conteo (apps/core/sensor.py)
+# - SENSOR_FACTOR_MINIMO: rechaza pulsos antes de FACTOR * intervalo esperado
+# - SENSOR_FACTOR_SOSPECHOSO: marca pulsos antes de FACTOR * intervalo esperado
+# - SENSOR_REBOTE: piso absoluto en segundos
+SENSOR_FACTOR_MINIMO = env.float('SENSOR_FACTOR_MINIMO', default=0.25)
+SENSOR_FACTOR_SOSPECHOSO = env.float('SENSOR_FACTOR_SOSPECHOSO', default=0.5)
+SENSOR_REBOTE = env.float('SENSOR_REBOTE', default=0.05)
+
+# Tiempo muerto (apps/core/tiempo_muerto.py)
+# - TIEMPO_MUERTO_FACTOR: hueco si no llega conteo en FACTOR * tiempo_entre_canales (sin contar pausas)
+TIEMPO_MUERTO_FACTOR = env.float('TIEMPO_MUERTO_FACTOR', default=3.0)
+
+# Proyección del corte activo (apps/core/proyeccion.py)
+# - PROYECCION_TAU: segundos activos que pesa el promedio exponencial del ritmo
+PROYECCION_TAU = env.float('PROYECCION_TAU', default=300.0)
+
+# Reportes en segundo plano (apps/core/trabajos.py)
+# - TRABAJOS_HILOS: reportes corriendo a la vez; TRABAJOS_PENDIENTES: máximo en cola (incluye los que corren)
+# - TRABAJOS_TIEMPO_MAXIMO: segundos por trabajo; TRABAJOS_MAX_CORTES: cortes por trabajo
+# - TRABAJOS_TTL: segundos que se guarda el resultado en disco
+TRABAJOS_DIR = env('TRABAJOS_DIR', default=os.path.join(MEDIA_ROOT, 'reportes'))
+TRABAJOS_HILOS = env.int('TRABAJOS_HILOS', default=2)
+TRABAJOS_PENDIENTES = env.int('TRABAJOS_PENDIENTES', default=10)
+TRABAJOS_TIEMPO_MAXIMO = env.float('TRABAJOS_TIEMPO_MAXIMO', default=600)
+TRABAJOS_MAX_CORTES = env.int('TRABAJOS_MAX_CORTES', default=20000)
+TRABAJOS_TTL = env.float('TRABAJOS_TTL', default=86400)
+
+# Peticiones idénticas de reportes (apps/core/singleflight.py)
+# - SINGLEFLIGHT_TTL: segundos que se comparte el resultado con otros workers
+# - SINGLEFLIGHT_ESPERA: máximo que se espera el cálculo de otro worker (y vida del candado)
+SINGLEFLIGHT_TTL = env.float('SINGLEFLIGHT_TTL', default=5)
+SINGLEFLIGHT_ESPERA = env.float('SINGLEFLIGHT_ESPERA', default=60)
+
+# Avisos de cambios entre procesos (apps/core/notificaciones.py)
+# Con PostgreSQL van por LISTEN/NOTIFY; con SQLite, por sockets Unix en este directorio
+NOTIFICACIONES_DIR = env('NOTIFICACIONES_DIR', default=os.path.join(tempfile.gettempdir(), 'cortes-notificaciones'))
+
+# Perfilado bajo demanda y consultas lentas (apps/core/perfilado.py)
+PERFIL_MAXIMO = env.int('PERFIL_MAXIMO', default=50)
+PERFIL_FUNCIONES = env.int('PERFIL_FUNCIONES', default=30)
+CONSULTA_LENTA_MS = env.float('CONSULTA_LENTA_MS', default=200)  # 0 desactiva
+CONSULTA_LENTA_EXPLAIN = env.bool('CONSULTA_LENTA_EXPLAIN', default=True)
+CONSULTA_LENTA_MAXIMO = env.int('CONSULTA_LENTA_MAXIMO', default=200)
+
 EMAIL_HOST=''
 EMAIL_PORT=''
 EMAIL_HOST_USER=''
@@ -1,9 +1,11 @@
 from django.contrib import admin
 from django.urls import path
 from django.urls.conf import include
+from apps.core.views import MetricasView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/users/', include('apps.users.urls')),
     path('api/core/', include('apps.core.urls')),
+    path('metrics', MetricasView.as_view(), name='metrics'),
 ]
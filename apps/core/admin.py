@@ -1,7 +1,151 @@
+import json
+
 from django.contrib import admin
-from .models import Corte, Pausa, Conteo, Configuracion
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, Sum
+from django.utils.functional import cached_property
+
+from .diario import estado_actual
+from .models import Corte, Pausa, Conteo, Configuracion, PerfilPeticion, ConsultaLenta, IntervaloMuerto, VersionConfiguracion, EventoCorte, InstantaneaCorte
+from .reportes import asignar_colores
+from .umbrales import configuraciones_vigentes, registrar_version
+
+# Arriba de esto el paginador usa la estimación del planificador en lugar de COUNT(*)
+CONTEO_EXACTO_HASTA = 100000
+
+
+class PaginadorEstimado(Paginator):
+    """
+    En PostgreSQL pregunta primero al planificador (EXPLAIN, sin recorrer la
+    tabla); si estima más de CONTEO_EXACTO_HASTA filas usa esa estimación. Con
+    menos filas, o en SQLite, cuenta exacto.
+    """
+
+    @cached_property
+    def count(self):
+        consulta = self.object_list
+        if connections[consulta.db].vendor == 'postgresql':
+            estimado = json.loads(consulta.explain(format='json'))[0]['Plan']['Plan Rows']
+            if estimado > CONTEO_EXACTO_HASTA:
+                return estimado
+        return super().count
+
+
+class TablaGrande:
+    """
+    Para los modelos con millones de filas que cuelgan de Corte: conteo
+    estimado, sin el segundo COUNT(*) del total sin filtros, el corte en el
+    mismo SELECT y un campo de id en lugar de un <select> con todos los cortes.
+    Sin date_hierarchy: arma sus enlaces con un SELECT DISTINCT de fechas que
+    recorre la tabla completa; las fechas se filtran por rango en list_filter.
+    """
+    paginator = PaginadorEstimado
+    show_full_result_count = False
+    list_select_related = ('corte',)
+    raw_id_fields = ('corte',)
+
+
+class PausaInline(admin.TabularInline):
+    model = Pausa
+    fields = ('inicio_pausa', 'fin_pausa')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Corte)
+class CorteAdmin(admin.ModelAdmin):
+    list_display = ('id', 'inicio', 'fin', 'cantidad_canales', 'grasa_carne_color', 'hueso_carne_color', 'piezas_vendibles_color')
+    list_filter = ('grasa_carne_color', 'hueso_carne_color', 'piezas_vendibles_color')
+    date_hierarchy = 'inicio'
+    readonly_fields = ('grasa_carne_color', 'hueso_carne_color', 'piezas_vendibles_color', 'resumen')
+    inlines = [PausaInline]
+
+    @admin.display(description='Resumen')
+    def resumen(self, obj):
+        """De la última instantánea del diario, sin leer los conteos; sin diario, un agregado por el índice de corte."""
+        if not obj.pk:
+            return '-'
+        estado = estado_actual(obj.id)
+        if not estado['secuencia']:
+            estado.update(Conteo.objects.filter(corte=obj).aggregate(conteos=Count('id'), canales=Sum('cantidad')))
+            estado['pausas'] = Pausa.objects.filter(corte=obj).count()
+        muerto = IntervaloMuerto.objects.filter(corte=obj).aggregate(total=Sum('duracion'))['total'] or 0
+        return (
+            f"{estado['conteos']} conteos, {estado['canales'] or 0:g} canales, {estado['pausas']} pausas, "
+            f"{muerto / 60:.0f} min de tiempo muerto"
+        )
+
+    def save_model(self, request, obj, form, change):
+        asignar_colores(obj, configuraciones_vigentes(obj.inicio))
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(Pausa)
+class PausaAdmin(TablaGrande, admin.ModelAdmin):
+    list_display = ('id', 'corte', 'inicio_pausa', 'fin_pausa')
+    list_filter = (('inicio_pausa', admin.DateFieldListFilter),)
+
+
+@admin.register(Conteo)
+class ConteoAdmin(TablaGrande, admin.ModelAdmin):
+    list_display = ('id', 'corte', 'hora', 'cantidad')
+    list_filter = (('hora', admin.DateFieldListFilter),)
+
+
+@admin.register(Configuracion)
+class ConfiguracionAdmin(admin.ModelAdmin):
+
+    def save_model(self, request, obj, form, change):
+        registrar_version(obj)
+
+
+class SoloLecturaAdmin(admin.ModelAdmin):
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(PerfilPeticion)
+class PerfilPeticionAdmin(SoloLecturaAdmin):
+    list_display = ('creado', 'metodo', 'ruta', 'duracion', 'consultas', 'tiempo_db')
+    list_filter = ('ruta',)
+    readonly_fields = ('creado', 'ruta', 'metodo', 'duracion', 'consultas', 'tiempo_db', 'funciones')
+
+
+@admin.register(ConsultaLenta)
+class ConsultaLentaAdmin(SoloLecturaAdmin):
+    list_display = ('creado', 'ruta', 'duracion')
+    list_filter = ('ruta',)
+    search_fields = ('sql',)
+    readonly_fields = ('creado', 'ruta', 'duracion', 'sql', 'plan')
+
+
+@admin.register(IntervaloMuerto)
+class IntervaloMuertoAdmin(TablaGrande, SoloLecturaAdmin):
+    list_display = ('corte', 'tipo', 'inicio', 'fin', 'duracion')
+    list_filter = ('tipo',)
+
+
+@admin.register(VersionConfiguracion)
+class VersionConfiguracionAdmin(SoloLecturaAdmin):
+    list_display = ('tipo', 'vigente_desde', 'verde', 'amarillo', 'rojo')
+    list_filter = ('tipo',)
+
+
+@admin.register(EventoCorte)
+class EventoCorteAdmin(TablaGrande, SoloLecturaAdmin):
+    list_display = ('corte', 'secuencia', 'tipo', 'momento')
+    list_filter = ('tipo',)
+
 
-admin.site.register(Corte)
-admin.site.register(Pausa)
-admin.site.register(Conteo)
-admin.site.register(Configuracion)
+@admin.register(InstantaneaCorte)
+class InstantaneaCorteAdmin(TablaGrande, SoloLecturaAdmin):
+    list_display = ('corte', 'secuencia')
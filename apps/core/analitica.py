@@ -0,0 +1,234 @@
+# apps/core/analitica.py
+# Agregados históricos para análisis (no para el monitor en vivo).
+# Los conteos se resumen por hora en ResumenHora; las consultas leen los
+# resúmenes hasta donde existen y los conteos crudos sólo para el resto.
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import ExtractHour, ExtractWeekDay, TruncHour, TruncWeek
+
+from .cuantiles import KLL
+from .kpi import canales_hora_real
+from .models import Conteo, Corte, IntervaloMuerto, Pausa, ResumenDia, ResumenHora
+
+# ExtractWeekDay: 1 = domingo ... 7 = sábado
+DIAS = ('Domingo', 'Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado')
+
+
+def resumir_horas(hasta, desde=None):
+    """
+    Agrega los conteos por hora hasta `hasta` (exclusivo, se trunca a la hora).
+    Sin `desde` continúa desde la última hora resumida, rehaciéndola por si
+    llegaron conteos tarde (la cola de ingesta). Es idempotente.
+    """
+    hasta = hasta.replace(minute=0, second=0, microsecond=0)
+    if desde is None:
+        desde = ResumenHora.objects.aggregate(ultima=Max('hora'))['ultima']
+    conteos = Conteo.objects.filter(hora__lt=hasta)
+    if desde:
+        conteos = conteos.filter(hora__gte=desde)
+    filas = conteos.annotate(h=TruncHour('hora')).values('h').annotate(canales=Sum('cantidad'), conteos=Count('id')).order_by('h')
+    resumenes = [ResumenHora(hora=f['h'], canales=f['canales'], conteos=f['conteos']) for f in filas]
+    ResumenHora.objects.bulk_create(resumenes, batch_size=500, update_conflicts=True, unique_fields=['hora'], update_fields=['canales', 'conteos'])
+    return len(resumenes)
+
+
+def resumir_horas_corte(corte, ahora):
+    """
+    Al finalizar un corte: resume sus horas ya cerradas sólo si no quedan
+    conteos sin resumir de antes de su inicio. Si hay más atraso (p. ej. el
+    primer corte después de desplegar) se deja a resumir_horas por cron, para
+    no agregar toda la tabla de conteos dentro de la petición.
+    """
+    ultima = ResumenHora.objects.aggregate(ultima=Max('hora'))['ultima']
+    if ultima is None or not corte.inicio:
+        return 0
+    inicio = corte.inicio.replace(minute=0, second=0, microsecond=0)
+    if Conteo.objects.filter(hora__gte=limite_resumen(ultima), hora__lt=inicio).exists():
+        return 0
+    return resumir_horas(ahora, desde=min(ultima, inicio))
+
+
+def limite_resumen(ultima):
+    """Primera hora sin resumen a partir de la última resumida (None si no hay resúmenes)."""
+    return ultima + timedelta(hours=1) if ultima else None
+
+
+def consultas_calor(desde, hasta, limite, semanal=False):
+    """
+    Consultas agregadas por (semana,) día de la semana y hora del día:
+    resúmenes en [desde, limite) y conteos crudos en [limite, hasta).
+    Cada fila trae canales y número de horas con producción.
+    """
+    grupo = ['semana', 'dia', 'h'] if semanal else ['dia', 'h']
+    extra = {'semana': TruncWeek('hora')} if semanal else {}
+    consultas = []
+    corte_resumen = min(hasta, limite) if limite else desde
+    if corte_resumen > desde:
+        consultas.append(
+            ResumenHora.objects.filter(hora__gte=desde, hora__lt=corte_resumen)
+            .annotate(dia=ExtractWeekDay('hora'), h=ExtractHour('hora'), **extra)
+            .values(*grupo).annotate(canales=Sum('canales'), horas=Count('id')).order_by()
+        )
+    inicio_crudo = max(desde, corte_resumen)
+    if hasta > inicio_crudo:
+        consultas.append(
+            Conteo.objects.filter(hora__gte=inicio_crudo, hora__lt=hasta)
+            .annotate(dia=ExtractWeekDay('hora'), h=ExtractHour('hora'), hora_completa=TruncHour('hora'), **extra)
+            .values(*grupo).annotate(canales=Sum('cantidad'), horas=Count('hora_completa', distinct=True)).order_by()
+        )
+    return consultas
+
+
+def matriz_vacia():
+    return [[0.0] * 24 for _ in DIAS]
+
+
+def matriz_calor(filas, semanal=False):
+    """Filas agregadas -> matrices día × hora de canales, horas con producción y promedio."""
+    canales, horas = matriz_vacia(), matriz_vacia()
+    semanas = {}
+    for f in filas:
+        d, h = f['dia'] - 1, f['h']
+        canales[d][h] += f['canales']
+        horas[d][h] += f['horas']
+        if semanal:
+            semanas.setdefault(f['semana'], matriz_vacia())[d][h] += f['canales']
+    promedio = [[round(c / n, 2) if n else None for c, n in zip(fila_c, fila_n)] for fila_c, fila_n in zip(canales, horas)]
+    resultado = {
+        'dias': DIAS,
+        'horas': list(range(24)),
+        'canales': canales,
+        'promedio': promedio,
+    }
+    if semanal:
+        resultado['semanas'] = [{'semana': semana, 'canales': m} for semana, m in sorted(semanas.items())]
+    return resultado
+
+
+# --- Comparación de periodos ---
+
+PERIODOS = ('a', 'b')
+CAMPOS_PROMEDIO = ('grasa_carne', 'hueso_carne', 'piezas_vendibles')
+COLORES = ('Verde', 'Amarillo', 'Rojo')
+
+
+def agregados_comparacion(rangos):
+    """
+    Argumentos de aggregate() para comparar periodos en una sola consulta:
+    cada agregado lleva filter= con el rango de su periodo. Las sumas de
+    conteos y de tiempo muerto van como subconsultas por corte para no
+    multiplicar filas con JOINs; los colores son las columnas guardadas.
+    """
+    canales = Subquery(Conteo.objects.filter(corte=OuterRef('pk')).values('corte').annotate(total=Sum('cantidad')).values('total'))
+    muerto = Subquery(IntervaloMuerto.objects.filter(corte=OuterRef('pk')).values('corte').annotate(total=Sum('duracion')).values('total'))
+    agregados = {}
+    for periodo, (desde, hasta) in zip(PERIODOS, rangos):
+        rango = Q(inicio__gte=desde, inicio__lt=hasta)
+        agregados[f'{periodo}__cortes'] = Count('id', filter=rango)
+        agregados[f'{periodo}__canales'] = Sum(canales, filter=rango)
+        agregados[f'{periodo}__tiempo_muerto'] = Sum(muerto, filter=rango)
+        for campo in CAMPOS_PROMEDIO:
+            agregados[f'{periodo}__{campo}'] = Avg(campo, filter=rango)
+            for color in COLORES:
+                agregados[f'{periodo}__{campo}__{color}'] = Count('id', filter=rango & Q(**{f'{campo}_color': color}))
+    return agregados
+
+
+def filtro_periodos(rangos):
+    q = Q()
+    for desde, hasta in rangos:
+        q |= Q(inicio__gte=desde, inicio__lt=hasta)
+    return q
+
+
+def _delta(a, b):
+    if a is None or b is None:
+        return None, None
+    return round(b - a, 2), round(100 * (b - a) / a, 1) if a else None
+
+
+def resultado_comparacion(valores, rangos):
+    """Resultado de aggregate() -> {'a': {...}, 'b': {...}, 'delta': {...}, 'porcentaje': {...}}."""
+    resultado = {}
+    for periodo, (desde, hasta) in zip(PERIODOS, rangos):
+        datos = {'desde': desde, 'hasta': hasta, 'colores': {}}
+        for llave, valor in valores.items():
+            partes = llave.split('__')
+            if partes[0] != periodo:
+                continue
+            if len(partes) == 3:
+                datos['colores'].setdefault(partes[1], {})[partes[2]] = valor
+            else:
+                datos[partes[1]] = round(valor, 2) if isinstance(valor, float) else valor
+        datos['canales'] = datos['canales'] or 0
+        datos['tiempo_muerto'] = datos['tiempo_muerto'] or 0
+        resultado[periodo] = datos
+    resultado['delta'], resultado['porcentaje'] = {}, {}
+    for campo in ('cortes', 'canales', 'tiempo_muerto') + CAMPOS_PROMEDIO:
+        resultado['delta'][campo], resultado['porcentaje'][campo] = _delta(resultado['a'][campo], resultado['b'][campo])
+    return resultado
+
+
+# --- Percentiles por día (bocetos KLL) ---
+
+METRICAS_DIA = ('canales_hora', 'tiempo_muerto', 'grasa_carne', 'hueso_carne', 'piezas_vendibles')
+
+
+def valores_corte(corte):
+    """Métricas de un corte cerrado que entran a los bocetos del día."""
+    canales = Conteo.objects.filter(corte=corte).aggregate(total=Sum('cantidad'))['total']
+    pausas = list(Pausa.objects.filter(corte=corte).values('inicio_pausa', 'fin_pausa'))
+    return {
+        'canales_hora': canales_hora_real(canales, corte.inicio, corte.fin, pausas),
+        'tiempo_muerto': IntervaloMuerto.objects.filter(corte=corte).aggregate(total=Sum('duracion'))['total'] or 0,
+        'grasa_carne': corte.grasa_carne,
+        'hueso_carne': corte.hueso_carne,
+        'piezas_vendibles': corte.piezas_vendibles,
+    }
+
+
+def registrar_corte_dia(corte):
+    """Agrega un corte cerrado a los bocetos de su día (una vez por corte)."""
+    if not corte.inicio or not corte.fin:
+        return
+    valores = valores_corte(corte)
+    with transaction.atomic():
+        resumen, _ = ResumenDia.objects.select_for_update().get_or_create(fecha=corte.inicio.date())
+        if corte.id in resumen.cortes:
+            return
+        for metrica in METRICAS_DIA:
+            boceto = KLL.desde_dict(resumen.bocetos[metrica]) if metrica in resumen.bocetos else KLL()
+            boceto.actualizar(valores[metrica])
+            resumen.bocetos[metrica] = boceto.a_dict()
+        resumen.cortes.append(corte.id)
+        resumen.save()
+
+
+def reconstruir_dias(desde=None):
+    """Rehace los ResumenDia a partir de los cortes cerrados."""
+    cortes = Corte.objects.filter(inicio__isnull=False, fin__isnull=False).order_by('id')
+    dias = ResumenDia.objects.all()
+    if desde:
+        cortes = cortes.filter(inicio__gte=desde)
+        dias = dias.filter(fecha__gte=desde)
+    dias.delete()
+    total = 0
+    for corte in cortes.iterator():
+        registrar_corte_dia(corte)
+        total += 1
+    return total
+
+
+def percentiles(bocetos_por_dia, qs):
+    """Fusiona los bocetos de varios días: {métrica: {'n', 'p50', ...}}."""
+    fusionados = {metrica: KLL() for metrica in METRICAS_DIA}
+    for bocetos in bocetos_por_dia:
+        for metrica, datos in bocetos.items():
+            if metrica in fusionados:
+                fusionados[metrica].fusionar(KLL.desde_dict(datos))
+    return {
+        metrica: {'n': len(boceto), **{f'p{q:g}': valor for q, valor in zip(qs, boceto.cuantiles([q / 100 for q in qs]))}}
+        for metrica, boceto in fusionados.items()
+    }
@@ -0,0 +1,237 @@
+# apps/core/carga_masiva.py
+# Importación y exportación masiva de cortes, pausas y conteos como CSV
+# (cortes.csv, pausas.csv y conteos.csv en un directorio), para migrar el
+# histórico de la hoja de cálculo anterior o mover datos entre plantas.
+# - Las filas se relacionan por uuid: pausas y conteos traen corte_uuid. Una
+#   clave que no es un UUID (p. ej. el folio de la hoja de cálculo) se
+#   convierte en un uuid5 fijo, así la misma clave da siempre el mismo corte.
+#   Una fila sin uuid recibe un uuid5 de su clave natural (CLAVES_NATURALES),
+#   así volver a importar el mismo archivo tampoco la duplica.
+# - Cada archivo se carga primero a una tabla temporal (COPY en PostgreSQL,
+#   executemany por lotes en SQLite) y de ahí pasa a la tabla real con un
+#   INSERT ... SELECT que traduce corte_uuid a corte_id con un JOIN y omite
+#   las filas que ya existen: importar dos veces el mismo archivo no duplica.
+# - Exportar usa COPY (consulta) TO STDOUT en PostgreSQL.
+import csv
+import io
+import os
+import time
+import uuid
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Conteo, Corte, Pausa
+from .reportes import asignar_colores, CAMPOS_COLOR
+from .umbrales import configuraciones_vigentes, historial
+
+LOTE = 50000
+ESPACIO_CLAVES = uuid.UUID('5b0f3c1e-8a4d-4c2b-9f61-2d7e0a9c4b13')
+
+# Archivo -> (modelo, columnas del CSV). corte_uuid es el uuid del corte.
+ARCHIVOS = {
+    'cortes': (Corte, ['uuid', 'cantidad_canales', 'horas_jornada', 'canales_hora', 'tiempo_entre_canales',
+                       'grasa_carne', 'hueso_carne', 'piezas_vendibles', 'tiempo_muerto', 'inicio', 'fin']),
+    'pausas': (Pausa, ['uuid', 'corte_uuid', 'inicio_pausa', 'fin_pausa']),
+    'conteos': (Conteo, ['uuid', 'corte_uuid', 'hora', 'cantidad']),
+}
+
+# Columnas que identifican una fila sin uuid; None es el número de fila en el
+# archivo (dos conteos del mismo corte pueden tener la misma hora).
+CLAVES_NATURALES = {
+    Corte: ('inicio',),
+    Pausa: ('corte_uuid', 'inicio_pausa'),
+    Conteo: ('corte_uuid', 'hora', None),
+}
+
+
+def clave_uuid(valor):
+    """UUID del texto; si no lo es, un uuid5 de la clave. Vacío: None."""
+    if not valor:
+        return None
+    try:
+        return uuid.UUID(valor)
+    except ValueError:
+        return uuid.uuid5(ESPACIO_CLAVES, valor)
+
+
+def clave_natural(modelo, textos, numero):
+    """
+    uuid5 de una fila sin uuid a partir de CLAVES_NATURALES (`textos` es
+    {columna: texto}). Si falta alguna columna de la clave se agrega el número
+    de fila, para no juntar filas distintas en una sola.
+    """
+    columnas = CLAVES_NATURALES[modelo]
+    partes = [modelo._meta.model_name]
+    for columna in columnas:
+        if columna is None:
+            partes.append(str(numero))
+        elif columna == 'corte_uuid':
+            partes.append(str(clave_uuid(textos[columna])))
+        else:
+            partes.append(textos[columna])
+    if None not in columnas and not all(textos[c] for c in columnas):
+        partes.append(str(numero))
+    return str(uuid.uuid5(ESPACIO_CLAVES, '|'.join(partes)))
+
+
+def _campo(modelo, columna):
+    return Corte._meta.get_field('uuid') if columna == 'corte_uuid' else modelo._meta.get_field(columna)
+
+
+def _convertidor(modelo, columna):
+    """Texto del CSV -> valor listo para la base (el mismo que guardaría el ORM)."""
+    campo = _campo(modelo, columna)
+
+    def convertir(texto):
+        if columna in ('uuid', 'corte_uuid'):
+            valor = clave_uuid(texto)
+        elif texto == '':
+            valor = None
+        else:
+            valor = campo.to_python(texto)
+            # Un COPY de PostgreSQL escribe las fechas con su desfase; la base guarda hora local
+            if hasattr(valor, 'tzinfo') and timezone.is_aware(valor):
+                valor = timezone.make_naive(valor)
+        return campo.get_db_prep_save(valor, connection)
+    return convertir
+
+
+def _lotes(ruta, modelo, columnas, tamano):
+    """Filas convertidas del CSV en lotes; las columnas se buscan por el encabezado."""
+    with open(ruta, newline='', encoding='utf-8') as archivo:
+        lector = csv.reader(archivo)
+        encabezado = next(lector)
+        faltan = [c for c in columnas if c not in encabezado and c != 'uuid']
+        if faltan:
+            raise ValueError(f'{os.path.basename(ruta)}: faltan columnas {", ".join(faltan)}')
+        posiciones = [encabezado.index(c) if c in encabezado else None for c in columnas]
+        convertidores = [_convertidor(modelo, c) for c in columnas]
+        clave = columnas.index('uuid')
+        lote = []
+        for numero, fila in enumerate(lector, start=1):
+            textos = [fila[i] if i is not None else '' for i in posiciones]
+            if not textos[clave]:
+                textos[clave] = clave_natural(modelo, dict(zip(columnas, textos)), numero)
+            lote.append([convertir(texto) for convertir, texto in zip(convertidores, textos)])
+            if len(lote) == tamano:
+                yield lote
+                lote = []
+        if lote:
+            yield lote
+
+
+def _cargar_lote(cursor, tabla, columnas, lote):
+    q = connection.ops.quote_name
+    if connection.vendor == 'postgresql':
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(lote)
+        buffer.seek(0)
+        cursor.copy_expert(f'COPY {q(tabla)} ({", ".join(map(q, columnas))}) FROM STDIN WITH (FORMAT csv)', buffer)
+    else:
+        marcadores = ', '.join(['%s'] * len(columnas))
+        cursor.executemany(f'INSERT INTO {q(tabla)} ({", ".join(map(q, columnas))}) VALUES ({marcadores})', lote)
+
+
+def _insertar_ignorando(destino, columnas, select):
+    """INSERT ... SELECT que omite las filas que chocan con una restricción única (ya importadas)."""
+    if connection.vendor == 'postgresql':
+        return f'INSERT INTO {destino} ({columnas}) {select} ON CONFLICT DO NOTHING'
+    return f'INSERT OR IGNORE INTO {destino} ({columnas}) {select}'
+
+
+def _pasar(cursor, modelo, tabla, columnas):
+    """De la tabla temporal a la real. Devuelve cuántas filas se insertaron."""
+    q = connection.ops.quote_name
+    destino = q(modelo._meta.db_table)
+    if modelo is Corte:
+        nuevas = [q(c) for c in columnas] + [q(c) for c in CAMPOS_COLOR] + [q('version')]
+        select = f'SELECT {", ".join(f"s.{q(c)}" for c in columnas)}, {", ".join(["%s"] * len(CAMPOS_COLOR))}, 0 FROM {q(tabla)} s'
+        cursor.execute(_insertar_ignorando(destino, ', '.join(nuevas), select), [''] * len(CAMPOS_COLOR))
+    else:
+        datos = [c for c in columnas if c != 'corte_uuid']
+        nuevas = [q(c) for c in datos] + [q('corte_id')]
+        select = (
+            f'SELECT {", ".join(f"s.{q(c)}" for c in datos)}, c.{q("id")} FROM {q(tabla)} s '
+            f'JOIN {q(Corte._meta.db_table)} c ON c.{q("uuid")} = s.{q("corte_uuid")}'
+        )
+        cursor.execute(_insertar_ignorando(destino, ', '.join(nuevas), select))
+    return cursor.rowcount
+
+
+def _colorear(cursor, tabla):
+    """Colores de los cortes recién importados, con los umbrales vigentes a su inicio."""
+    q = connection.ops.quote_name
+    cursor.execute(
+        f'SELECT c.{q("id")} FROM {q(Corte._meta.db_table)} c JOIN {q(tabla)} s ON s.{q("uuid")} = c.{q("uuid")} '
+        f'WHERE c.{q("grasa_carne_color")} = %s', ['']
+    )
+    ids = [fila[0] for fila in cursor.fetchall()]
+    configuraciones_vigentes()
+    cortes = list(Corte.objects.filter(id__in=ids).only('id', 'inicio', 'grasa_carne', 'hueso_carne', 'piezas_vendibles', *CAMPOS_COLOR))
+    for corte in cortes:
+        asignar_colores(corte, historial.configuraciones(corte.inicio))
+    Corte.objects.bulk_update(cortes, CAMPOS_COLOR, batch_size=500)
+
+
+def importar(directorio, lote=LOTE, progreso=None):
+    """
+    Importa los CSV que existan en `directorio`, en orden cortes, pausas,
+    conteos (una transacción por archivo). `progreso(archivo, leidas, segundos)`
+    se llama después de cada lote. Devuelve {archivo: (leídas, insertadas)}.
+    """
+    resultado = {}
+    q = connection.ops.quote_name
+    for nombre, (modelo, columnas) in ARCHIVOS.items():
+        ruta = os.path.join(directorio, f'{nombre}.csv')
+        if not os.path.exists(ruta):
+            continue
+        tabla = f'importar_{nombre}'
+        inicio, leidas = time.monotonic(), 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            definicion = ', '.join(f'{q(c)} {_campo(modelo, c).db_type(connection)}' for c in columnas)
+            cursor.execute(f'DROP TABLE IF EXISTS {q(tabla)}')
+            cursor.execute(f'CREATE TEMPORARY TABLE {q(tabla)} ({definicion})')
+            for filas in _lotes(ruta, modelo, columnas, lote):
+                _cargar_lote(cursor, tabla, columnas, filas)
+                leidas += len(filas)
+                if progreso:
+                    progreso(nombre, leidas, time.monotonic() - inicio)
+            insertadas = _pasar(cursor, modelo, tabla, columnas)
+            if modelo is Corte:
+                _colorear(cursor, tabla)
+            cursor.execute(f'DROP TABLE {q(tabla)}')
+        resultado[nombre] = (leidas, insertadas)
+    return resultado
+
+
+def exportar(directorio, cortes, lote=LOTE, progreso=None):
+    """
+    Escribe cortes.csv, pausas.csv y conteos.csv de los cortes del queryset
+    `cortes` en el formato de importar(). Devuelve {archivo: filas}.
+    """
+    os.makedirs(directorio, exist_ok=True)
+    resultado = {}
+    for nombre, (modelo, columnas) in ARCHIVOS.items():
+        consulta = cortes if modelo is Corte else modelo.objects.filter(corte__in=cortes.values('id'))
+        consulta = consulta.order_by('id').values_list(*['corte__uuid' if c == 'corte_uuid' else c for c in columnas])
+        inicio, filas = time.monotonic(), 0
+        with open(os.path.join(directorio, f'{nombre}.csv'), 'w', newline='', encoding='utf-8') as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(columnas)
+            if connection.vendor == 'postgresql':
+                archivo.flush()
+                sql, parametros = consulta.query.sql_with_params()
+                with connection.cursor() as cursor:
+                    cursor.copy_expert(f'COPY ({cursor.mogrify(sql, parametros).decode()}) TO STDOUT WITH (FORMAT csv)', archivo)
+                    filas = cursor.rowcount
+            else:
+                for fila in consulta.iterator(chunk_size=lote):
+                    escritor.writerow(fila)
+                    filas += 1
+                    if progreso and filas % lote == 0:
+                        progreso(nombre, filas, time.monotonic() - inicio)
+        if progreso:
+            progreso(nombre, filas, time.monotonic() - inicio)
+        resultado[nombre] = filas
+    return resultado
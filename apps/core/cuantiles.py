@@ -0,0 +1,87 @@
+# apps/core/cuantiles.py
+# Boceto KLL de cuantiles: memoria acotada (~k * 3 valores), fusionable y
+# serializable a JSON. Se guarda uno por día y métrica en ResumenDia; los
+# percentiles de un rango se sacan fusionando los bocetos de sus días.
+import math
+
+
+class KLL:
+    """
+    Compactores por nivel; un valor en el nivel h pesa 2**h. Al llenarse un
+    nivel se ordena y pasa la mitad de sus valores (pares o impares, alternando
+    de forma determinista) al siguiente.
+    """
+
+    def __init__(self, k=200, c=2 / 3):
+        self.k = k
+        self.c = c
+        self.n = 0
+        self.niveles = [[]]
+        self.paridad = [0]
+
+    def __len__(self):
+        return self.n
+
+    def _capacidad(self, nivel):
+        altura = len(self.niveles) - nivel - 1
+        return max(2, int(math.ceil(self.k * self.c ** altura)))
+
+    def _compactar(self):
+        while sum(len(n) for n in self.niveles) >= sum(self._capacidad(h) for h in range(len(self.niveles))):
+            for h, nivel in enumerate(self.niveles):
+                if len(nivel) >= self._capacidad(h):
+                    if h + 1 == len(self.niveles):
+                        self.niveles.append([])
+                        self.paridad.append(0)
+                    nivel.sort()
+                    # con longitud impar el mayor se queda en el nivel
+                    sobrante = [nivel.pop()] if len(nivel) % 2 else []
+                    self.niveles[h + 1].extend(nivel[self.paridad[h]::2])
+                    self.paridad[h] ^= 1
+                    self.niveles[h] = sobrante
+                    break
+
+    def actualizar(self, valor):
+        if valor is None:
+            return
+        self.niveles[0].append(float(valor))
+        self.n += 1
+        self._compactar()
+
+    def fusionar(self, otro):
+        while len(self.niveles) < len(otro.niveles):
+            self.niveles.append([])
+            self.paridad.append(0)
+        for h, nivel in enumerate(otro.niveles):
+            self.niveles[h].extend(nivel)
+        self.n += otro.n
+        self._compactar()
+        return self
+
+    def cuantiles(self, qs):
+        """Valores aproximados para cada q en [0, 1] (None si el boceto está vacío)."""
+        pesados = sorted((v, 2 ** h) for h, nivel in enumerate(self.niveles) for v in nivel)
+        total = sum(p for _, p in pesados)
+        resultado = []
+        for q in qs:
+            if not pesados:
+                resultado.append(None)
+                continue
+            objetivo, acumulado = q * total, 0
+            for valor, peso in pesados:
+                acumulado += peso
+                if acumulado >= objetivo:
+                    break
+            resultado.append(valor)
+        return resultado
+
+    def a_dict(self):
+        return {'k': self.k, 'n': self.n, 'niveles': self.niveles, 'paridad': self.paridad}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        boceto = cls(k=datos['k'])
+        boceto.n = datos['n']
+        boceto.niveles = [list(n) for n in datos['niveles']]
+        boceto.paridad = list(datos['paridad'])
+        return boceto
@@ -0,0 +1,303 @@
+# apps/core/diario.py
+# Diario de eventos de un corte: creado, iniciado, pausado, reanudado,
+# finalizado y lotes de conteos, en orden por `secuencia`. Es la fuente de
+# las transiciones: Corte.inicio/fin y Pausa se actualizan como proyección
+# en la misma transacción que el evento. El estado actual es la última
+# instantánea más los eventos que le siguen; la línea de tiempo completa es
+# un recorrido secuencial de los eventos del corte.
+#
+# Varios workers e hilos (botones físicos, vistas, watchdog) pueden disparar
+# transiciones a la vez. Corte.version es la secuencia del último evento: cada
+# evento la sube con un UPDATE, que bloquea la fila del corte hasta el commit
+# y serializa los eventos de ese corte sin candados globales. Las transiciones
+# validan contra el estado leído y sólo escriben si la versión no cambió; si
+# cambió, releen y reintentan.
+import threading
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Sum
+
+from . import notificaciones
+from .models import Conteo, Corte, EventoCorte, InstantaneaCorte, Pausa
+
+CREADO, INICIADO, PAUSADO, REANUDADO, FINALIZADO, CONTEOS = 'creado', 'iniciado', 'pausado', 'reanudado', 'finalizado', 'conteos'
+
+# Cada cuántos eventos se guarda una instantánea (además de al finalizar)
+INSTANTANEA_CADA = 50
+LOTE_CONTEOS = 20
+REINTENTOS = 5
+
+
+class TransicionInvalida(Exception):
+    """La transición no aplica al estado del corte; el mensaje es para el usuario."""
+
+
+def estado_inicial():
+    return {
+        'estado': 'sin_iniciar',
+        'inicio': None,
+        'fin': None,
+        'pausas': 0,
+        'pausa_abierta': None,
+        'segundos_pausado': 0.0,
+        'conteos': 0,
+        'canales': 0.0,
+        'ultimo_conteo': 0,
+        'secuencia': 0,
+    }
+
+
+def _fecha(valor):
+    return datetime.fromisoformat(valor) if isinstance(valor, str) else valor
+
+
+def aplicar(estado, tipo, momento, datos, secuencia):
+    """Estado después de un evento (no modifica `estado`)."""
+    estado = dict(estado, secuencia=secuencia)
+    momento = _fecha(momento)
+    if tipo == INICIADO:
+        estado.update(estado='corriendo', inicio=momento.isoformat())
+    elif tipo == PAUSADO:
+        estado.update(estado='pausado', pausas=estado['pausas'] + 1, pausa_abierta=momento.isoformat())
+    elif tipo in (REANUDADO, FINALIZADO) and estado['pausa_abierta']:
+        estado['segundos_pausado'] += (momento - _fecha(estado['pausa_abierta'])).total_seconds()
+        estado['pausa_abierta'] = None
+    if tipo == REANUDADO:
+        estado['estado'] = 'corriendo'
+    elif tipo == FINALIZADO:
+        estado.update(estado='finalizado', fin=momento.isoformat())
+    elif tipo == CONTEOS:
+        estado.update(
+            conteos=estado['conteos'] + datos['conteos'],
+            canales=estado['canales'] + datos['canales'],
+            ultimo_conteo=datos['hasta_id'],
+        )
+    return estado
+
+
+def reproducir(eventos, estado=None):
+    """Aplica tuplas (secuencia, tipo, momento, datos) en orden."""
+    estado = estado or estado_inicial()
+    for secuencia, tipo, momento, datos in eventos:
+        estado = aplicar(estado, tipo, momento, datos, secuencia)
+    return estado
+
+
+def consulta_eventos(corte_id, desde=0):
+    return EventoCorte.objects.filter(corte_id=corte_id, secuencia__gt=desde).order_by('secuencia').values_list('secuencia', 'tipo', 'momento', 'datos')
+
+
+def consulta_instantanea(corte_id, hasta=None):
+    """Última instantánea del corte (con `hasta`, la última hasta esa secuencia)."""
+    instantaneas = InstantaneaCorte.objects.filter(corte_id=corte_id)
+    if hasta is not None:
+        instantaneas = instantaneas.filter(secuencia__lte=hasta)
+    return instantaneas.order_by('-secuencia').values_list('secuencia', 'estado')[:1]
+
+
+def estado_actual(corte_id):
+    """Última instantánea más la cola de eventos posteriores (dos consultas)."""
+    desde, estado = next(iter(consulta_instantanea(corte_id)), (0, None))
+    return reproducir(consulta_eventos(corte_id, desde), estado)
+
+
+def siguiente_secuencia(corte_id, version=None):
+    """
+    Sube Corte.version y devuelve la nueva (la secuencia del evento). Con
+    `version`, sólo si el corte sigue en esa versión; si no, devuelve None.
+    """
+    cortes = Corte.objects.filter(id=corte_id)
+    if version is not None:
+        cortes = cortes.filter(version=version)
+    if not cortes.update(version=F('version') + 1):
+        return None
+    if version is not None:
+        return version + 1
+    return Corte.objects.filter(id=corte_id).values_list('version', flat=True).get()
+
+
+def anotar(corte, tipo, momento, datos=None, secuencia=None):
+    """Agrega un evento; cada INSTANTANEA_CADA eventos y al finalizar guarda el estado."""
+    with transaction.atomic():
+        if secuencia is None:
+            secuencia = siguiente_secuencia(corte.id)
+        evento = EventoCorte.objects.create(corte=corte, secuencia=secuencia, tipo=tipo, momento=momento, datos=datos or {})
+        if evento.secuencia % INSTANTANEA_CADA == 0 or tipo == FINALIZADO:
+            InstantaneaCorte.objects.create(corte=corte, secuencia=evento.secuencia, estado=estado_actual(corte.id))
+    return evento
+
+
+def proyectar(corte, tipo, momento):
+    """Actualiza Corte/Pausa según el evento. Devuelve el momento guardado."""
+    if tipo == INICIADO:
+        corte.inicio = momento
+        corte.save(update_fields=['inicio'])
+    elif tipo == PAUSADO:
+        # inicio_pausa es auto_now_add: el evento toma la hora que quedó en la fila
+        momento = Pausa.objects.create(corte=corte).inicio_pausa
+    elif tipo == REANUDADO:
+        Pausa.objects.filter(corte=corte, fin_pausa__isnull=True).update(fin_pausa=momento)
+    elif tipo == FINALIZADO:
+        corte.fin = momento
+        corte.save(update_fields=['fin'])
+    return momento
+
+
+def validar(tipo, inicio, fin, pausa_abierta):
+    """Lanza TransicionInvalida si `tipo` no aplica al estado."""
+    if tipo == INICIADO and inicio:
+        raise TransicionInvalida('Corte ya iniciado')
+    if tipo == REANUDADO and not pausa_abierta:
+        raise TransicionInvalida('Nada que reanudar')
+    if tipo in (PAUSADO, FINALIZADO) and (not inicio or fin):
+        raise TransicionInvalida('Corte no iniciado' if tipo == PAUSADO else 'Corte no finalizado')
+    if tipo == PAUSADO and pausa_abierta:
+        raise TransicionInvalida('Ya existe una pausa abierta')
+
+
+def conteos_pendientes(corte_id, hasta_id=None):
+    """Conteos del corte guardados después del último lote anotado (hasta `hasta_id`), agregados; None si no hay."""
+    desde = estado_actual(corte_id)['ultimo_conteo']
+    conteos = Conteo.objects.filter(corte_id=corte_id, id__gt=desde)
+    if hasta_id is not None:
+        conteos = conteos.filter(id__lte=hasta_id)
+    resto = conteos.aggregate(conteos=Count('id'), canales=Sum('cantidad'), hasta_id=Max('id'), momento=Max('hora'))
+    return resto if resto['conteos'] else None
+
+
+def anotar_conteos(corte_id, hasta_id=None):
+    """
+    Anota como un lote los conteos pendientes del corte, leídos de la base con
+    la fila del corte bloqueada: no importa qué proceso los guardó ni si otro
+    ya anotó parte. El diario se cierra en FINALIZADO: después ya no se anota.
+    """
+    with transaction.atomic():
+        if Corte.objects.select_for_update().filter(id=corte_id).values_list('fin', flat=True).get():
+            return None
+        pendientes = conteos_pendientes(corte_id, hasta_id)
+        if pendientes:
+            return anotar(Corte(id=corte_id), CONTEOS, pendientes.pop('momento'), pendientes)
+    return None
+
+
+def es_pausa_abierta(error):
+    """Si el IntegrityError es de pausa_abierta_unica (PostgreSQL da el nombre; SQLite, la tabla y columna)."""
+    nombre = getattr(getattr(error.__cause__, 'diag', None), 'constraint_name', None)
+    if nombre:
+        return nombre == 'pausa_abierta_unica'
+    mensaje = str(error)
+    return 'pausa_abierta_unica' in mensaje or mensaje.endswith(f'{Pausa._meta.db_table}.corte_id')
+
+
+def transicion(corte, tipo, momento=None):
+    """
+    Evento de estado y su proyección en una sola transacción, validados contra
+    la versión leída del corte (reintenta si otro la cambió entre tanto). En la
+    misma transacción se anotan antes los conteos pendientes, guardados por
+    este proceso o por otro. Lanza TransicionInvalida.
+    """
+    for _ in range(REINTENTOS):
+        inicio, fin, version = Corte.objects.filter(id=corte.id).values_list('inicio', 'fin', 'version').get()
+        validar(tipo, inicio, fin, Pausa.objects.filter(corte_id=corte.id, fin_pausa__isnull=True).exists())
+        try:
+            with transaction.atomic():
+                secuencia = siguiente_secuencia(corte.id, version)
+                if secuencia is None:
+                    continue
+                pendientes = conteos_pendientes(corte.id) if inicio else None
+                if pendientes:
+                    anotar(corte, CONTEOS, pendientes.pop('momento'), pendientes, secuencia=secuencia)
+                    secuencia = siguiente_secuencia(corte.id)
+                corte.inicio, corte.fin, corte.version = inicio, fin, secuencia
+                momento = proyectar(corte, tipo, momento or datetime.now())
+                evento = anotar(corte, tipo, momento, secuencia=secuencia)
+                notificaciones.publicar('corte', corte=corte.id, evento=tipo, version=secuencia)
+                return evento
+        except IntegrityError as e:
+            if es_pausa_abierta(e):
+                # Una pausa abierta creada fuera del diario (p. ej. desde el admin)
+                raise TransicionInvalida('Ya existe una pausa abierta')
+            # Otra secuencia ocupada entre tanto (anotar_conteos de otro proceso): se vuelve a leer
+            continue
+    raise TransicionInvalida('El corte cambió durante la acción, intente de nuevo')
+
+
+class LoteConteos:
+    """
+    Cuenta en memoria los conteos que guarda el hilo de ingesta y cada
+    LOTE_CONTEOS los anota como un solo evento (anotar_conteos, desde la base).
+    Al arrancar, ponerse_al_dia() anota los que quedaron fuera por un reinicio.
+    """
+
+    def __init__(self, tamano=LOTE_CONTEOS):
+        self.tamano = tamano
+        self._lock = threading.Lock()
+        self._corte_id = None
+        self._conteos = 0
+        self._hasta = None
+
+    def agregar(self, conteo):
+        with self._lock:
+            if conteo.corte_id != self._corte_id:
+                self._vaciar()
+                self._corte_id = conteo.corte_id
+            self._conteos += 1
+            self._hasta = conteo.id
+            if self._conteos >= self.tamano:
+                self._vaciar()
+
+    def vaciar(self, corte_id=None):
+        with self._lock:
+            if corte_id is None or corte_id == self._corte_id:
+                self._vaciar()
+
+    def _vaciar(self):
+        if not self._conteos:
+            return
+        anotar_conteos(self._corte_id, self._hasta)
+        self._conteos = 0
+
+    def ponerse_al_dia(self, corte):
+        """Anota como un lote los conteos del corte posteriores al último lote anotado."""
+        with self._lock:
+            self._vaciar()
+            anotar_conteos(corte.id)
+
+
+lote_conteos = LoteConteos()
+
+
+def linea_de_tiempo(eventos, estado=None, desde=0):
+    """Eventos (de consulta_eventos) con el estado después de cada uno; sólo se devuelven los posteriores a `desde`."""
+    estado = estado or estado_inicial()
+    linea = []
+    for secuencia, tipo, momento, datos in eventos:
+        estado = aplicar(estado, tipo, momento, datos, secuencia)
+        if secuencia > desde:
+            linea.append({'secuencia': secuencia, 'tipo': tipo, 'momento': momento, 'datos': datos, 'estado': estado})
+    return linea
+
+
+def reconstruir(corte):
+    """Genera el diario de un corte que no lo tiene a partir de Corte, Pausa y Conteo (datos previos)."""
+    if EventoCorte.objects.filter(corte=corte).exists():
+        return 0
+    eventos = []
+    if corte.inicio:
+        eventos.append((corte.inicio, INICIADO, {}))
+    for inicio_pausa, fin_pausa in Pausa.objects.filter(corte=corte).order_by('id').values_list('inicio_pausa', 'fin_pausa'):
+        eventos.append((inicio_pausa, PAUSADO, {}))
+        if fin_pausa:
+            eventos.append((fin_pausa, REANUDADO, {}))
+    # Los conteos van en lotes de LOTE_CONTEOS, como los anota la ingesta
+    conteos = list(Conteo.objects.filter(corte=corte).order_by('id').values_list('id', 'hora', 'cantidad'))
+    for i in range(0, len(conteos), LOTE_CONTEOS):
+        lote = conteos[i:i + LOTE_CONTEOS]
+        eventos.append((lote[-1][1], CONTEOS, {'conteos': len(lote), 'canales': sum(c[2] for c in lote), 'hasta_id': lote[-1][0]}))
+    if corte.fin:
+        eventos.append((corte.fin, FINALIZADO, {}))
+    eventos.sort(key=lambda e: e[0])
+    for momento, tipo, datos in eventos:
+        anotar(corte, tipo, momento, datos)
+    return len(eventos)
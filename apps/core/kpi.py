@@ -0,0 +1,177 @@
+# apps/core/kpi.py
+# Indicadores de ritmo calculados con NumPy sobre la serie de conteos de un corte.
+# Todos los tiempos se pasan a un eje de "tiempo activo" (segundos desde el
+# inicio sin contar pausas), así una pausa no cuenta como hueco ni baja el ritmo.
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# Ventanas de ritmo móvil (minutos)
+VENTANAS = (5, 15, 60)
+HUECOS = 5
+# Con menos tiempo activo (segundos) un ritmo por hora no es representativo: se devuelve None
+ACTIVO_MINIMO = 60
+
+EPOCA = datetime(1970, 1, 1)
+
+
+def a_segundos(fechas):
+    """Lista de datetime (naive, USE_TZ=False) -> arreglo de segundos."""
+    return np.array(fechas, dtype='datetime64[us]').astype(np.int64) / 1e6
+
+
+def a_fecha(segundos):
+    return EPOCA + timedelta(seconds=float(segundos))
+
+
+def arreglo_pausas(pausas, abierta_hasta):
+    """
+    Pausas (inicio_pausa, fin_pausa) -> arreglos (inicios, duraciones) ordenados.
+    Una pausa abierta dura hasta `abierta_hasta` (ahora, o infinito para mapear
+    conteos: lo que llega en una pausa abierta queda al inicio de la pausa).
+    """
+    if not pausas:
+        return np.empty(0), np.empty(0)
+    inicios = a_segundos([p[0] for p in pausas])
+    fines = np.array([a_segundos([p[1]])[0] if p[1] else abierta_hasta for p in pausas])
+    orden = np.argsort(inicios)
+    return inicios[orden], np.maximum(fines[orden] - inicios[orden], 0)
+
+
+def tiempo_activo(t, inicio, inicios, duraciones):
+    """Segundos activos (sin pausas) entre `inicio` y cada instante de `t`, vectorizado."""
+    t = np.asarray(t, dtype=float)
+    if not len(inicios):
+        return t - inicio
+    acumulado = np.concatenate(([0.0], np.cumsum(duraciones)))
+    k = np.searchsorted(inicios, t, side='right')
+    previa = np.clip(t - inicios[np.maximum(k - 1, 0)], 0, duraciones[np.maximum(k - 1, 0)])
+    pausado = acumulado[np.maximum(k - 1, 0)] + np.where(k > 0, previa, 0)
+    return t - inicio - pausado
+
+
+def canales_hora_real(canales, inicio, fin, pausas, ahora=None):
+    """
+    Canales por hora activa para un corte (escalar, sin la serie de conteos):
+    lo usan los reportes en lote con la suma de conteos ya agregada. None con
+    menos de ACTIVO_MINIMO segundos activos.
+    """
+    if not inicio:
+        return 0
+    fin = fin or ahora or datetime.now()
+    pausado = sum(((p['fin_pausa'] or fin) - p['inicio_pausa']).total_seconds() for p in pausas)
+    activo = (fin - inicio).total_seconds() - pausado
+    return round((canales or 0) / (activo / 3600), 2) if activo >= ACTIVO_MINIMO else None
+
+
+class SerieKpi:
+    """
+    Serie de conteos de un corte en el eje de tiempo activo.
+    - Lote: `agregar` una vez con todos los conteos (reportes, cortes cerrados).
+    - Incremental: `agregar` sólo los conteos con id mayor al último visto
+      (corte en vivo); la base sólo devuelve los conteos nuevos y la serie
+      ya mapeada no se vuelve a calcular.
+    """
+
+    def __init__(self, corte):
+        self.corte_id = corte.id
+        self.inicio = float(a_segundos([corte.inicio])[0])
+        self.planeado = corte.tiempo_entre_canales
+        self.canales_hora_plan = corte.canales_hora
+        self.ultimo_id = 0
+        self.t = np.empty(0)
+        self.activo = np.empty(0)
+        self.acumulado = np.empty(0)
+
+    def __len__(self):
+        return len(self.t)
+
+    def agregar(self, filas, pausas):
+        """filas: tuplas (id, hora, cantidad) ordenadas por id; pausas: (inicio_pausa, fin_pausa)."""
+        filas = [f for f in filas if f[0] > self.ultimo_id]
+        if not filas:
+            return
+        t = a_segundos([f[1] for f in filas])
+        cantidades = np.array([f[2] for f in filas], dtype=float)
+        inicios, duraciones = arreglo_pausas(pausas, np.inf)
+        activo = np.maximum(tiempo_activo(t, self.inicio, inicios, duraciones), 0)
+        base = self.acumulado[-1] if len(self.acumulado) else 0.0
+        self.t = np.concatenate((self.t, t))
+        self.activo = np.concatenate((self.activo, activo))
+        self.acumulado = np.concatenate((self.acumulado, base + np.cumsum(cantidades)))
+        self.ultimo_id = filas[-1][0]
+
+    def resumen(self, pausas, fin=None, ventanas=VENTANAS, huecos=HUECOS):
+        """KPIs al instante `fin` (fin del corte o ahora para un corte en vivo)."""
+        fin = float(a_segundos([fin or datetime.now()])[0])
+        inicios, duraciones = arreglo_pausas(pausas, fin)
+        pausado = float(np.clip(fin - inicios, 0, duraciones).sum()) if len(inicios) else 0.0
+        activo_total = max(fin - self.inicio - pausado, 0.0)
+        canales = float(self.acumulado[-1]) if len(self.acumulado) else 0.0
+        return {
+            'corte': self.corte_id,
+            'canales': canales,
+            'tiempo_activo': round(activo_total, 1),
+            'tiempo_pausado': round(pausado, 1),
+            'canales_hora': round(canales / (activo_total / 3600), 2) if activo_total >= ACTIVO_MINIMO else None,
+            'canales_hora_plan': self.canales_hora_plan,
+            'tiempo_entre_canales': self._tiempo_entre_canales(canales, activo_total),
+            'ritmos': {str(v): self._ritmo(v * 60, activo_total) for v in ventanas},
+            'huecos': self._huecos(activo_total, fin, huecos),
+        }
+
+    def _tiempo_entre_canales(self, canales, activo_total):
+        mediana = None
+        if len(self.activo) > 1:
+            # segundos por canal entre conteos consecutivos (cada pulso es media canal)
+            intervalos = np.diff(self.activo) / np.diff(self.acumulado)
+            mediana = round(float(np.median(intervalos)), 2)
+        real = round(activo_total / canales, 2) if canales else None
+        return {
+            'plan': self.planeado,
+            'real': real,
+            'mediana': mediana,
+            'desviacion': round(real - self.planeado, 2) if real is not None else None,
+        }
+
+    def _ritmo(self, ventana, activo_total):
+        """Canales/hora en la última ventana y máximo sostenido en cualquier ventana completa."""
+        acumulado = np.concatenate(([0.0], self.acumulado))
+        desde = np.searchsorted(self.activo, activo_total - ventana, side='right')
+        actual = None
+        if activo_total >= ACTIVO_MINIMO:
+            actual = round(float((acumulado[-1] - acumulado[desde]) / (min(ventana, activo_total) / 3600)), 2)
+        maximo = None
+        completas = self.activo >= ventana
+        if completas.any():
+            j = np.searchsorted(self.activo, self.activo[completas] - ventana, side='right')
+            maximo = round(float((acumulado[1:][completas] - acumulado[j]).max()) / (ventana / 3600), 2)
+        return {'actual': actual, 'maximo': maximo}
+
+    def _huecos(self, activo_total, fin, cantidad):
+        """Huecos más largos entre conteos (sin pausas), incluyendo el del último conteo a `fin`."""
+        if not len(self.activo):
+            return []
+        bordes = np.concatenate(([0.0], self.activo, [activo_total]))
+        pared = np.concatenate(([self.inicio], self.t, [fin]))
+        duraciones = np.diff(bordes)
+        cantidad = min(cantidad, len(duraciones))
+        mayores = np.argpartition(duraciones, -cantidad)[-cantidad:]
+        mayores = mayores[np.argsort(duraciones[mayores])[::-1]]
+        return [{
+            'desde': a_fecha(pared[i]),
+            'hasta': a_fecha(pared[i + 1]),
+            'segundos': round(float(duraciones[i]), 1),
+        } for i in mayores if duraciones[i] > 0]
+
+
+# Serie del corte en vivo por proceso; se extiende con los conteos nuevos
+_en_vivo = {}
+
+
+def serie_en_vivo(corte):
+    serie = _en_vivo.get(corte.id)
+    if serie is None:
+        _en_vivo.clear()
+        serie = _en_vivo[corte.id] = SerieKpi(corte)
+    return serie
@@ -0,0 +1,49 @@
+import json
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from rest_framework.utils.encoders import JSONEncoder
+
+from apps.core.models import Corte, Conteo
+from apps.core.renderers import a_json, a_msgpack, codificar_filas
+from apps.core.reportes import PlanFilas
+from apps.core.views_async import filas_cortes
+
+
+def json_drf(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+class Command(BaseCommand):
+    help = 'Compara tiempo y bytes de serialización (JSON de DRF, orjson, MessagePack) por endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=365, help='Rango de report1/report2')
+        parser.add_argument('--repeticiones', type=int, default=20)
+
+    def handle(self, *args, **options):
+        desde = datetime.now() - timedelta(days=options['dias'])
+        corte = Corte.objects.last()
+        conteos = list(Conteo.objects.filter(corte=corte).values_list('hora', 'cantidad')) if corte else []
+        casos = {
+            'last5': async_to_sync(filas_cortes)(Corte.objects.order_by('-id')[:5]),
+            'report1': async_to_sync(filas_cortes)(Corte.objects.filter(inicio__gte=desde).order_by('id')),
+            'report2 (sin pausas)': async_to_sync(filas_cortes)(Corte.objects.filter(inicio__gte=desde).order_by('id'), PlanFilas(incluir_pausas=False)),
+            'monitor.conteos': codificar_filas(('hora', 'cantidad'), conteos),
+            'monitor.conteos (compacto)': codificar_filas(('hora', 'cantidad'), conteos, compacto=True),
+        }
+        serializadores = (('drf-json', json_drf), ('orjson', a_json), ('msgpack', a_msgpack))
+
+        self.stdout.write(f'{"endpoint":<28}{"formato":<10}{"bytes":>10}{"ms":>10}{"ahorro":>9}')
+        for nombre, data in casos.items():
+            base = None
+            for formato, serializar in serializadores:
+                inicio = perf_counter()
+                for _ in range(options['repeticiones']):
+                    contenido = serializar(data)
+                ms = (perf_counter() - inicio) * 1000 / options['repeticiones']
+                base = base or len(contenido)
+                ahorro = 100 * (1 - len(contenido) / base) if base else 0
+                self.stdout.write(f'{nombre:<28}{formato:<10}{len(contenido):>10}{ms:>10.3f}{ahorro:>8.1f}%')
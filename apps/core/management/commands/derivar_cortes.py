@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.sincronizacion import derivar_recibidos
+
+
+class Command(BaseCommand):
+    help = 'En la central: genera diario, tiempo muerto y resúmenes de los cortes finalizados que subieron las Pi (para cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--factor', type=float, default=None, help='Por defecto TIEMPO_MUERTO_FACTOR')
+
+    def handle(self, *args, **options):
+        if settings.EDGE:
+            raise CommandError('Sólo en la central (sin EDGE)')
+        cortes = derivar_recibidos(options['factor'] or settings.TIEMPO_MUERTO_FACTOR)
+        self.stdout.write(f'{cortes} cortes procesados')
@@ -0,0 +1,28 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from apps.core.carga_masiva import exportar, LOTE
+from apps.core.models import Corte
+
+
+class Command(BaseCommand):
+    help = 'Exporta cortes, pausas y conteos a CSV en un directorio, en el formato de importar_datos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directorio')
+        parser.add_argument('--desde', help='YYYY-MM-DD; cortes que iniciaron desde esa fecha')
+        parser.add_argument('--hasta', help='YYYY-MM-DD; cortes que iniciaron antes de esa fecha')
+        parser.add_argument('--lote', type=int, default=LOTE, help='Filas por lectura (SQLite)')
+
+    def progreso(self, archivo, filas, segundos):
+        self.stdout.write(f'{archivo}: {filas} filas ({filas / max(segundos, 1e-6):.0f} filas/s)')
+
+    def handle(self, *args, **options):
+        cortes = Corte.objects.all()
+        if options['desde']:
+            cortes = cortes.filter(inicio__gte=datetime.strptime(options['desde'], '%Y-%m-%d'))
+        if options['hasta']:
+            cortes = cortes.filter(inicio__lt=datetime.strptime(options['hasta'], '%Y-%m-%d'))
+        resultado = exportar(options['directorio'], cortes, options['lote'], self.progreso)
+        self.stdout.write(', '.join(f'{filas} {archivo}' for archivo, filas in resultado.items()))
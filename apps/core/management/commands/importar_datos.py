@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.carga_masiva import importar, LOTE
+
+
+class Command(BaseCommand):
+    help = 'Importa cortes.csv, pausas.csv y conteos.csv de un directorio (COPY en PostgreSQL); las filas ya importadas se omiten'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directorio')
+        parser.add_argument('--lote', type=int, default=LOTE, help='Filas por lote al cargar la tabla temporal')
+
+    def progreso(self, archivo, filas, segundos):
+        self.stdout.write(f'{archivo}: {filas} filas leídas ({filas / max(segundos, 1e-6):.0f} filas/s)')
+
+    def handle(self, *args, **options):
+        try:
+            resultado = importar(options['directorio'], options['lote'], self.progreso)
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        if not resultado:
+            raise CommandError('No hay cortes.csv, pausas.csv ni conteos.csv en el directorio')
+        for archivo, (leidas, insertadas) in resultado.items():
+            self.stdout.write(f'{archivo}: {insertadas} insertadas, {leidas - insertadas} omitidas (ya existían o sin corte)')
+        if any(insertadas for leidas, insertadas in resultado.values()):
+            self.stdout.write(
+                'Después: recalcular_tiempo_muerto, reconstruir_diario, resumir_horas --todo y '
+                'reconstruir_resumen_dia para los cortes importados'
+            )
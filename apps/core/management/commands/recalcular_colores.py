@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from apps.core.models import Corte
+from apps.core.reportes import asignar_colores, CAMPOS_COLOR
+from apps.core.umbrales import configuraciones_vigentes, historial
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los colores guardados de los cortes con la versión de umbrales vigente al inicio de cada uno'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='YYYY-MM-DD; por defecto todos los cortes')
+
+    def handle(self, *args, **options):
+        configuraciones_vigentes()
+        cortes = Corte.objects.all()
+        if options['desde']:
+            cortes = cortes.filter(inicio__gte=datetime.strptime(options['desde'], '%Y-%m-%d'))
+        cortes = list(cortes.only('id', 'inicio', 'grasa_carne', 'hueso_carne', 'piezas_vendibles', *CAMPOS_COLOR))
+        for corte in cortes:
+            asignar_colores(corte, historial.configuraciones(corte.inicio))
+        Corte.objects.bulk_update(cortes, CAMPOS_COLOR, batch_size=500)
+        self.stdout.write(f'{len(cortes)} cortes actualizados')
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core.models import Corte
+from apps.core.tiempo_muerto import reconstruir
+
+
+class Command(BaseCommand):
+    help = 'Recalcula los intervalos de tiempo muerto (pausas y huecos del sensor) de los cortes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corte', type=int, help='Sólo este corte')
+        parser.add_argument('--factor', type=float, default=None, help='Por defecto TIEMPO_MUERTO_FACTOR')
+
+    def handle(self, *args, **options):
+        factor = options['factor'] or settings.TIEMPO_MUERTO_FACTOR
+        cortes = Corte.objects.filter(inicio__isnull=False).order_by('id')
+        if options['corte']:
+            cortes = cortes.filter(id=options['corte'])
+        for corte in cortes.iterator():
+            intervalos = reconstruir(corte, factor)
+            total = sum((fin - inicio).total_seconds() for inicio, fin, tipo in intervalos)
+            self.stdout.write(f'Corte {corte.id}: {len(intervalos)} intervalos, {total:.0f} s')
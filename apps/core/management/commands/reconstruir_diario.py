@@ -0,0 +1,24 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from apps.core.diario import reconstruir
+from apps.core.models import Corte
+
+
+class Command(BaseCommand):
+    help = 'Genera el diario de eventos de los cortes que no lo tienen a partir de sus inicios, pausas y conteos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='YYYY-MM-DD; por defecto todos los cortes')
+
+    def handle(self, *args, **options):
+        cortes = Corte.objects.order_by('id')
+        if options['desde']:
+            cortes = cortes.filter(inicio__gte=datetime.strptime(options['desde'], '%Y-%m-%d'))
+        total = reconstruidos = 0
+        for corte in cortes.only('id', 'inicio', 'fin'):
+            eventos = reconstruir(corte)
+            total += eventos
+            reconstruidos += bool(eventos)
+        self.stdout.write(f'{reconstruidos} cortes reconstruidos, {total} eventos')
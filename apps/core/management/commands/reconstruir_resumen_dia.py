@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from apps.core.analitica import reconstruir_dias
+
+
+class Command(BaseCommand):
+    help = 'Rehace los bocetos de percentiles por día (ResumenDia) a partir de los cortes cerrados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='YYYY-MM-DD; por defecto todos los días')
+
+    def handle(self, *args, **options):
+        desde = datetime.strptime(options['desde'], '%Y-%m-%d').date() if options['desde'] else None
+        cortes = reconstruir_dias(desde)
+        self.stdout.write(f'{cortes} cortes agregados')
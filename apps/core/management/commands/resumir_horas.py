@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from apps.core.analitica import resumir_horas
+
+
+class Command(BaseCommand):
+    help = 'Agrega los conteos por hora en ResumenHora (para cron; --todo reconstruye desde el primer conteo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todo', action='store_true', help='Rehace todos los resúmenes')
+
+    def handle(self, *args, **options):
+        desde = datetime.min if options['todo'] else None
+        horas = resumir_horas(datetime.now(), desde=desde)
+        self.stdout.write(f'{horas} horas resumidas')
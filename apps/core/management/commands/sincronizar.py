@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, DatabaseError
+
+from apps.core.routers import CENTRAL
+from apps.core.sincronizacion import bajar_configuracion, encolar_todo, instalar_bitacora, subir
+
+
+class Command(BaseCommand):
+    help = 'Agente de sincronización del modo edge: sube cortes, pausas y conteos a la central y baja la configuración'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', help='Sincroniza lo pendiente y termina (para cron)')
+        parser.add_argument('--todo', action='store_true', help='Anota todas las filas existentes antes de sincronizar')
+        parser.add_argument('--cada', type=float, default=settings.SYNC_CADA, help='Segundos entre sincronizaciones')
+        parser.add_argument('--lote', type=int, default=settings.SYNC_LOTE, help='Cambios por lote')
+
+    def handle(self, *args, **options):
+        if not settings.EDGE:
+            raise CommandError('Sólo en modo edge (EDGE=1)')
+        instalar_bitacora()
+        if options['todo']:
+            encolar_todo()
+        while True:
+            try:
+                versiones = bajar_configuracion()
+                subidos = 0
+                while True:
+                    procesados = subir(options['lote'])
+                    subidos += procesados
+                    if procesados < options['lote']:
+                        break
+                if subidos or versiones or options['una_vez']:
+                    self.stdout.write(f'{subidos} cambios subidos, {versiones} versiones de configuración nuevas')
+            except DatabaseError as e:
+                # Sin red o sin central: los cambios se quedan en la bitácora para el siguiente intento
+                if options['una_vez']:
+                    raise CommandError(f'Central no disponible: {e}')
+                self.stderr.write(f'Central no disponible: {e}')
+                connections[CENTRAL].close()
+            if options['una_vez']:
+                return
+            time.sleep(options['cada'])
@@ -0,0 +1,176 @@
+# apps/core/metricas.py
+# Métricas en memoria con salida en formato de texto de Prometheus.
+# Pensadas para dejarse encendidas en la Pi: cada observación es un bisect
+# y una suma bajo lock, sin dependencias externas.
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _etiquetas(nombres, valores, extra=''):
+    partes = [f'{n}="{str(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return '{' + ','.join(partes) + '}' if partes else ''
+
+
+class Contador:
+
+    tipo = 'counter'
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *valores, cantidad=1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def exponer(self):
+        with self._lock:
+            items = list(self._valores.items())
+        for valores, total in items:
+            yield f'{self.nombre}{_etiquetas(self.etiquetas, valores)} {total}'
+
+
+class Histograma:
+
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_SEGUNDOS):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.buckets = tuple(buckets)
+        self._series = {}  # valores -> [conteos por bucket..., +Inf, suma]
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores):
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [0] * (len(self.buckets) + 2)
+            serie[indice] += 1
+            serie[-1] += valor
+
+    def exponer(self):
+        with self._lock:
+            items = [(v, list(s)) for v, s in self._series.items()]
+        for valores, serie in items:
+            acumulado = 0
+            for limite, cantidad in zip(self.buckets, serie):
+                acumulado += cantidad
+                le = 'le="%s"' % limite
+                yield f'{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, le)} {acumulado}'
+            acumulado += serie[-2]
+            le = 'le="+Inf"'
+            yield f'{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, le)} {acumulado}'
+            yield f'{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {serie[-1]}'
+            yield f'{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {acumulado}'
+
+
+class Registro:
+
+    def __init__(self):
+        self._metricas = []
+        self._colectores = []
+
+    def contador(self, *args, **kwargs):
+        metrica = Contador(*args, **kwargs)
+        self._metricas.append(metrica)
+        return metrica
+
+    def histograma(self, *args, **kwargs):
+        metrica = Histograma(*args, **kwargs)
+        self._metricas.append(metrica)
+        return metrica
+
+    def colector(self, funcion):
+        """
+        Registra una función que se evalúa sólo al exponer. Debe devolver
+        tuplas (nombre, tipo, ayuda, [(etiquetas_dict, valor), ...]).
+        Sirve para leer contadores que ya existen (filtro del sensor, cola)
+        sin costo en el camino caliente.
+        """
+        self._colectores.append(funcion)
+        return funcion
+
+    def exponer(self):
+        lineas = []
+        for metrica in self._metricas:
+            lineas.append(f'# HELP {metrica.nombre} {metrica.ayuda}')
+            lineas.append(f'# TYPE {metrica.nombre} {metrica.tipo}')
+            lineas.extend(metrica.exponer())
+        for funcion in self._colectores:
+            try:
+                familias = funcion()
+            except Exception as e:
+                lineas.append(f'# colector {funcion.__name__} falló: {e}')
+                continue
+            for nombre, tipo, ayuda, muestras in familias:
+                lineas.append(f'# HELP {nombre} {ayuda}')
+                lineas.append(f'# TYPE {nombre} {tipo}')
+                for etiquetas, valor in muestras:
+                    lineas.append(f'{nombre}{_etiquetas(etiquetas.keys(), etiquetas.values())} {valor}')
+        return '\n'.join(lineas) + '\n'
+
+
+registro = Registro()
+
+peticiones = registro.contador('cortes_http_requests_total', 'Peticiones atendidas', ('ruta', 'metodo', 'codigo'))
+latencia = registro.histograma('cortes_http_request_duration_seconds', 'Latencia por ruta', ('ruta', 'metodo'))
+tamano = registro.histograma('cortes_http_response_size_bytes', 'Tamaño de la respuesta por ruta', ('ruta',), buckets=BUCKETS_BYTES)
+consultas_db = registro.histograma('cortes_http_db_queries', 'Consultas SQL por petición', ('ruta',), buckets=BUCKETS_CONSULTAS)
+tiempo_db = registro.histograma('cortes_http_db_duration_seconds', 'Tiempo en base de datos por petición', ('ruta',))
+transiciones = registro.contador('cortes_transiciones_total', 'Transiciones de estado del corte', ('evento',))
+lecturas = registro.contador('cortes_db_lecturas_total', 'Lecturas de vistas de reporte por base de datos', ('base', 'motivo'))
+
+
+# --- Medición de consultas por petición ---
+# El contexto se copia a los hilos de sync_to_async, así que también cuenta
+# las consultas del ORM asíncrono.
+# stats = [consultas, segundos, ruta]; la ruta la completa process_view.
+consultas_actuales = ContextVar('consultas_actuales', default=None)
+
+# Funciones (sql, params, duracion, stats, context) llamadas después de cada
+# consulta; las usa el registro de consultas lentas (apps/core/perfilado.py).
+observadores_consulta = []
+
+
+def medir_consulta(execute, sql, params, many, context):
+    stats = consultas_actuales.get()
+    if stats is None and not observadores_consulta:
+        return execute(sql, params, many, context)
+    inicio = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracion = perf_counter() - inicio
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += duracion
+        for observador in observadores_consulta:
+            observador(sql, params, duracion, stats, context)
+
+
+def _instalar_wrapper(connection, **kwargs):
+    if medir_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(medir_consulta)
+
+
+def instalar_medicion_db():
+    connection_created.connect(lambda sender, connection, **kwargs: _instalar_wrapper(connection), weak=False, dispatch_uid='metricas_db')
+    for connection in connections.all(initialized_only=True):
+        _instalar_wrapper(connection)
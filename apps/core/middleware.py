@@ -0,0 +1,160 @@
+# apps/core/middleware.py
+import math
+from time import perf_counter, time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+
+from . import metricas, perfilado
+from .routers import COOKIE_ESCRITURA, marcar_escrituras
+
+
+def ruta_peticion(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'sin_ruta'
+
+
+class MetricasMiddleware:
+    """
+    Latencia, tamaño de respuesta, número de consultas y tiempo en base de
+    datos por ruta. Va primero en MIDDLEWARE para medir la petición completa.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+        metricas.instalar_medicion_db()
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        stats = [0, 0.0, None]
+        token = metricas.consultas_actuales.set(stats)
+        inicio = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metricas.consultas_actuales.reset(token)
+        self.registrar(request, response, perf_counter() - inicio, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = [0, 0.0, None]
+        token = metricas.consultas_actuales.set(stats)
+        inicio = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metricas.consultas_actuales.reset(token)
+        self.registrar(request, response, perf_counter() - inicio, stats)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # La lista se comparte con los contextos copiados de sync_to_async
+        stats = metricas.consultas_actuales.get()
+        if stats is not None:
+            stats[2] = ruta_peticion(request)
+
+    def registrar(self, request, response, duracion, stats):
+        ruta = ruta_peticion(request)
+        metricas.peticiones.inc(ruta, request.method, response.status_code)
+        metricas.latencia.observar(duracion, ruta, request.method)
+        metricas.consultas_db.observar(stats[0], ruta)
+        metricas.tiempo_db.observar(stats[1], ruta)
+        if not response.streaming:
+            metricas.tamano.observar(len(response.content), ruta)
+
+
+class PerfilMiddleware:
+    """
+    Perfilado bajo demanda: un administrador agrega el header `X-Perfil: 1`
+    o `?perfil=1` y la petición corre bajo cProfile. El perfil queda en el
+    admin (Perfiles de peticiones) y su id en el header X-Perfil-Id
+    (`ocupado` si otro perfil estaba corriendo en el proceso);
+    con `perfil=texto` se devuelve el perfil en lugar de la respuesta.
+    También guarda las consultas lentas capturadas durante la petición.
+    Va después de AuthenticationMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+        perfilado.instalar_consultas_lentas()
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        modo = perfilado.perfil_solicitado(request)
+        if modo and perfilado.es_administrador(request):
+            response, registro, texto = perfilado.perfilar(self.get_response, request, metricas.consultas_actuales.get())
+            response = self.con_perfil(response, modo, registro, texto)
+        else:
+            response = self.get_response(request)
+        perfilado.guardar_consultas_lentas()
+        return response
+
+    async def __acall__(self, request):
+        modo = perfilado.perfil_solicitado(request)
+        if modo and await sync_to_async(perfilado.es_administrador)(request):
+            response, registro, texto = await perfilado.aperfilar(self.get_response, request, metricas.consultas_actuales.get())
+            response = self.con_perfil(response, modo, registro, texto)
+        else:
+            response = await self.get_response(request)
+        if perfilado.hay_consultas_lentas():
+            await sync_to_async(perfilado.guardar_consultas_lentas)()
+        return response
+
+    def con_perfil(self, response, modo, registro, texto):
+        if registro is None:
+            # Otro perfil estaba activo: la respuesta va sin perfil
+            response['X-Perfil-Id'] = 'ocupado'
+            return response
+        if modo == 'texto':
+            response = HttpResponse(texto, content_type='text/plain; charset=utf-8')
+        response['X-Perfil-Id'] = registro.id
+        return response
+
+
+class EscrituraMiddleware:
+    """
+    Si la petición escribió en la base, deja al cliente la cookie con la hora
+    de la escritura: durante REPLICA_DESPUES_ESCRITURA segundos sus lecturas
+    van a la primaria (apps/core/routers.py).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.asincrono = iscoroutinefunction(get_response)
+        if self.asincrono:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.asincrono:
+            return self.__acall__(request)
+        with marcar_escrituras() as escribio:
+            response = self.get_response(request)
+        return self.marcar(response, escribio)
+
+    async def __acall__(self, request):
+        with marcar_escrituras() as escribio:
+            response = await self.get_response(request)
+        return self.marcar(response, escribio)
+
+    def marcar(self, response, escribio):
+        if escribio[0]:
+            response.set_cookie(COOKIE_ESCRITURA, f'{time():.3f}', max_age=math.ceil(settings.REPLICA_DESPUES_ESCRITURA) + 1, samesite='Lax')
+        return response
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_merge_20250108_0754'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsultaLenta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado', models.DateTimeField(auto_now=True)),
+                ('ruta', models.CharField(max_length=200)),
+                ('duracion', models.FloatField()),
+                ('sql', models.TextField()),
+                ('plan', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Consulta lenta',
+                'verbose_name_plural': 'Consultas lentas',
+                'ordering': ['-creado'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PerfilPeticion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('creado', models.DateTimeField(auto_now=True)),
+                ('ruta', models.CharField(max_length=200)),
+                ('metodo', models.CharField(max_length=10)),
+                ('duracion', models.FloatField()),
+                ('consultas', models.IntegerField()),
+                ('tiempo_db', models.FloatField()),
+                ('funciones', models.TextField()),
+            ],
+            options={
+                'verbose_name': 'Perfil de petición',
+                'verbose_name_plural': 'Perfiles de peticiones',
+                'ordering': ['-creado'],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_perfilpeticion_consultalenta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IntervaloMuerto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inicio', models.DateTimeField()),
+                ('fin', models.DateTimeField()),
+                ('tipo', models.CharField(choices=[('pausa', 'Pausa registrada'), ('hueco', 'Paro sin pausa'), ('mixto', 'Pausa y paro')], max_length=10)),
+                ('duracion', models.FloatField()),
+                ('corte', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.corte')),
+            ],
+            options={
+                'verbose_name': 'Intervalo de tiempo muerto',
+                'verbose_name_plural': 'Intervalos de tiempo muerto',
+                'ordering': ['inicio'],
+                'indexes': [models.Index(fields=['corte', 'fin'], name='core_interv_corte_i_3f954f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_intervalomuerto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenHora',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hora', models.DateTimeField(unique=True)),
+                ('canales', models.FloatField()),
+                ('conteos', models.IntegerField()),
+            ],
+            options={
+                'verbose_name': 'Resumen por hora',
+                'verbose_name_plural': 'Resúmenes por hora',
+                'ordering': ['hora'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='conteo',
+            name='hora',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_resumenhora'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('cortes', models.JSONField(default=list)),
+                ('bocetos', models.JSONField(default=dict)),
+            ],
+            options={
+                'verbose_name': 'Resumen por día',
+                'verbose_name_plural': 'Resúmenes por día',
+                'ordering': ['fecha'],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:19
+
+from django.db import migrations, models
+
+
+def calcular_colores(apps, schema_editor):
+    # Misma regla que reportes.color_menor / color_mayor con los umbrales actuales
+    Corte = apps.get_model('core', 'Corte')
+    Configuracion = apps.get_model('core', 'Configuracion')
+    configuraciones = list(Configuracion.objects.order_by('id'))
+    if len(configuraciones) < 3:
+        return
+
+    def menor(valor, config):
+        return 'Verde' if valor < config.verde else 'Amarillo' if valor < config.amarillo else 'Rojo'
+
+    def mayor(valor, config):
+        return 'Verde' if valor >= config.verde else 'Amarillo' if valor >= config.amarillo else 'Rojo'
+
+    cortes = list(Corte.objects.all())
+    for corte in cortes:
+        corte.grasa_carne_color = menor(corte.grasa_carne, configuraciones[0])
+        corte.hueso_carne_color = menor(corte.hueso_carne, configuraciones[1])
+        corte.piezas_vendibles_color = mayor(corte.piezas_vendibles, configuraciones[2])
+    Corte.objects.bulk_update(cortes, ['grasa_carne_color', 'hueso_carne_color', 'piezas_vendibles_color'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_resumendia'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='corte',
+            name='grasa_carne_color',
+            field=models.CharField(blank=True, choices=[('Verde', 'Verde'), ('Amarillo', 'Amarillo'), ('Rojo', 'Rojo')], max_length=10),
+        ),
+        migrations.AddField(
+            model_name='corte',
+            name='hueso_carne_color',
+            field=models.CharField(blank=True, choices=[('Verde', 'Verde'), ('Amarillo', 'Amarillo'), ('Rojo', 'Rojo')], max_length=10),
+        ),
+        migrations.AddField(
+            model_name='corte',
+            name='piezas_vendibles_color',
+            field=models.CharField(blank=True, choices=[('Verde', 'Verde'), ('Amarillo', 'Amarillo'), ('Rojo', 'Rojo')], max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='corte',
+            index=models.Index(fields=['inicio'], name='core_corte_inicio_dd62f3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='corte',
+            index=models.Index(fields=['grasa_carne_color', 'inicio'], name='core_corte_grasa_c_4da3f6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='corte',
+            index=models.Index(fields=['hueso_carne_color', 'inicio'], name='core_corte_hueso_c_5a028b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='corte',
+            index=models.Index(fields=['piezas_vendibles_color', 'inicio'], name='core_corte_piezas__151ea8_idx'),
+        ),
+        migrations.RunPython(calcular_colores, migrations.RunPython.noop),
+    ]
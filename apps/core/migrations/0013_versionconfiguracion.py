@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:22
+
+from datetime import datetime
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def sembrar_versiones(apps, schema_editor):
+    # Los umbrales actuales rigen desde el primer corte (los colores ya se
+    # calcularon con ellos en 0012)
+    Corte = apps.get_model('core', 'Corte')
+    Configuracion = apps.get_model('core', 'Configuracion')
+    VersionConfiguracion = apps.get_model('core', 'VersionConfiguracion')
+    desde = Corte.objects.aggregate(primero=Min('inicio'))['primero'] or datetime.now()
+    VersionConfiguracion.objects.bulk_create([
+        VersionConfiguracion(tipo=c.tipo, verde=c.verde, amarillo=c.amarillo, rojo=c.rojo, vigente_desde=desde)
+        for c in Configuracion.objects.order_by('id')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_corte_colores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionConfiguracion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('Grasa en carne', 'Grasa en carne'), ('Hueso en carne', 'Hueso en carne'), ('Piezas Vendibles', 'Piezas Vendibles')], max_length=50)),
+                ('verde', models.FloatField()),
+                ('amarillo', models.FloatField()),
+                ('rojo', models.FloatField()),
+                ('vigente_desde', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Versión de configuración',
+                'verbose_name_plural': 'Versiones de configuración',
+                'ordering': ['tipo', 'vigente_desde'],
+                'indexes': [models.Index(fields=['tipo', 'vigente_desde'], name='core_versio_tipo_c492e8_idx')],
+            },
+        ),
+        migrations.RunPython(sembrar_versiones, migrations.RunPython.noop),
+    ]
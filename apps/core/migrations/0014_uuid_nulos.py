@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:02
+# Paso 1 de 3: columnas uuid sin restricción para poder llenarlas
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_versionconfiguracion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='corte',
+            name='uuid',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='pausa',
+            name='uuid',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='conteo',
+            name='uuid',
+            field=models.UUIDField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:02
+# Paso 2 de 3: un uuid distinto por fila existente
+
+import uuid
+
+from django.db import migrations
+
+
+def llenar_uuid(apps, schema_editor):
+    for nombre in ('Corte', 'Pausa', 'Conteo'):
+        modelo = apps.get_model('core', nombre)
+        lote = []
+        for objeto in modelo.objects.filter(uuid__isnull=True).only('id').iterator(chunk_size=2000):
+            objeto.uuid = uuid.uuid4()
+            lote.append(objeto)
+            if len(lote) == 2000:
+                modelo.objects.bulk_update(lote, ['uuid'])
+                lote = []
+        modelo.objects.bulk_update(lote, ['uuid'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_uuid_nulos'),
+    ]
+
+    operations = [
+        migrations.RunPython(llenar_uuid, migrations.RunPython.noop),
+    ]
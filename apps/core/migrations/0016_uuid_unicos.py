@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:02
+# Paso 3 de 3: uuid obligatorio y único
+
+import uuid
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_llenar_uuid'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='corte',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='pausa',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='conteo',
+            name='uuid',
+            field=models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+        ),
+    ]
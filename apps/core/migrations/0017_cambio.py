@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:28
+
+from django.db import migrations, models
+
+
+# Los triggers que llenan core_cambio se instalan en post_migrate
+# (sincronizacion.instalar_bitacora): SQLite los pierde cuando una migración
+# reconstruye la tabla.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_uuid_unicos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Cambio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=10)),
+                ('objeto_id', models.BigIntegerField()),
+                ('creado', models.FloatField()),
+            ],
+            options={
+                'verbose_name': 'Cambio por sincronizar',
+                'verbose_name_plural': 'Cambios por sincronizar',
+            },
+        ),
+    ]
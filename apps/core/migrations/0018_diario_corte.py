@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:30
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_cambio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoCorte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('secuencia', models.PositiveIntegerField()),
+                ('tipo', models.CharField(choices=[('creado', 'Creado'), ('iniciado', 'Iniciado'), ('pausado', 'Pausado'), ('reanudado', 'Reanudado'), ('finalizado', 'Finalizado'), ('conteos', 'Lote de conteos')], max_length=10)),
+                ('momento', models.DateTimeField()),
+                ('datos', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('corte', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.corte')),
+            ],
+            options={
+                'verbose_name': 'Evento de corte',
+                'verbose_name_plural': 'Eventos de corte',
+                'ordering': ['corte', 'secuencia'],
+                'constraints': [models.UniqueConstraint(fields=('corte', 'secuencia'), name='evento_corte_secuencia_unica')],
+            },
+        ),
+        migrations.CreateModel(
+            name='InstantaneaCorte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('secuencia', models.PositiveIntegerField()),
+                ('estado', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('corte', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.corte')),
+            ],
+            options={
+                'verbose_name': 'Instantánea de corte',
+                'verbose_name_plural': 'Instantáneas de corte',
+                'ordering': ['corte', 'secuencia'],
+                'indexes': [models.Index(fields=['corte', '-secuencia'], name='core_instan_corte_i_4bec4d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:33
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def preparar(apps, schema_editor):
+    Corte = apps.get_model('core', 'Corte')
+    Pausa = apps.get_model('core', 'Pausa')
+    EventoCorte = apps.get_model('core', 'EventoCorte')
+    # La versión sigue al diario que ya exista
+    ultima = EventoCorte.objects.filter(corte=OuterRef('pk')).values('corte').annotate(ultima=Max('secuencia')).values('ultima')
+    Corte.objects.filter(eventocorte__isnull=False).distinct().update(version=Subquery(ultima))
+    # Pausas abiertas duplicadas (de la carrera que corrige la restricción): se cierran todas menos la última
+    for corte_id in Pausa.objects.filter(fin_pausa__isnull=True).values('corte').annotate(n=models.Count('id')).filter(n__gt=1).values_list('corte', flat=True):
+        abiertas = Pausa.objects.filter(corte_id=corte_id, fin_pausa__isnull=True).order_by('-id')
+        for pausa in abiertas[1:]:
+            Pausa.objects.filter(id=pausa.id).update(fin_pausa=pausa.inicio_pausa)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_diario_corte'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='corte',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(preparar, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='pausa',
+            constraint=models.UniqueConstraint(condition=models.Q(('fin_pausa__isnull', True)), fields=('corte',), name='pausa_abierta_unica'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_transiciones_atomicas'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pausa',
+            index=models.Index(fields=['inicio_pausa'], name='core_pausa_inicio__40ec08_idx'),
+        ),
+    ]
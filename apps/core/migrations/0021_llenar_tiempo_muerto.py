@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:12
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations
+
+# Copia congelada de apps/core/tiempo_muerto.py a esta migración (sin NumPy):
+# cambiar ese módulo no debe cambiar lo que esta migración hace en una base nueva.
+
+
+def unir(intervalos):
+    resultado = []
+    for inicio, fin, tipo in sorted(intervalos):
+        if resultado and inicio <= resultado[-1][1]:
+            anterior = resultado[-1]
+            resultado[-1] = (anterior[0], max(anterior[1], fin), anterior[2] if anterior[2] == tipo else 'mixto')
+        else:
+            resultado.append((inicio, fin, tipo))
+    return resultado
+
+
+def pausado_entre(desde, hasta, pausas):
+    """Segundos de pausa entre dos instantes; una pausa abierta no termina."""
+    total = 0.0
+    for inicio, fin in pausas:
+        traslape = (min(hasta, fin) if fin else hasta) - max(desde, inicio)
+        total += max(traslape.total_seconds(), 0.0)
+    return total
+
+
+def huecos(horas, previo, tiempo_entre_canales, factor, pausas=()):
+    if not horas or not tiempo_entre_canales:
+        return []
+    umbral = factor * tiempo_entre_canales
+    esperado = timedelta(seconds=tiempo_entre_canales / 2)
+    resultado = []
+    for hora in horas:
+        if (hora - previo).total_seconds() - pausado_entre(previo, hora, pausas) > umbral:
+            resultado.append((previo + esperado, hora, 'hueco'))
+        previo = hora
+    return resultado
+
+
+def intervalos_pausas(pausas, hasta=None):
+    intervalos = []
+    for inicio, fin in pausas:
+        fin = fin or hasta
+        if fin and fin > inicio:
+            intervalos.append((inicio, fin, 'pausa'))
+    return intervalos
+
+
+def llenar(apps, schema_editor):
+    # Los reportes suman IntervaloMuerto: los cortes anteriores a 0009 no tienen
+    # intervalos. Mismo cálculo que tiempo_muerto.reconstruir con los modelos históricos.
+    Corte = apps.get_model('core', 'Corte')
+    Pausa = apps.get_model('core', 'Pausa')
+    Conteo = apps.get_model('core', 'Conteo')
+    IntervaloMuerto = apps.get_model('core', 'IntervaloMuerto')
+    factor = settings.TIEMPO_MUERTO_FACTOR
+    cortes = Corte.objects.filter(inicio__isnull=False, intervalomuerto__isnull=True).order_by('id')
+    for corte in cortes.only('id', 'inicio', 'fin', 'tiempo_entre_canales').iterator():
+        pausas = list(Pausa.objects.filter(corte=corte).order_by('id').values_list('inicio_pausa', 'fin_pausa'))
+        horas = list(Conteo.objects.filter(corte=corte).order_by('id').values_list('hora', flat=True))
+        intervalos = huecos(horas, corte.inicio, corte.tiempo_entre_canales, factor, pausas)
+        if corte.fin:
+            intervalos += huecos([corte.fin], horas[-1] if horas else corte.inicio, corte.tiempo_entre_canales, factor, pausas)
+        IntervaloMuerto.objects.bulk_create([
+            IntervaloMuerto(corte_id=corte.id, inicio=inicio, fin=fin, tipo=tipo, duracion=(fin - inicio).total_seconds())
+            for inicio, fin, tipo in unir(intervalos + intervalos_pausas(pausas, hasta=corte.fin))
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_indice_inicio_pausa'),
+    ]
+
+    operations = [
+        migrations.RunPython(llenar, migrations.RunPython.noop),
+    ]
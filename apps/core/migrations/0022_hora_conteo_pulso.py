@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:17
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_llenar_tiempo_muerto'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='conteo',
+            name='hora',
+            field=models.DateTimeField(db_index=True, default=datetime.datetime.now, editable=False),
+        ),
+    ]
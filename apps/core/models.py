@@ -1,3 +1,7 @@
+import uuid
+from datetime import datetime
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 TIPOS = (
@@ -6,6 +10,12 @@ TIPOS = (
     ('Piezas Vendibles', 'Piezas Vendibles')
 )
 
+COLORES = (
+    ('Verde', 'Verde'),
+    ('Amarillo', 'Amarillo'),
+    ('Rojo', 'Rojo')
+)
+
 class Corte(models.Model):
     cantidad_canales = models.IntegerField()
     horas_jornada = models.FloatField()
@@ -17,6 +27,22 @@ class Corte(models.Model):
     tiempo_muerto = models.IntegerField()
     inicio = models.DateTimeField(blank=True, null=True)
     fin = models.DateTimeField(blank=True, null=True)
+    # Se calculan al crear y al finalizar el corte (reportes.asignar_colores)
+    grasa_carne_color = models.CharField(max_length=10, choices=COLORES, blank=True)
+    hueso_carne_color = models.CharField(max_length=10, choices=COLORES, blank=True)
+    piezas_vendibles_color = models.CharField(max_length=10, choices=COLORES, blank=True)
+    # Identidad entre la base local de la Pi y la central (apps/core/sincronizacion.py)
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    # Secuencia del último evento del diario; las transiciones la suben con un UPDATE condicional
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['inicio']),
+            models.Index(fields=['grasa_carne_color', 'inicio']),
+            models.Index(fields=['hueso_carne_color', 'inicio']),
+            models.Index(fields=['piezas_vendibles_color', 'inicio']),
+        ]
 
     def __str__(self):
         return f'{self.cantidad_canales} - {self.horas_jornada} - {self.canales_hora} - {self.tiempo_entre_canales} - {self.inicio} - {self.fin}'
@@ -25,17 +51,28 @@ class Pausa(models.Model):
     corte = models.ForeignKey(Corte, on_delete=models.CASCADE)
     inicio_pausa = models.DateTimeField(auto_now_add=True)
     fin_pausa = models.DateTimeField(blank=True, null=True)
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=['inicio_pausa'])]
+        # A lo más una pausa abierta por corte, aunque dos workers pausen a la vez
+        constraints = [
+            models.UniqueConstraint(fields=['corte'], condition=models.Q(fin_pausa__isnull=True), name='pausa_abierta_unica'),
+        ]
 
     def __str__(self):
-        return f'{self.corte} - {self.inicio_pausa} - {self.fin_pausa}'
+        # corte_id y no corte: el admin no hace una consulta por fila
+        return f'{self.corte_id} - {self.inicio_pausa} - {self.fin_pausa}'
 
 class Conteo(models.Model):
     corte = models.ForeignKey(Corte, on_delete=models.CASCADE)
-    hora = models.DateTimeField(auto_now_add=True)
+    # Momento del pulso: la ingesta lo toma al encolar, no cuando el hilo llega a guardarlo
+    hora = models.DateTimeField(default=datetime.now, editable=False, db_index=True)
     cantidad = models.FloatField()
+    uuid = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
 
     def __str__(self):
-        return f'{self.corte} - {self.hora} - {self.cantidad}'
+        return f'{self.corte_id} - {self.hora} - {self.cantidad}'
 
 class Configuracion(models.Model):
     tipo = models.CharField(max_length=50, choices=TIPOS)
@@ -44,4 +81,167 @@ class Configuracion(models.Model):
     rojo = models.FloatField(max_length=50)
 
     def __str__(self):
-        return f'{self.tipo} - {self.verde} - {self.amarillo} - {self.rojo}'
\ No newline at end of file
+        return f'{self.tipo} - {self.verde} - {self.amarillo} - {self.rojo}'
+
+class VersionConfiguracion(models.Model):
+    """Umbrales vigentes desde una fecha; un corte se clasifica con la versión vigente a su inicio (apps/core/umbrales.py)."""
+    tipo = models.CharField(max_length=50, choices=TIPOS)
+    verde = models.FloatField()
+    amarillo = models.FloatField()
+    rojo = models.FloatField()
+    vigente_desde = models.DateTimeField()
+
+    class Meta:
+        ordering = ['tipo', 'vigente_desde']
+        indexes = [models.Index(fields=['tipo', 'vigente_desde'])]
+        verbose_name = 'Versión de configuración'
+        verbose_name_plural = 'Versiones de configuración'
+
+    def __str__(self):
+        return f'{self.tipo} - {self.vigente_desde} - {self.verde} - {self.amarillo} - {self.rojo}'
+
+class PerfilPeticion(models.Model):
+    """Perfil cProfile de una petición marcada por un administrador (anillo acotado)."""
+    creado = models.DateTimeField(auto_now=True)
+    ruta = models.CharField(max_length=200)
+    metodo = models.CharField(max_length=10)
+    duracion = models.FloatField()
+    consultas = models.IntegerField()
+    tiempo_db = models.FloatField()
+    funciones = models.TextField()
+
+    class Meta:
+        ordering = ['-creado']
+        verbose_name = 'Perfil de petición'
+        verbose_name_plural = 'Perfiles de peticiones'
+
+    def __str__(self):
+        return f'{self.creado} - {self.metodo} {self.ruta} - {self.duracion:.3f}s'
+
+class ConsultaLenta(models.Model):
+    """Consulta SQL que superó CONSULTA_LENTA_MS (anillo acotado)."""
+    creado = models.DateTimeField(auto_now=True)
+    ruta = models.CharField(max_length=200)
+    duracion = models.FloatField()
+    sql = models.TextField()
+    plan = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-creado']
+        verbose_name = 'Consulta lenta'
+        verbose_name_plural = 'Consultas lentas'
+
+    def __str__(self):
+        return f'{self.creado} - {self.ruta} - {self.duracion:.3f}s'
+
+TIPOS_MUERTO = (
+    ('pausa', 'Pausa registrada'),
+    ('hueco', 'Paro sin pausa'),
+    ('mixto', 'Pausa y paro')
+)
+
+class IntervaloMuerto(models.Model):
+    """Tiempo muerto de un corte: unión de pausas y huecos del sensor (apps/core/tiempo_muerto.py)."""
+    corte = models.ForeignKey(Corte, on_delete=models.CASCADE)
+    inicio = models.DateTimeField()
+    fin = models.DateTimeField()
+    tipo = models.CharField(max_length=10, choices=TIPOS_MUERTO)
+    duracion = models.FloatField()
+
+    class Meta:
+        ordering = ['inicio']
+        indexes = [models.Index(fields=['corte', 'fin'])]
+        verbose_name = 'Intervalo de tiempo muerto'
+        verbose_name_plural = 'Intervalos de tiempo muerto'
+
+    def __str__(self):
+        return f'{self.corte_id} - {self.tipo} - {self.inicio} - {self.fin}'
+
+class ResumenHora(models.Model):
+    """Conteos agregados por hora (apps/core/analitica.py); se llenan con resumir_horas."""
+    hora = models.DateTimeField(unique=True)
+    canales = models.FloatField()
+    conteos = models.IntegerField()
+
+    class Meta:
+        ordering = ['hora']
+        verbose_name = 'Resumen por hora'
+        verbose_name_plural = 'Resúmenes por hora'
+
+    def __str__(self):
+        return f'{self.hora} - {self.canales}'
+
+class ResumenDia(models.Model):
+    """Bocetos KLL por día de las métricas de los cortes cerrados (apps/core/analitica.py)."""
+    fecha = models.DateField(unique=True)
+    cortes = models.JSONField(default=list)
+    bocetos = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ['fecha']
+        verbose_name = 'Resumen por día'
+        verbose_name_plural = 'Resúmenes por día'
+
+    def __str__(self):
+        return f'{self.fecha} - {len(self.cortes)} cortes'
+
+class Cambio(models.Model):
+    """
+    Bitácora de inserciones y cambios de Corte, Pausa y Conteo en la base
+    local (modo edge). La llenan triggers de SQLite y la vacía el agente
+    de sincronización al subir los cambios a la central.
+    """
+    modelo = models.CharField(max_length=10)
+    objeto_id = models.BigIntegerField()
+    creado = models.FloatField()  # epoch en segundos, lo pone el trigger
+
+    class Meta:
+        verbose_name = 'Cambio por sincronizar'
+        verbose_name_plural = 'Cambios por sincronizar'
+
+    def __str__(self):
+        return f'{self.modelo} {self.objeto_id}'
+
+TIPOS_EVENTO = (
+    ('creado', 'Creado'),
+    ('iniciado', 'Iniciado'),
+    ('pausado', 'Pausado'),
+    ('reanudado', 'Reanudado'),
+    ('finalizado', 'Finalizado'),
+    ('conteos', 'Lote de conteos'),
+)
+
+class EventoCorte(models.Model):
+    """
+    Bitácora de sólo agregado de un corte (apps/core/diario.py). Corte.inicio/fin
+    y Pausa son proyecciones de estos eventos.
+    """
+    corte = models.ForeignKey(Corte, on_delete=models.CASCADE)
+    secuencia = models.PositiveIntegerField()
+    tipo = models.CharField(max_length=10, choices=TIPOS_EVENTO)
+    momento = models.DateTimeField()
+    datos = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        ordering = ['corte', 'secuencia']
+        constraints = [models.UniqueConstraint(fields=['corte', 'secuencia'], name='evento_corte_secuencia_unica')]
+        verbose_name = 'Evento de corte'
+        verbose_name_plural = 'Eventos de corte'
+
+    def __str__(self):
+        return f'{self.corte_id} #{self.secuencia} {self.tipo} {self.momento}'
+
+class InstantaneaCorte(models.Model):
+    """Estado de un corte después de aplicar sus eventos hasta `secuencia`."""
+    corte = models.ForeignKey(Corte, on_delete=models.CASCADE)
+    secuencia = models.PositiveIntegerField()
+    estado = models.JSONField(encoder=DjangoJSONEncoder)
+
+    class Meta:
+        ordering = ['corte', 'secuencia']
+        indexes = [models.Index(fields=['corte', '-secuencia'])]
+        verbose_name = 'Instantánea de corte'
+        verbose_name_plural = 'Instantáneas de corte'
+
+    def __str__(self):
+        return f'{self.corte_id} #{self.secuencia}'
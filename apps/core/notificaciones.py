@@ -0,0 +1,267 @@
+# apps/core/notificaciones.py
+# Avisos de cambios entre procesos. Las escrituras de estado del corte, de
+# conteos y de configuración publican un evento compacto ({'t': tipo, ...});
+# cada worker se suscribe para invalidar lo que guarda en memoria y para
+# empujar los eventos a los clientes en vivo (cortes/eventos/).
+# - PostgreSQL: NOTIFY dentro de la transacción (sólo llega si hace commit) y
+#   un hilo por proceso con LISTEN en una conexión propia.
+# - SQLite (la Pi, modo edge): datagramas a los sockets Unix de los demás
+#   procesos en NOTIFICACIONES_DIR, después del commit.
+# El proceso que publica se entrega el evento a sí mismo sin pasar por la
+# base. Mientras no hay conexión (conectado() es False) nada se da por
+# invalidado: quien guarda algo en memoria vuelve a preguntar a la base, y al
+# reconectar llega un evento RECONECTADO para descartar todo.
+import asyncio
+import os
+import select
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future
+
+import orjson
+from django.conf import settings
+from django.db import connections, transaction, DatabaseError
+
+from . import metricas
+from .renderers import a_json
+
+CANAL = 'cortes_cambios'
+RECONECTADO = 'reconectado'
+ESPERA_RECONEXION = 5
+LATIDO = 30
+
+_suscriptores = []
+_lock = threading.Lock()
+_proceso = {'pid': None, 'origen': None, 'emisor': None}
+
+
+def origen():
+    """Identifica al proceso (cambia después de un fork)."""
+    with _lock:
+        if _proceso['pid'] != os.getpid():
+            _proceso.update(pid=os.getpid(), origen=f'{os.getpid()}-{uuid.uuid4().hex[:8]}', emisor=None)
+        return _proceso['origen']
+
+
+def suscriptor(funcion):
+    """Decorador: `funcion(evento)` se llama con cada evento, propio o de otro proceso, en el hilo que lo recibe."""
+    _suscriptores.append(funcion)
+    return funcion
+
+
+def publicar(tipo, **datos):
+    """Publica {'t': tipo, **datos} a todos los procesos cuando la transacción actual hace commit (fuera de una, de inmediato)."""
+    evento = {'t': tipo, **datos}
+    carga = a_json({**evento, 'o': origen()})
+    conexion = connections['default']
+    if conexion.vendor == 'postgresql':
+        with conexion.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CANAL, carga.decode()])
+        transaction.on_commit(lambda: entregar(evento))
+    else:
+        def al_confirmar():
+            entregar(evento)
+            _difundir(carga)
+        transaction.on_commit(al_confirmar)
+
+
+def entregar(evento):
+    for funcion in _suscriptores:
+        try:
+            funcion(evento)
+        except Exception as e:
+            print(f'Notificaciones: error en {funcion.__name__} ({e})')
+    buzon.agregar(evento)
+
+
+def _difundir(carga):
+    """Envía el datagrama a los sockets de los demás procesos; borra los de procesos que ya no existen."""
+    directorio = settings.NOTIFICACIONES_DIR
+    try:
+        nombres = os.listdir(directorio)
+    except FileNotFoundError:
+        return
+    propio = f'{origen()}.sock'
+    with _lock:
+        if _proceso['emisor'] is None:
+            _proceso['emisor'] = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            _proceso['emisor'].setblocking(False)
+        emisor = _proceso['emisor']
+    for nombre in nombres:
+        if not nombre.endswith('.sock') or nombre == propio:
+            continue
+        ruta = os.path.join(directorio, nombre)
+        try:
+            emisor.sendto(carga, ruta)
+        except (ConnectionRefusedError, FileNotFoundError):
+            try:
+                os.unlink(ruta)
+            except FileNotFoundError:
+                pass
+        except BlockingIOError:
+            pass  # el otro proceso no está leyendo: se pone al día al reconectar
+
+
+class Escucha:
+    """Hilo que recibe los eventos de los demás procesos (uno por proceso)."""
+
+    def __init__(self):
+        self._pid = None
+        self._conectado = False
+
+    @property
+    def conectado(self):
+        return self._conectado and self._pid == os.getpid()
+
+    def arrancar(self):
+        """Idempotente; después de un fork arranca otro hilo en el proceso hijo."""
+        with _lock:
+            if self._pid == os.getpid():
+                return
+            self._pid, self._conectado = os.getpid(), False
+        threading.Thread(target=self._loop, name='notificaciones', daemon=True).start()
+
+    def _loop(self):
+        while True:
+            try:
+                if connections['default'].vendor == 'postgresql':
+                    self._escuchar_postgres()
+                else:
+                    self._escuchar_socket()
+            except (DatabaseError, OSError) as e:
+                print(f'Notificaciones: sin conexión ({e})')
+            self._conectado = False
+            time.sleep(ESPERA_RECONEXION)
+
+    def _listo(self):
+        # Primero se descarta lo guardado (pudo haber cambios sin aviso) y luego se confía en los avisos
+        entregar({'t': RECONECTADO})
+        self._conectado = True
+
+    def _recibir(self, carga):
+        evento = orjson.loads(carga)
+        if evento.pop('o', None) != origen():
+            entregar(evento)
+
+    def _escuchar_postgres(self):
+        # Conexión propia en autocommit: LISTEN no puede compartir la de las peticiones
+        conexion = connections['default'].copy()
+        try:
+            conexion.connect()
+            with conexion.cursor() as cursor:
+                cursor.execute(f'LISTEN {CANAL}')
+            self._listo()
+            crudo = conexion.connection
+            while True:
+                if not select.select([crudo], [], [], LATIDO)[0]:
+                    # Sin avisos en un rato: confirma que la conexión sigue viva
+                    with conexion.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                crudo.poll()
+                while crudo.notifies:
+                    self._recibir(crudo.notifies.pop(0).payload)
+        finally:
+            conexion.close()
+
+    def _escuchar_socket(self):
+        os.makedirs(settings.NOTIFICACIONES_DIR, exist_ok=True)
+        ruta = os.path.join(settings.NOTIFICACIONES_DIR, f'{origen()}.sock')
+        receptor = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            receptor.bind(ruta)
+            self._listo()
+            while True:
+                self._recibir(receptor.recv(65536))
+        finally:
+            receptor.close()
+            try:
+                os.unlink(ruta)
+            except FileNotFoundError:
+                pass
+
+
+escucha = Escucha()
+
+
+def arrancar():
+    escucha.arrancar()
+
+
+def conectado():
+    return escucha.conectado
+
+
+class Buzon:
+    """
+    Últimos eventos del proceso, numerados, para los clientes en vivo. Los que
+    esperan comparten un Future que se reemplaza con cada evento.
+    """
+
+    def __init__(self, maximo=500):
+        self._lock = threading.Lock()
+        self._eventos = deque(maxlen=maximo)
+        self.numero = 0
+        self._futuro = Future()
+
+    def agregar(self, evento):
+        with self._lock:
+            self.numero += 1
+            self._eventos.append((self.numero, evento))
+            futuro, self._futuro = self._futuro, Future()
+        futuro.set_result(None)
+
+    def _desde(self, numero):
+        with self._lock:
+            return [(n, e) for n, e in self._eventos if n > numero], self._futuro
+
+    def continuar(self, ultimo):
+        """
+        Número desde el que sigue un cliente con Last-Event-ID `ultimo`
+        ('<origen>:<número>'); None si es de otro proceso o ya se perdieron
+        eventos (el cliente debe recargar). Sin `ultimo`, desde ahora.
+        """
+        if not ultimo:
+            return self.numero
+        proceso, _, numero = ultimo.rpartition(':')
+        with self._lock:
+            primero = self._eventos[0][0] if self._eventos else self.numero + 1
+        if proceso != origen() or not numero.isdigit() or int(numero) < primero - 1:
+            return None
+        return int(numero)
+
+    async def esperar(self, numero, timeout):
+        """Eventos posteriores a `numero`; espera hasta `timeout` segundos si no hay (lista vacía al vencer)."""
+        eventos, futuro = self._desde(numero)
+        if eventos:
+            return eventos
+        try:
+            # shield: cancelar esta espera no debe cancelar el Future compartido
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(futuro)), timeout)
+        except asyncio.TimeoutError:
+            return []
+        return self._desde(numero)[0]
+
+    def esperar_hilo(self, numero, timeout):
+        """Como esperar(), bloqueando el hilo que llama (vistas servidas por WSGI)."""
+        eventos, futuro = self._desde(numero)
+        if eventos:
+            return eventos
+        try:
+            futuro.result(timeout)
+        except TimeoutError:
+            return []
+        return self._desde(numero)[0]
+
+
+buzon = Buzon()
+
+
+@metricas.registro.colector
+def metricas_notificaciones():
+    return [
+        ('cortes_notificaciones_conectado', 'gauge', 'Avisos entre procesos conectados en este proceso', [({}, 1 if conectado() else 0)]),
+        ('cortes_notificaciones_eventos_total', 'counter', 'Eventos recibidos por este proceso', [({}, buzon.numero)]),
+    ]
@@ -0,0 +1,171 @@
+# apps/core/perfilado.py
+# Perfilado bajo demanda de una petición y registro de consultas lentas.
+# Ambos se guardan en anillos acotados en la base de datos para revisarlos
+# desde el admin de Django sin volver a desplegar.
+import cProfile
+import io
+import pstats
+import threading
+from collections import deque
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from . import metricas
+from .routers import marcar_escrituras
+
+_capturando = threading.local()
+_consultas_pendientes = deque(maxlen=200)
+# cProfile no admite dos perfiles a la vez en el event loop (ni en ningún hilo desde Python 3.12)
+_perfilando = threading.Lock()
+
+
+def guardar_en_anillo(modelo, maximo, **campos):
+    """
+    Guarda un registro sin pasar de `maximo` filas: mientras hay lugar crea,
+    después sobrescribe el más viejo (creado es auto_now) bloqueándolo, así
+    dos peticiones no escriben en la misma fila. Las filas de más (dos que
+    crearon a la vez, o un `maximo` menor) se borran en la misma transacción.
+    No cuenta como escritura del cliente para el ruteo a la réplica.
+    """
+    with marcar_escrituras(), transaction.atomic():
+        registro = None
+        if modelo.objects.count() >= maximo:
+            registro = modelo.objects.select_for_update(skip_locked=True).order_by('creado').first()
+        if registro is None:
+            registro = modelo.objects.create(**campos)
+        else:
+            for campo, valor in campos.items():
+                setattr(registro, campo, valor)
+            registro.save()
+        sobran = list(modelo.objects.order_by('-creado').values_list('id', flat=True)[maximo:])
+        if sobran:
+            modelo.objects.filter(id__in=sobran).delete()
+        return registro
+
+
+def es_administrador(request):
+    """Sesión del admin o token JWT de un usuario Administrador."""
+    user = getattr(request, 'user', None)
+    if not (user and user.is_authenticated):
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        try:
+            resultado = JWTAuthentication().authenticate(request)
+        except Exception:
+            resultado = None
+        user = resultado[0] if resultado else None
+    return bool(user and (user.is_superuser or getattr(user, 'rol', None) == 'Administrador'))
+
+
+def perfil_solicitado(request):
+    return request.headers.get('X-Perfil') or request.GET.get('perfil')
+
+
+def perfilar(get_response, request, stats):
+    """
+    Ejecuta la petición bajo cProfile y guarda las funciones más costosas.
+    cProfile sólo ve el hilo actual: bajo WSGI las consultas del ORM asíncrono
+    corren en este hilo; bajo ASGI quedan fuera del árbol, pero siempre se
+    guardan el número de consultas y el tiempo en base de datos. Si ya hay
+    otro perfil activo la petición corre sin perfil: (response, None, None).
+    """
+    if not _perfilando.acquire(blocking=False):
+        return get_response(request), None, None
+    try:
+        perfil = cProfile.Profile()
+        response = perfil.runcall(get_response, request)
+    finally:
+        _perfilando.release()
+    return (response, *guardar_perfil(perfil, request, stats))
+
+
+async def aperfilar(get_response, request, stats):
+    """
+    Versión asíncrona de perfilar(). El perfil incluye lo que corran otras
+    peticiones en el event loop mientras ésta espera; las que también piden
+    perfil en ese tiempo corren sin él.
+    """
+    if not _perfilando.acquire(blocking=False):
+        return await get_response(request), None, None
+    try:
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            response = await get_response(request)
+        finally:
+            perfil.disable()
+    finally:
+        _perfilando.release()
+    return (response, *await sync_to_async(guardar_perfil)(perfil, request, stats))
+
+
+def guardar_perfil(perfil, request, stats):
+    """Guarda el perfil en el anillo. Devuelve (registro, texto)."""
+    from .models import PerfilPeticion
+    salida = io.StringIO()
+    estadisticas = pstats.Stats(perfil, stream=salida).sort_stats('cumulative')
+    estadisticas.print_stats(settings.PERFIL_FUNCIONES)
+    texto = salida.getvalue()
+    registro = guardar_en_anillo(
+        PerfilPeticion, settings.PERFIL_MAXIMO,
+        ruta=(stats[2] if stats else None) or request.path,
+        metodo=request.method,
+        duracion=estadisticas.total_tt,
+        consultas=stats[0] if stats else 0,
+        tiempo_db=stats[1] if stats else 0.0,
+        funciones=texto,
+    )
+    return registro, texto
+
+
+# --- Consultas lentas ---
+
+def capturar_consulta_lenta(sql, params, duracion, stats, context):
+    """Observador de metricas.medir_consulta: sólo encola, no escribe."""
+    if duracion * 1000 < settings.CONSULTA_LENTA_MS or getattr(_capturando, 'activo', False):
+        return
+    alias = context['connection'].alias
+    _consultas_pendientes.append((alias, sql, params, duracion, (stats[2] if stats else None) or 'fuera_de_peticion'))
+
+
+def hay_consultas_lentas():
+    return bool(_consultas_pendientes)
+
+
+def guardar_consultas_lentas():
+    """Escribe las consultas lentas pendientes (se llama al terminar cada petición)."""
+    from .models import ConsultaLenta
+    if not _consultas_pendientes:
+        return
+    _capturando.activo = True
+    token = metricas.consultas_actuales.set(None)
+    try:
+        while _consultas_pendientes:
+            alias, sql, params, duracion, ruta = _consultas_pendientes.popleft()
+            plan = ''
+            connection = connections[alias]
+            if settings.CONSULTA_LENTA_EXPLAIN and sql.lstrip().upper().startswith('SELECT'):
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+                        plan = '\n'.join(' | '.join(str(c) for c in fila) for fila in cursor.fetchall())
+                except Exception as e:
+                    plan = f'EXPLAIN falló: {e}'
+            try:
+                sql_texto = sql % tuple(repr(p) for p in params) if params else sql
+            except (TypeError, ValueError):
+                sql_texto = f'{sql} -- {params!r}'
+            guardar_en_anillo(ConsultaLenta, settings.CONSULTA_LENTA_MAXIMO, ruta=ruta, duracion=duracion, sql=sql_texto, plan=plan)
+    except Exception as e:
+        print(f'Perfilado: no se pudo guardar consulta lenta ({e})')
+    finally:
+        metricas.consultas_actuales.reset(token)
+        _capturando.activo = False
+
+
+def instalar_consultas_lentas():
+    if settings.CONSULTA_LENTA_MS and capturar_consulta_lenta not in metricas.observadores_consulta:
+        metricas.observadores_consulta.append(capturar_consulta_lenta)
+        metricas.instalar_medicion_db()
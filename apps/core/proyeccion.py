@@ -0,0 +1,116 @@
+# apps/core/proyeccion.py
+# Proyección del corte activo: ¿se llega a cantidad_canales dentro de
+# horas_jornada al ritmo actual? El ritmo es un promedio exponencial en el
+# tiempo, actualizado en O(1) por conteo. horas_jornada se toma como tiempo
+# activo: las pausas recorren el fin planeado.
+import math
+import threading
+from datetime import datetime, timedelta
+
+from django.conf import settings
+
+
+class ProyeccionCorte:
+
+    def __init__(self, tau=300.0, reloj=datetime.now):
+        # tau: constante de tiempo del promedio (segundos activos)
+        self.tau = tau
+        self.reloj = reloj
+        self._lock = threading.Lock()
+        self.corte_id = None
+        # Con qué generación se leyeron las pausas; invalidar_pausas() sube la generación
+        self.generacion = 0
+        self.pausas_leidas = None
+
+    def configurar(self, corte):
+        with self._lock:
+            self.corte_id = corte.id
+            self.inicio = corte.inicio
+            self.objetivo = corte.cantidad_canales
+            self.planeado = corte.horas_jornada * 3600
+            self.ritmo = corte.canales_hora / 3600  # canales por segundo, arranca en el plan
+            self.canales = 0.0
+            self.ultimo_id = 0
+            self._ultima_hora = corte.inicio
+            self._ultima_cantidad = 0.0
+            self.pausado = 0.0
+            self.pausa_abierta = None
+            self._pausas = []
+            self.pausas_leidas = None
+
+    def desconfigurar(self):
+        with self._lock:
+            self.corte_id = None
+
+    def pausas(self, pausas, generacion=None):
+        """Pausas del corte (inicio_pausa, fin_pausa): total cerrado y la abierta, si hay."""
+        with self._lock:
+            self.pausas_leidas = generacion
+            self._pausas = list(pausas)
+            self.pausado = sum((fin - inicio).total_seconds() for inicio, fin in pausas if fin)
+            self.pausa_abierta = next((inicio for inicio, fin in pausas if not fin), None)
+
+    def _pausado_entre(self, desde, hasta):
+        # Pocas pausas por corte: recorrerlas es O(1) en la práctica
+        total = 0.0
+        for inicio, fin in self._pausas:
+            traslape = (min(fin or hasta, hasta) - max(inicio, desde)).total_seconds()
+            if traslape > 0:
+                total += traslape
+        return total
+
+    def invalidar_pausas(self):
+        with self._lock:
+            self.generacion += 1
+
+    def conteo(self, conteo_id, hora, cantidad):
+        with self._lock:
+            if self.corte_id is None or conteo_id <= self.ultimo_id:
+                return
+            # Intervalo activo desde el conteo anterior (sin las pausas de en medio)
+            dt = (hora - self._ultima_hora).total_seconds() - self._pausado_entre(self._ultima_hora, hora)
+            if dt > 0:
+                alfa = 1 - math.exp(-dt / self.tau)
+                self.ritmo += alfa * (cantidad / dt - self.ritmo)
+            self.canales += cantidad
+            self.ultimo_id = conteo_id
+            self._ultima_hora = hora
+            self._ultima_cantidad = cantidad
+
+    def _ritmo_al(self, ahora):
+        """
+        Ritmo a `ahora`: si la línea se paró, el paso del promedio con cantidad 0
+        por el tiempo activo sin conteos, descontado el intervalo que se espera
+        entre conteos a este ritmo (para no bajar entre pulsos normales).
+        """
+        if ahora <= self._ultima_hora or self.ritmo <= 0:
+            return self.ritmo
+        sin_conteos = (ahora - self._ultima_hora).total_seconds() - self._pausado_entre(self._ultima_hora, ahora)
+        exceso = sin_conteos - self._ultima_cantidad / self.ritmo
+        return self.ritmo * math.exp(-exceso / self.tau) if exceso > 0 else self.ritmo
+
+    def estado(self, ahora=None):
+        ahora = ahora or self.reloj()
+        with self._lock:
+            if self.corte_id is None:
+                return None
+            pausado = self.pausado + ((ahora - self.pausa_abierta).total_seconds() if self.pausa_abierta else 0)
+            activo = (ahora - self.inicio).total_seconds() - pausado
+            restante = max(self.planeado - activo, 0.0)
+            faltan = max(self.objetivo - self.canales, 0.0)
+            ritmo = self._ritmo_al(ahora)
+            proyectado = self.canales + ritmo * restante
+            return {
+                'canales': self.canales,
+                'ritmo_actual': round(ritmo * 3600, 2),
+                'ritmo_requerido': round(faltan / (restante / 3600), 2) if restante > 0 else None,
+                'tiempo_restante': round(restante),
+                'total_proyectado': round(proyectado, 1),
+                'fin_planeado': ahora + timedelta(seconds=restante),
+                'fin_estimado': ahora + timedelta(seconds=faltan / ritmo) if ritmo > 0 else None,
+                'alcanza': proyectado >= self.objetivo,
+                'pausado': self.pausa_abierta is not None,
+            }
+
+
+proyeccion_activa = ProyeccionCorte(tau=settings.PROYECCION_TAU)
@@ -0,0 +1,82 @@
+# apps/core/renderers.py
+# Serialización rápida: orjson para JSON y MessagePack para kioscos en Wi-Fi lento.
+# Ambos producen los mismos valores que el JSONEncoder de DRF (fechas en ISO,
+# duraciones como segundos en texto) para no romper el frontend.
+from datetime import timedelta
+from decimal import Decimal
+from uuid import UUID
+
+import msgpack
+import orjson
+from django.utils.functional import Promise
+from rest_framework.renderers import BaseRenderer
+
+JSON = 'application/json'
+MSGPACK = 'application/x-msgpack'
+
+
+def _por_defecto(obj):
+    # Textos traducibles (gettext_lazy), p. ej. mensajes de error de validación y autenticación
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'No se puede serializar {type(obj).__name__}')
+
+
+def a_json(data):
+    return orjson.dumps(data, default=_por_defecto)
+
+
+def a_msgpack(data):
+    # msgpack no conoce datetime: se pasa por el mismo default que JSON
+    return msgpack.packb(data, default=_por_defecto, datetime=False)
+
+
+def negociar(request):
+    """Devuelve (serializador, content_type) según el header Accept."""
+    accept = request.headers.get('Accept', '')
+    if 'msgpack' in accept:
+        return a_msgpack, MSGPACK
+    return a_json, JSON
+
+
+def codificar_filas(campos, filas, compacto=False):
+    """
+    Codifica tuplas de values_list(). Normal: lista de dicts.
+    Compacto: {'campos': [...], 'filas': [[...], ...]}, sin repetir llaves.
+    """
+    if compacto:
+        return {'campos': list(campos), 'filas': [list(f) for f in filas]}
+    return [dict(zip(campos, f)) for f in filas]
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = JSON
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return a_json(data)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = MSGPACK
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return a_msgpack(data)
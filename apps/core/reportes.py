@@ -0,0 +1,154 @@
+# apps/core/reportes.py
+# Cálculos compartidos por los reportes (vistas síncronas y asíncronas).
+from datetime import timedelta
+
+from .kpi import canales_hora_real
+
+# Campo de la fila de reporte -> columnas de Corte que necesita (en orden de salida)
+COLUMNAS_CAMPO = {
+    'id': ('id',),
+    'cantidad_canales': ('cantidad_canales',),
+    'horas_jornada': ('horas_jornada',),
+    'canales_hora': ('canales_hora',),
+    'tiempo_entre_canales': ('tiempo_entre_canales',),
+    'grasa_carne': ('grasa_carne',),
+    'grasa_carne_color': ('grasa_carne_color',),
+    'hueso_carne': ('hueso_carne',),
+    'hueso_carne_color': ('hueso_carne_color',),
+    'tiempo_muerto_max': ('tiempo_muerto',),
+    'piezas_vendibles': ('piezas_vendibles',),
+    'piezas_vendibles_color': ('piezas_vendibles_color',),
+    'tiempo_muerto': (),
+    'inicio': ('inicio',),
+    'fin': ('fin',),
+    'conteo': (),
+    'pausas': (),
+    'promedio_canales_hora': ('inicio', 'fin'),
+}
+CAMPOS_FILA = tuple(COLUMNAS_CAMPO)
+CAMPOS_CON_PAUSAS = {'pausas', 'promedio_canales_hora'}
+CAMPOS_CON_CONTEO = {'conteo', 'promedio_canales_hora'}
+CAMPOS_COLOR = ('grasa_carne_color', 'hueso_carne_color', 'piezas_vendibles_color')
+COLORES = ('Verde', 'Amarillo', 'Rojo')
+
+# Columnas de Corte que usan las filas de reporte completas (values_list)
+CAMPOS_CORTE = ('id', 'cantidad_canales', 'horas_jornada', 'canales_hora', 'tiempo_entre_canales', 'grasa_carne', 'grasa_carne_color', 'hueso_carne', 'hueso_carne_color', 'piezas_vendibles', 'piezas_vendibles_color', 'tiempo_muerto', 'inicio', 'fin')
+
+# tipo de reporte -> (campo para ordenar, descendente en el reporte "Top Mayor")
+ORDEN_RANKING = {
+    'Canales Procesados': ('conteo', True),
+    'Tiempo Muerto': ('tiempo_muerto', False),
+    'Canales/Hora': ('canales_hora', True),
+    'Grasa Carne': ('grasa_carne', False),
+    'Hueso Carne': ('hueso_carne', False),
+    'Piezas Vendibles': ('piezas_vendibles', True),
+}
+
+
+class PlanFilas:
+    """
+    Qué consultar para construir las filas pedidas:
+      - salida: campos que van en la respuesta
+      - calcular: salida + campos que se necesitan para ordenar
+      - columnas: columnas de Corte en el SELECT
+      - conteo / muerto / pausas: si hay que traer esas relaciones
+    """
+
+    def __init__(self, campos=None, incluir_pausas=True, extra=()):
+        campos = list(campos) if campos else [c for c in CAMPOS_FILA if c != 'pausas' or incluir_pausas]
+        if incluir_pausas and 'pausas' not in campos:
+            campos.append('pausas')
+        desconocidos = [c for c in list(campos) + list(extra) if c not in COLUMNAS_CAMPO]
+        if desconocidos:
+            raise ValueError(f'Campos no validos: {", ".join(desconocidos)}')
+        self.salida = [c for c in CAMPOS_FILA if c in campos]
+        self.calcular = [c for c in CAMPOS_FILA if c in campos or c in extra]
+        columnas = {'id'}
+        for campo in self.calcular:
+            columnas.update(COLUMNAS_CAMPO[campo])
+        self.columnas = [c for c in CAMPOS_CORTE if c in columnas]
+        self.conteo = bool(CAMPOS_CON_CONTEO.intersection(self.calcular))
+        self.muerto = 'tiempo_muerto' in self.calcular
+        self.pausas = bool(CAMPOS_CON_PAUSAS.intersection(self.calcular))
+
+    @classmethod
+    def desde_parametros(cls, parametros, pausas_por_defecto=True, extra=()):
+        """`fields=a,b,c` e `include=pausas` (query string)."""
+        fields = [c.strip() for c in parametros.get('fields', '').split(',') if c.strip()]
+        include = [c.strip() for c in parametros.get('include', '').split(',') if c.strip()]
+        incluir_pausas = 'pausas' in include or 'pausas' in fields or (pausas_por_defecto and not fields and 'include' not in parametros)
+        return cls(fields or None, incluir_pausas=incluir_pausas, extra=extra)
+
+    def recortar(self, filas):
+        """Quita los campos que sólo se calcularon para ordenar."""
+        if len(self.calcular) == len(self.salida):
+            return filas
+        return [{c: f[c] for c in self.salida} for f in filas]
+
+
+def color_menor(valor, config):
+    """Grasa y hueso en carne: menos es mejor."""
+    valor = float(valor)  # el POST de CortesView puede traer texto
+    return 'Verde' if valor < config.verde else 'Amarillo' if valor < config.amarillo else 'Rojo'
+
+
+def color_mayor(valor, config):
+    """Piezas vendibles: más es mejor."""
+    valor = float(valor)
+    return 'Verde' if valor >= config.verde else 'Amarillo' if valor >= config.amarillo else 'Rojo'
+
+
+def colores(corte, configuraciones):
+    """
+    Devuelve (grasa_carne_color, hueso_carne_color, piezas_vendibles_color);
+    vacíos si faltan configuraciones (algún tipo sin VersionConfiguracion).
+    """
+    if len(configuraciones) < 3:
+        return ('', '', '')
+    return (
+        color_menor(corte.grasa_carne, configuraciones[0]),
+        color_menor(corte.hueso_carne, configuraciones[1]),
+        color_mayor(corte.piezas_vendibles, configuraciones[2]),
+    )
+
+
+def asignar_colores(corte, configuraciones):
+    """Guarda los colores en el corte (sin save); vacíos si faltan configuraciones."""
+    for campo, valor in zip(CAMPOS_COLOR, colores(corte, configuraciones)):
+        setattr(corte, campo, valor)
+
+
+def tiempo_muerto(segundos):
+    """Suma de IntervaloMuerto del corte (pausas y paros del sensor, sin traslapes)."""
+    return timedelta(seconds=segundos) if segundos else 0
+
+
+# Campo -> función (corte, conteo, pausas); el resto se lee de la columna
+_VALOR_CAMPO = {
+    'tiempo_muerto_max': lambda c, n, p: c.tiempo_muerto,
+    'tiempo_muerto': lambda c, n, p: tiempo_muerto(c.total_muerto),
+    'conteo': lambda c, n, p: n or 0,
+    'pausas': lambda c, n, p: p,
+    # canales por hora activa (sin pausas), no pausas por hora de jornada
+    'promedio_canales_hora': lambda c, n, p: canales_hora_real(n, c.inicio, c.fin, p),
+}
+
+
+def fila_corte(corte, conteo, pausas, plan=None):
+    """Fila de corte usada por last5, report1 y los rankings."""
+    campos = plan.calcular if plan else CAMPOS_FILA
+    fila = {}
+    for campo in campos:
+        valor = _VALOR_CAMPO.get(campo)
+        fila[campo] = valor(corte, conteo, pausas) if valor else getattr(corte, campo)
+    return fila
+
+
+def _clave(valor):
+    # tiempo_muerto puede ser 0 o timedelta
+    return valor.total_seconds() if isinstance(valor, timedelta) else valor
+
+
+def ordenar_ranking(filas, tipo, mayor=True):
+    campo, descendente = ORDEN_RANKING[tipo]
+    return sorted(filas, key=lambda x: _clave(x[campo]), reverse=descendente if mayor else not descendente)
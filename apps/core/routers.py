@@ -0,0 +1,159 @@
+# apps/core/routers.py
+# Réplica de lectura para reportes y analítica. Sólo leen de la réplica las
+# vistas marcadas con @de_replica (nunca la ingesta ni las transiciones), y
+# sólo si la réplica está al día: se vuelve a la primaria cuando
+# - no hay alias 'replica' configurado o no responde,
+# - su retraso pasa de REPLICA_RETRASO_MAXIMO segundos,
+# - el mismo cliente escribió hace menos de REPLICA_DESPUES_ESCRITURA segundos
+#   (leer lo que se acaba de escribir): la petición que escribe deja la cookie
+#   COOKIE_ESCRITURA (EscrituraMiddleware); las escrituras de hilos de fondo
+#   (ingesta, diario, perfilado) no cuentan,
+# - la vista lee el corte activo (no se marca con @de_replica).
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections, DatabaseError
+
+from . import metricas
+
+REPLICA = 'replica'
+CENTRAL = 'central'  # base central en modo edge (apps/core/sincronizacion.py)
+COOKIE_ESCRITURA = 'escritura'
+
+_usar_replica = ContextVar('usar_replica', default=False)
+# Listas mutables: el router corre en el hilo de sync_to_async, con una copia del contexto
+_leyo_replica = ContextVar('leyo_replica', default=None)
+_escribio = ContextVar('escribio', default=None)
+# Hora (time.time()) de la última escritura del cliente de la petición actual
+_escritura_cliente = ContextVar('escritura_cliente', default=0.0)
+
+
+@contextmanager
+def marcar_escrituras():
+    """Durante la petición; devuelve [escribió]."""
+    marca = [False]
+    token = _escribio.set(marca)
+    try:
+        yield marca
+    finally:
+        _escribio.reset(token)
+
+
+def escritura_cliente(request):
+    """Hora de la última escritura del cliente según su cookie (0 si no hay)."""
+    try:
+        return float(request.COOKIES.get(COOKIE_ESCRITURA, 0))
+    except ValueError:
+        return 0.0
+
+
+@contextmanager
+def leer_de_replica():
+    token = _usar_replica.set(True)
+    try:
+        yield
+    finally:
+        _usar_replica.reset(token)
+
+
+def de_replica(vista):
+    """
+    Decorador para métodos async de vistas de sólo lectura. Si la réplica
+    falla a media petición se marca caída y la vista se repite en la primaria.
+    """
+    @functools.wraps(vista)
+    async def envoltura(self, request, *args, **kwargs):
+        leyo = [False]
+        token = _leyo_replica.set(leyo)
+        token_cliente = _escritura_cliente.set(escritura_cliente(request))
+        try:
+            with leer_de_replica():
+                return await vista(self, request, *args, **kwargs)
+        except DatabaseError:
+            if not leyo[0]:
+                raise
+            estado_replica.caida()
+            return await vista(self, request, *args, **kwargs)
+        finally:
+            _escritura_cliente.reset(token_cliente)
+            _leyo_replica.reset(token)
+    return envoltura
+
+
+class EstadoReplica:
+    """Retraso de la réplica medido a lo más cada REPLICA_CONSULTA_CADA segundos."""
+
+    # Retraso en segundos; 0 si ya reprodujo todo lo recibido (una primaria
+    # inactiva no hace crecer el retraso) y NULL si no está en recuperación.
+    SQL_RETRASO = (
+        'SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+        'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._medido = -float('inf')
+        self.retraso = None
+
+    def _medir(self):
+        conexion = connections[REPLICA]
+        if conexion.vendor != 'postgresql':
+            return 0.0
+        with conexion.cursor() as cursor:
+            cursor.execute(self.SQL_RETRASO)
+            retraso = cursor.fetchone()[0]
+        return float(retraso or 0)
+
+    def disponible(self):
+        with self._lock:
+            if time.monotonic() - self._medido > settings.REPLICA_CONSULTA_CADA:
+                try:
+                    self.retraso = self._medir()
+                except DatabaseError:
+                    self.retraso = None
+                self._medido = time.monotonic()
+            return self.retraso is not None and self.retraso <= settings.REPLICA_RETRASO_MAXIMO
+
+    def caida(self):
+        with self._lock:
+            self.retraso, self._medido = None, time.monotonic()
+
+
+estado_replica = EstadoReplica()
+
+
+class RouterReplica:
+
+    def db_for_read(self, model, **hints):
+        if not _usar_replica.get() or REPLICA not in settings.DATABASES:
+            return None
+        escribio = _escribio.get()
+        if (escribio and escribio[0]) or time.time() - _escritura_cliente.get() < settings.REPLICA_DESPUES_ESCRITURA:
+            motivo = 'escritura_reciente'
+        elif not estado_replica.disponible():
+            motivo = 'no_disponible'
+        else:
+            metricas.lecturas.inc(REPLICA, 'ok')
+            leyo = _leyo_replica.get()
+            if leyo is not None:
+                leyo[0] = True
+            return REPLICA
+        metricas.lecturas.inc('default', motivo)
+        return None
+
+    def db_for_write(self, model, **hints):
+        escribio = _escribio.get()
+        if escribio is not None:
+            escribio[0] = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación; la central se migra desde su propio servidor
+        return db not in (REPLICA, CENTRAL)
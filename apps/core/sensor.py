@@ -0,0 +1,167 @@
+# apps/core/sensor.py
+import queue
+import threading
+import time
+from datetime import datetime
+
+from .watchdog import segundos_entre_canales
+
+# Cada canal pasa por el sensor como dos medias canales: dos pulsos de 0.5
+CANTIDAD_POR_PULSO = 0.5
+
+
+class FiltroConteo:
+    """
+    Etapa de filtrado entre el flanco del sensor y la creación del Conteo.
+    No toca la base de datos y es O(1) por flanco.
+    - El intervalo esperado entre pulsos es tiempo_entre_canales / 2
+      (dos medias canales por canal). Se adapta con un promedio exponencial
+      de los intervalos observados cuando la línea corre más rápido de lo planeado.
+    - rechazado: llega antes del intervalo mínimo (rebote o doble conteo)
+    - sospechoso: se acepta, pero llega antes de `factor_sospechoso` del esperado
+    - huérfano: primera media canal cuya pareja no llegó a tiempo
+    """
+
+    def __init__(self, factor_minimo=0.25, factor_sospechoso=0.5, factor_huerfano=2.0, rebote=0.05, alfa=0.1, reloj=time.monotonic):
+        self.factor_minimo = factor_minimo
+        self.factor_sospechoso = factor_sospechoso
+        self.factor_huerfano = factor_huerfano
+        self.rebote = rebote
+        self.alfa = alfa
+        self.reloj = reloj
+        self._lock = threading.Lock()
+        self.corte_id = None
+        self.esperado = None
+        self._ultimo = None
+        self._media_pendiente = None
+        self.reiniciar_estadisticas()
+
+    def configurar(self, corte):
+        """Toma el intervalo esperado del corte activo (llamar en cada transición)."""
+        with self._lock:
+            self.corte_id = corte.id
+            self.esperado = max(self.rebote, segundos_entre_canales(corte) / 2)
+            self.promedio = self.esperado
+            self._ultimo = None
+            self._media_pendiente = None
+
+    def desconfigurar(self):
+        with self._lock:
+            self.corte_id = None
+            self.esperado = None
+            self._ultimo = None
+            self._media_pendiente = None
+
+    def reiniciar_estadisticas(self):
+        with self._lock:
+            self.recibidos = 0
+            self.aceptados = 0
+            self.rechazados = 0
+            self.sospechosos = 0
+            self.huerfanos = 0
+            self.pares = 0
+            self.promedio = self.esperado
+
+    def intervalo_minimo(self):
+        if self.esperado is None:
+            return self.rebote
+        return max(self.rebote, self.factor_minimo * min(self.esperado, self.promedio))
+
+    def procesar(self, t=None):
+        """
+        Procesa un flanco. Devuelve el id del corte al que se debe registrar
+        el conteo, o None si el pulso se descarta.
+        """
+        t = self.reloj() if t is None else t
+        with self._lock:
+            self.recibidos += 1
+            if self.corte_id is None:
+                return None
+            if self._ultimo is not None:
+                intervalo = t - self._ultimo
+                if intervalo < self.intervalo_minimo():
+                    self.rechazados += 1
+                    return None
+                if intervalo < self.factor_sospechoso * self.esperado:
+                    self.sospechosos += 1
+                # Promedio exponencial acotado para que una pausa larga no lo dispare
+                self.promedio += self.alfa * (min(intervalo, 2 * self.esperado) - self.promedio)
+            self._ultimo = t
+
+            # Emparejar las dos medias canales
+            if self._media_pendiente is None:
+                self._media_pendiente = t
+            elif t - self._media_pendiente > self.factor_huerfano * 2 * self.esperado:
+                self.huerfanos += 1
+                self._media_pendiente = t
+            else:
+                self.pares += 1
+                self._media_pendiente = None
+
+            self.aceptados += 1
+            return self.corte_id
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'corte': self.corte_id,
+                'recibidos': self.recibidos,
+                'aceptados': self.aceptados,
+                'rechazados': self.rechazados,
+                'sospechosos': self.sospechosos,
+                'huerfanos': self.huerfanos,
+                'pares': self.pares,
+                'media_pendiente': self._media_pendiente is not None,
+                'intervalo_esperado': self.esperado,
+                'intervalo_promedio': round(self.promedio, 3) if self.promedio else None,
+                'intervalo_minimo': round(self.intervalo_minimo(), 3),
+            }
+
+
+class IngestaConteos:
+    """
+    Cola entre el callback GPIO y la base de datos: el callback sólo encola
+    y un hilo dedicado crea los Conteo, así el flanco nunca espera al ORM.
+    La hora se toma al encolar: si la base se atrasa, los conteos guardan
+    cuándo pasó el pulso y no cuándo se vació la cola.
+    `al_guardar(conteo)` se llama en ese hilo después de cada Conteo guardado.
+    """
+
+    def __init__(self, maximo=10000, al_guardar=None):
+        self.cola = queue.Queue(maxsize=maximo)
+        self.al_guardar = al_guardar
+        self.descartados = 0
+        self._hilo = None
+
+    def encolar(self, corte_id, hora=None):
+        try:
+            self.cola.put_nowait((corte_id, hora or datetime.now()))
+        except queue.Full:
+            self.descartados += 1
+
+    def pendientes(self):
+        return self.cola.qsize()
+
+    def arrancar(self, sembrar=None):
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._hilo = threading.Thread(target=self._loop, args=(sembrar,), name='ingesta-conteos', daemon=True)
+        self._hilo.start()
+
+    def _loop(self, sembrar):
+        from .models import Conteo
+        if sembrar:
+            try:
+                sembrar()
+            except Exception as e:
+                print(f'Ingesta: no se pudo cargar el corte activo ({e})')
+        while True:
+            corte_id, hora = self.cola.get()
+            try:
+                conteo = Conteo.objects.create(corte_id=corte_id, hora=hora, cantidad=CANTIDAD_POR_PULSO)
+                if self.al_guardar:
+                    self.al_guardar(conteo)
+            except Exception as e:
+                print(f'Ingesta: error al guardar conteo ({e})')
+            finally:
+                self.cola.task_done()
@@ -0,0 +1,152 @@
+# apps/core/sincronizacion.py
+# Modo edge: la Pi escribe en su SQLite local (WAL) sin esperar a la red y un
+# agente (`manage.py sincronizar`) sube los cambios a la base central.
+# - Triggers de SQLite anotan en Cambio cada inserción o cambio de Corte,
+#   Pausa y Conteo; no pasan por Python, así también cubren los update().
+# - La subida es por lotes e idempotente: INSERT ... ON CONFLICT (uuid) DO
+#   UPDATE, con las llaves foráneas traducidas a los ids de la central. Si se
+#   corta a la mitad, el lote se vuelve a subir completo sin duplicar nada.
+# - Configuracion y sus versiones bajan de la central, que es la dueña.
+# - Lo derivado (diario, tiempo muerto, resúmenes) no se sube: la central lo
+#   recalcula de los cortes recibidos (derivar_recibidos, por cron).
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, Min
+
+from . import diario, metricas, notificaciones, tiempo_muerto
+from .analitica import registrar_corte_dia, resumir_horas
+from .models import Cambio, Configuracion, Conteo, Corte, Pausa, VersionConfiguracion
+from .routers import CENTRAL
+
+MODELOS = {'corte': Corte, 'pausa': Pausa, 'conteo': Conteo}
+# Corte.version es la secuencia del diario local: en la central se inserta con
+# su valor por defecto y no se actualiza (la lleva el diario de la central)
+NO_SUBIR = {'version'}
+
+
+def instalar_bitacora(using='default', **kwargs):
+    """Crea los triggers de Cambio (idempotente). Se llama en post_migrate y al arrancar el agente."""
+    conexion = connections[using]
+    if not settings.EDGE or conexion.vendor != 'sqlite':
+        return
+    with conexion.cursor() as cursor:
+        for nombre, modelo in MODELOS.items():
+            for evento in ('INSERT', 'UPDATE'):
+                cursor.execute(
+                    f'CREATE TRIGGER IF NOT EXISTS core_cambio_{nombre}_{evento.lower()} AFTER {evento} ON {modelo._meta.db_table} '
+                    f"BEGIN INSERT INTO {Cambio._meta.db_table} (modelo, objeto_id, creado) "
+                    f"VALUES ('{nombre}', NEW.id, (julianday('now') - 2440587.5) * 86400.0); END"
+                )
+
+
+def encolar_todo():
+    """Anota todas las filas existentes (primera sincronización de una base que ya tenía datos)."""
+    with connections['default'].cursor() as cursor:
+        for nombre, modelo in MODELOS.items():
+            cursor.execute(
+                f'INSERT INTO {Cambio._meta.db_table} (modelo, objeto_id, creado) SELECT %s, id, %s FROM {modelo._meta.db_table}',
+                [nombre, time.time()],
+            )
+
+
+def upsert(modelo, objetos, using=CENTRAL):
+    """INSERT ... ON CONFLICT (uuid) DO UPDATE de `objetos` (con sus FKs ya traducidas) en `using`."""
+    if not objetos:
+        return
+    conexion = connections[using]
+    q = conexion.ops.quote_name
+    campos = [f for f in modelo._meta.concrete_fields if not f.primary_key]
+    columnas = ', '.join(q(f.column) for f in campos)
+    marcadores = ', '.join(['%s'] * len(campos))
+    actualizar = ', '.join(f'{q(f.column)} = EXCLUDED.{q(f.column)}' for f in campos if f.name != 'uuid' and f.name not in NO_SUBIR)
+    sql = f'INSERT INTO {q(modelo._meta.db_table)} ({columnas}) VALUES ({marcadores}) ON CONFLICT ({q("uuid")}) DO UPDATE SET {actualizar}'
+    with conexion.cursor() as cursor:
+        cursor.executemany(sql, [
+            [f.get_db_prep_save(f.get_default() if f.name in NO_SUBIR else getattr(o, f.attname), conexion) for f in campos]
+            for o in objetos
+        ])
+
+
+def subir(lote=1000):
+    """Sube un lote de cambios a la central. Devuelve cuántos cambios se procesaron."""
+    cambios = list(Cambio.objects.order_by('id').values_list('id', 'modelo', 'objeto_id')[:lote])
+    if not cambios:
+        return 0
+    ids = defaultdict(set)
+    for _, modelo, objeto_id in cambios:
+        ids[modelo].add(objeto_id)
+    pausas = list(Pausa.objects.filter(id__in=ids['pausa']))
+    conteos = list(Conteo.objects.filter(id__in=ids['conteo']))
+    # También los cortes de las pausas y conteos: así su FK siempre existe en la central
+    cortes = list(Corte.objects.filter(id__in=ids['corte'] | {o.corte_id for o in pausas + conteos}))
+    with transaction.atomic(using=CENTRAL):
+        upsert(Corte, cortes)
+        centrales = dict(Corte.objects.using(CENTRAL).filter(uuid__in=[c.uuid for c in cortes]).values_list('uuid', 'id'))
+        traduccion = {c.id: centrales[c.uuid] for c in cortes}
+        for objeto in pausas + conteos:
+            objeto.corte_id = traduccion[objeto.corte_id]
+        upsert(Pausa, pausas)
+        upsert(Conteo, conteos)
+    Cambio.objects.filter(id__lte=cambios[-1][0]).delete()
+    return len(cambios)
+
+
+def derivar_recibidos(factor):
+    """
+    En la central: diario, tiempo muerto, ResumenHora y ResumenDia de los
+    cortes subidos por una Pi. Se reconocen por estar finalizados sin diario
+    (los de la central lo tienen desde que se crean); el diario se genera al
+    último y marca el corte como hecho. Devuelve cuántos cortes procesó.
+    """
+    total = 0
+    cortes = Corte.objects.filter(inicio__isnull=False, fin__isnull=False, eventocorte__isnull=True).order_by('id')
+    for corte in cortes.iterator():
+        tiempo_muerto.reconstruir(corte, factor)
+        # Las horas del corte se rehacen completas: pudieron resumirse antes de que llegaran sus conteos
+        resumir_horas(min(corte.fin + timedelta(hours=1), datetime.now()), desde=corte.inicio.replace(minute=0, second=0, microsecond=0))
+        registrar_corte_dia(corte)
+        diario.reconstruir(corte)
+        total += 1
+    return total
+
+
+def bajar_configuracion():
+    """Trae los umbrales y sus versiones de la central. Devuelve cuántas versiones nuevas llegaron."""
+    locales = {c.tipo: c for c in Configuracion.objects.all()}
+    cambios = 0
+    for central in Configuracion.objects.using(CENTRAL).all():
+        local = locales.get(central.tipo)
+        valores = {'verde': central.verde, 'amarillo': central.amarillo, 'rojo': central.rojo}
+        if local is None:
+            Configuracion.objects.create(tipo=central.tipo, **valores)
+            cambios += 1
+        elif any(getattr(local, campo) != valor for campo, valor in valores.items()):
+            Configuracion.objects.filter(id=local.id).update(**valores)
+            cambios += 1
+    existentes = set(VersionConfiguracion.objects.values_list('tipo', 'vigente_desde'))
+    nuevas = [
+        VersionConfiguracion(tipo=v.tipo, verde=v.verde, amarillo=v.amarillo, rojo=v.rojo, vigente_desde=v.vigente_desde)
+        for v in VersionConfiguracion.objects.using(CENTRAL).order_by('id')
+        if (v.tipo, v.vigente_desde) not in existentes
+    ]
+    VersionConfiguracion.objects.bulk_create(nuevas)
+    if cambios or nuevas:
+        # El agente corre aparte: los workers de la Pi se enteran por su socket
+        notificaciones.publicar('configuracion')
+    return len(nuevas)
+
+
+@metricas.registro.colector
+def metricas_sincronizacion():
+    if not settings.EDGE:
+        return []
+    pendientes = Cambio.objects.aggregate(total=Count('id'), primero=Min('creado'))
+    retraso = time.time() - pendientes['primero'] if pendientes['primero'] else 0
+    return [
+        ('cortes_sync_pendientes', 'gauge', 'Cambios locales sin subir a la central', [({}, pendientes['total'])]),
+        ('cortes_sync_retraso_segundos', 'gauge', 'Antigüedad del cambio más viejo sin subir', [({}, round(retraso, 3))]),
+    ]
@@ -0,0 +1,85 @@
+# apps/core/singleflight.py
+# Coalescencia de peticiones idénticas: mientras una petición calcula un
+# reporte, las iguales que llegan esperan ese cálculo en lugar de repetirlo.
+# - En el proceso: un Future por llave (sirve entre hilos y entre event loops,
+#   como cuando gunicorn corre las vistas asíncronas).
+# - Entre workers: cache.add() como candado en el backend de caché; el que lo
+#   gana calcula y deja el resultado SINGLEFLIGHT_TTL segundos, los demás lo
+#   esperan. Con LocMemCache (por defecto) esto sólo cubre el proceso.
+import asyncio
+import hashlib
+import threading
+import time
+from concurrent.futures import Future
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+_FALTA = object()
+_en_vuelo = {}
+_lock = threading.Lock()
+
+
+class _Abandonado(Exception):
+    """El que calculaba se canceló (el cliente cerró la conexión); otro toma su lugar."""
+
+
+def clave_peticion(request):
+    """Ruta más parámetros ordenados: el mismo reporte da la misma llave sin importar el orden del query string."""
+    consulta = urlencode(sorted(request.GET.lists()), doseq=True)
+    return hashlib.sha1(f'{request.path}?{consulta}'.encode()).hexdigest()
+
+
+async def una_vez(clave, calcular):
+    """Devuelve await calcular(), compartido con las llamadas concurrentes de la misma llave."""
+    while True:
+        with _lock:
+            futuro = _en_vuelo.get(clave)
+            lider = futuro is None
+            if lider:
+                futuro = _en_vuelo[clave] = Future()
+        if lider:
+            break
+        try:
+            return await asyncio.wrap_future(futuro)
+        except _Abandonado:
+            continue
+    try:
+        resultado = await _entre_procesos(clave, calcular)
+    except asyncio.CancelledError:
+        futuro.set_exception(_Abandonado())
+        raise
+    except Exception as e:
+        futuro.set_exception(e)
+        raise
+    else:
+        futuro.set_result(resultado)
+        return resultado
+    finally:
+        with _lock:
+            _en_vuelo.pop(clave, None)
+
+
+async def _entre_procesos(clave, calcular):
+    llave_resultado, llave_candado = f'singleflight:resultado:{clave}', f'singleflight:candado:{clave}'
+    resultado = await cache.aget(llave_resultado, _FALTA)
+    if resultado is not _FALTA:
+        return resultado
+    if await cache.aadd(llave_candado, 1, timeout=settings.SINGLEFLIGHT_ESPERA):
+        try:
+            resultado = await calcular()
+            await cache.aset(llave_resultado, resultado, timeout=settings.SINGLEFLIGHT_TTL)
+            return resultado
+        finally:
+            await cache.adelete(llave_candado)
+    # Otro worker lo está calculando
+    limite = time.monotonic() + settings.SINGLEFLIGHT_ESPERA
+    while time.monotonic() < limite:
+        await asyncio.sleep(0.05)
+        resultado = await cache.aget(llave_resultado, _FALTA)
+        if resultado is not _FALTA:
+            return resultado
+        if not await cache.ahas_key(llave_candado):
+            break  # falló o expiró sin dejar resultado
+    return await calcular()
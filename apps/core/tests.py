@@ -1,3 +1,661 @@
-from django.test import TestCase
+import asyncio
+import csv
+import math
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connections, OperationalError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+from . import carga_masiva, diario, kpi, notificaciones, sincronizacion, singleflight, tiempo_muerto, views
+from .cuantiles import KLL
+from .models import Cambio, Conteo, Corte, EventoCorte, Pausa
+from .routers import CENTRAL
+from .proyeccion import ProyeccionCorte
+from .sensor import FiltroConteo, IngestaConteos
+from .trabajos import ColaTrabajos, CANCELADO, TERMINADO
+from .watchdog import RuedaTemporizadores, WatchdogCorte
+
+# La central sólo existe en modo edge: para las pruebas de la subida se agrega
+# el alias sobre SQLite y el runner crea su base de prueba en memoria.
+if CENTRAL not in connections.settings:
+    connections.settings[CENTRAL] = {
+        **connections.settings['default'], 'TEST': {**connections.settings['default']['TEST'], 'NAME': None},
+    }
+
+
+def nuevo_corte(using='default'):
+    return Corte.objects.using(using).create(
+        cantidad_canales=100, horas_jornada=8, canales_hora=12, tiempo_entre_canales=300,
+        grasa_carne=1, hueso_carne=1, piezas_vendibles=1, tiempo_muerto=0,
+    )
+
+
+class TransicionesConcurrentesTest(TransactionTestCase):
+    """Varios hilos (como varios workers) disparan transiciones del mismo corte a la vez."""
+
+    def transiciones_a_la_vez(self, corte, tipos):
+        """Corre transicion(corte, tipo) en un hilo por tipo, todos a la vez. Devuelve [True | mensaje]."""
+        barrera = threading.Barrier(len(tipos))
+        resultados = [None] * len(tipos)
+
+        def correr(i, tipo):
+            barrera.wait()
+            try:
+                # SQLite en memoria no espera a otra escritura: se reintenta como lo haría el usuario
+                for _ in range(100):
+                    try:
+                        diario.transicion(Corte.objects.get(id=corte.id), tipo)
+                        resultados[i] = True
+                        return
+                    except OperationalError:
+                        time.sleep(0.01)
+            except diario.TransicionInvalida as e:
+                resultados[i] = str(e)
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=correr, args=(i, tipo)) for i, tipo in enumerate(tipos)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return resultados
+
+    def assertDiarioContiguo(self, corte):
+        secuencias = list(EventoCorte.objects.filter(corte=corte).order_by('secuencia').values_list('secuencia', flat=True))
+        self.assertEqual(secuencias, list(range(1, len(secuencias) + 1)))
+        self.assertEqual(Corte.objects.get(id=corte.id).version, secuencias[-1])
+
+    def test_pausar_y_finalizar_a_la_vez(self):
+        corte = nuevo_corte()
+        diario.transicion(corte, diario.INICIADO)
+
+        resultados = self.transiciones_a_la_vez(corte, [diario.PAUSADO] * 6)
+        self.assertEqual(resultados.count(True), 1)
+        self.assertEqual(Pausa.objects.filter(corte=corte, fin_pausa__isnull=True).count(), 1)
+
+        resultados = self.transiciones_a_la_vez(corte, [diario.FINALIZADO] * 4)
+        self.assertEqual(resultados.count(True), 1)
+        self.assertEqual(EventoCorte.objects.filter(corte=corte, tipo=diario.FINALIZADO).count(), 1)
+        self.assertEqual(EventoCorte.objects.filter(corte=corte, tipo=diario.PAUSADO).count(), 1)
+        self.assertDiarioContiguo(corte)
+
+    def test_secuencia_ocupada_reintenta(self):
+        corte = nuevo_corte()
+        diario.transicion(corte, diario.INICIADO)
+        proyectar = diario.proyectar
+
+        def ocupar_secuencia(corte, tipo, momento):
+            # Otro proceso anota un lote con la misma secuencia antes que este evento
+            if not ocupar_secuencia.hecho:
+                ocupar_secuencia.hecho = True
+                EventoCorte.objects.create(corte=corte, secuencia=corte.version, tipo=diario.CONTEOS, momento=momento, datos={})
+            return proyectar(corte, tipo, momento)
+        ocupar_secuencia.hecho = False
+
+        with mock.patch.object(diario, 'proyectar', ocupar_secuencia):
+            diario.transicion(Corte.objects.get(id=corte.id), diario.PAUSADO)
+        self.assertEqual(Pausa.objects.filter(corte=corte, fin_pausa__isnull=True).count(), 1)
+        self.assertDiarioContiguo(corte)
+
+    def test_pausa_abierta_fuera_del_diario(self):
+        corte = nuevo_corte()
+        diario.transicion(corte, diario.INICIADO)
+        validar = diario.validar
+
+        def pausa_del_admin(*args):
+            validar(*args)
+            Pausa.objects.create(corte=corte)
+
+        with mock.patch.object(diario, 'validar', pausa_del_admin), self.assertRaisesMessage(diario.TransicionInvalida, 'Ya existe una pausa abierta'):
+            diario.transicion(Corte.objects.get(id=corte.id), diario.PAUSADO)
+
+    def test_finalizar_anota_conteos_de_otro_proceso(self):
+        corte = nuevo_corte()
+        diario.transicion(corte, diario.INICIADO)
+        # Guardados por el hilo de ingesta de otro proceso: este no los tiene en su lote
+        for _ in range(7):
+            Conteo.objects.create(corte=corte, cantidad=0.5)
+
+        diario.transicion(corte, diario.FINALIZADO)
+        tipos = list(EventoCorte.objects.filter(corte=corte).order_by('secuencia').values_list('tipo', flat=True))
+        self.assertEqual(tipos, [diario.INICIADO, diario.CONTEOS, diario.FINALIZADO])
+        estado = diario.estado_actual(corte.id)
+        self.assertEqual((estado['conteos'], estado['canales']), (7, 3.5))
+
+        # Un conteo que llega tarde no abre el diario después de FINALIZADO
+        Conteo.objects.create(corte=corte, cantidad=0.5)
+        self.assertIsNone(diario.anotar_conteos(corte.id))
+        self.assertEqual(EventoCorte.objects.filter(corte=corte).latest('secuencia').tipo, diario.FINALIZADO)
+        self.assertDiarioContiguo(corte)
+
+
+class ColaTrabajosTest(SimpleTestCase):
+    """Dos colas sobre el mismo directorio hacen de dos workers."""
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.uno, self.otro = ColaTrabajos(directorio.name), ColaTrabajos(directorio.name)
+        self.seguir = threading.Event()
+
+    def generar(self, trabajo):
+        while not self.seguir.wait(0.01):
+            trabajo.avanzar(0.5)
+        return {'filas': []}
+
+    def esperar(self, cola, id, estados):
+        for _ in range(300):
+            if cola.estado(id)['estado'] in estados:
+                return cola.estado(id)
+            time.sleep(0.01)
+        self.fail(f'{id} no llegó a {estados}')
+
+    def test_otro_worker_ve_reutiliza_y_termina(self):
+        estado, nuevo = self.uno.enviar('report1', {'rango': '30'}, self.generar)
+        self.assertTrue(nuevo)
+        self.assertIsNotNone(self.otro.estado(estado['id']))
+        repetido, nuevo = self.otro.enviar('report1', {'rango': '30'}, self.generar)
+        self.assertFalse(nuevo)
+        self.assertEqual(repetido['id'], estado['id'])
+
+        self.seguir.set()
+        self.esperar(self.otro, estado['id'], [TERMINADO])
+        self.assertIsNotNone(self.otro.resultado(estado['id']))
+        # Ya terminado no se reutiliza
+        otra_vez, nuevo = self.otro.enviar('report1', {'rango': '30'}, lambda trabajo: [])
+        self.assertTrue(nuevo)
+        self.esperar(self.otro, otra_vez['id'], [TERMINADO])
+
+    def test_otro_worker_cancela(self):
+        estado, _ = self.uno.enviar('report1', {'rango': '30'}, self.generar)
+        self.assertTrue(self.otro.cancelar(estado['id']))
+        final = self.esperar(self.otro, estado['id'], [CANCELADO])
+        self.assertEqual(final['mensaje'], 'Cancelado')
+        self.assertFalse(self.otro.cancelar(estado['id']))
+
+
+class RuedaTemporizadoresTest(SimpleTestCase):
+
+    def test_vence_en_su_tick_aunque_de_la_vuelta(self):
+        rueda = RuedaTemporizadores(ranuras=8)
+        vencidos = []
+        for segundos in (1, 3, 8, 11, 20):
+            rueda.programar(segundos, lambda s=segundos: vencidos.append((s, tick)))
+        for tick in range(1, 25):
+            rueda.avanzar()
+        self.assertEqual(vencidos, [(1, 1), (3, 3), (8, 8), (11, 11), (20, 20)])
+        self.assertEqual(len(rueda), 0)
+
+    def test_cancelar(self):
+        rueda = RuedaTemporizadores(ranuras=8)
+        vencidos = []
+        tid = rueda.programar(2, lambda: vencidos.append('cancelado'))
+        rueda.programar(2, lambda: vencidos.append('sigue'))
+        rueda.cancelar(tid)
+        rueda.cancelar(None)
+        self.assertEqual(sum(rueda.avanzar() for _ in range(3)), 1)
+        self.assertEqual(vencidos, ['sigue'])
+
+
+class WatchdogCorteTest(SimpleTestCase):
+    """Reloj falso: cada segundo que pasa avanza la rueda un tick."""
+
+    def setUp(self):
+        self.ahora = 0.0
+        self.avisos = []
+        self.watchdog = WatchdogCorte(factor_paro=3, rueda=RuedaTemporizadores(), reloj=lambda: self.ahora)
+        self.watchdog.on_alarma = lambda accion, motivo: self.avisos.append(('alarma', motivo))
+        self.watchdog.on_normal = lambda motivo: self.avisos.append(('normal', motivo))
+
+    def pasar(self, segundos, conteo_cada=None):
+        for segundo in range(1, segundos + 1):
+            self.ahora += 1
+            if conteo_cada and segundo % conteo_cada == 0:
+                self.watchdog.conteo()
+            self.watchdog.rueda.avanzar()
+
+    def iniciar(self, horas_jornada=8, tiempo_entre_canales=10):
+        self.watchdog.iniciar(SimpleNamespace(id=1, horas_jornada=horas_jornada, tiempo_entre_canales=tiempo_entre_canales))
+
+    def test_paro_y_vuelta_del_sensor(self):
+        self.iniciar()
+        self.pasar(100, conteo_cada=10)
+        self.assertEqual(self.avisos, [])
+        self.pasar(30)
+        self.assertEqual(self.avisos, [('alarma', 'paro')])
+        self.pasar(60)
+        self.assertEqual(self.avisos, [('alarma', 'paro')])
+        self.watchdog.conteo()
+        self.assertEqual(self.avisos, [('alarma', 'paro'), ('normal', 'paro')])
+        self.assertEqual(self.watchdog.alarmas, set())
+
+    def test_pausa_no_es_paro_ni_cuenta_para_la_jornada(self):
+        self.iniciar(horas_jornada=0.01)  # 36 s de jornada
+        self.pasar(20, conteo_cada=5)
+        self.watchdog.pausar()
+        self.pasar(100)
+        self.assertEqual(self.avisos, [])
+        self.watchdog.reanudar()
+        self.pasar(15, conteo_cada=5)
+        self.assertEqual(self.avisos, [])
+        self.pasar(5, conteo_cada=5)
+        self.assertEqual(self.avisos, [('alarma', 'cierre')])
+
+    def test_paro_despues_del_cierre(self):
+        self.iniciar(horas_jornada=0.01)
+        self.pasar(40, conteo_cada=5)
+        self.assertEqual(self.avisos, [('alarma', 'cierre')])
+        self.pasar(30)
+        self.assertEqual(self.avisos, [('alarma', 'cierre'), ('alarma', 'paro')])
+        self.watchdog.conteo()
+        self.assertEqual(self.watchdog.alarmas, {'cierre'})
+        self.watchdog.finalizar()
+        self.assertEqual(self.avisos[-1], ('normal', 'cierre'))
+        self.assertEqual(self.watchdog.alarmas, set())
+
+
+class FiltroConteoTest(SimpleTestCase):
+    """tiempo_entre_canales=10: un pulso esperado cada 5 s, mínimo 1.25 s."""
+
+    def setUp(self):
+        self.filtro = FiltroConteo(factor_minimo=0.25, factor_sospechoso=0.5, rebote=0.05, alfa=0.1)
+        self.filtro.configurar(SimpleNamespace(id=7, tiempo_entre_canales=10))
+
+    def pulsos(self, *tiempos):
+        return [self.filtro.procesar(t) for t in tiempos]
+
+    def test_sin_corte_descarta(self):
+        self.filtro.desconfigurar()
+        self.assertEqual(self.pulsos(0, 5), [None, None])
+        self.assertEqual(self.filtro.recibidos, 2)
+
+    def test_rebote_y_sospechoso(self):
+        self.assertEqual(self.pulsos(0, 0.02, 1.0, 5, 7), [7, None, None, 7, 7])
+        stats = self.filtro.estadisticas()
+        self.assertEqual((stats['aceptados'], stats['rechazados'], stats['sospechosos']), (3, 2, 1))
+
+    def test_promedio_se_adapta_a_la_linea_rapida(self):
+        t = 0.0
+        self.filtro.procesar(t)
+        for _ in range(40):
+            t += 1.5
+            self.assertEqual(self.filtro.procesar(t), 7)
+        self.assertAlmostEqual(self.filtro.promedio, 1.5, delta=0.1)
+        self.assertLess(self.filtro.intervalo_minimo(), 0.5)
+        # A 1 s ya no es rebote: el mínimo bajó con el promedio
+        self.assertEqual(self.filtro.procesar(t + 1.0), 7)
+
+    def test_pausa_larga_no_dispara_el_promedio(self):
+        self.pulsos(0, 5)
+        self.filtro.procesar(1000)
+        self.assertLessEqual(self.filtro.promedio, 5 + 0.1 * (10 - 5))
+
+    def test_huerfano(self):
+        # Pareja a 3 s; la siguiente media canal se queda sola más de 20 s
+        self.pulsos(0, 3, 10, 40, 42)
+        stats = self.filtro.estadisticas()
+        self.assertEqual((stats['pares'], stats['huerfanos']), (2, 1))
+        self.assertFalse(stats['media_pendiente'])
+
+
+class IngestaConteosTest(TransactionTestCase):
+
+    def test_guarda_la_hora_del_pulso(self):
+        corte = nuevo_corte()
+        guardados = []
+
+        def al_guardar(conteo):
+            guardados.append(conteo)
+            connections.close_all()
+
+        ingesta = IngestaConteos(al_guardar=al_guardar)
+        pulso = datetime.now()
+        ingesta.encolar(corte.id)
+        ingesta.encolar(corte.id, pulso - timedelta(minutes=1))
+        # La base "se atrasa": el hilo empieza a guardar después
+        time.sleep(0.3)
+        ingesta.arrancar()
+        ingesta.cola.join()
+        horas = list(Conteo.objects.filter(corte=corte).order_by('id').values_list('hora', flat=True))
+        self.assertEqual(len(guardados), 2)
+        self.assertLess(abs((horas[0] - pulso).total_seconds()), 0.2)
+        self.assertEqual(horas[1], pulso - timedelta(minutes=1))
+
+
+class TiempoMuertoTest(SimpleTestCase):
+    inicio = datetime(2026, 1, 1, 6)
+
+    def hora(self, segundos):
+        return self.inicio + timedelta(seconds=segundos)
+
+    def test_unir_funde_traslapes(self):
+        unidos = tiempo_muerto.unir([
+            (self.hora(100), self.hora(200), 'hueco'),
+            (self.hora(0), self.hora(50), 'pausa'),
+            (self.hora(150), self.hora(300), 'pausa'),
+            (self.hora(300), self.hora(400), 'pausa'),
+        ])
+        self.assertEqual(unidos, [
+            (self.hora(0), self.hora(50), 'pausa'),
+            (self.hora(100), self.hora(400), 'mixto'),
+        ])
+
+    def test_hueco_desde_el_pulso_esperado(self):
+        horas = [self.hora(60), self.hora(120), self.hora(1000), self.hora(1060)]
+        self.assertEqual(tiempo_muerto.huecos(horas, self.inicio, 60, 3), [(self.hora(150), self.hora(1000), 'hueco')])
+        self.assertEqual(tiempo_muerto.huecos([], self.inicio, 60, 3), [])
+
+    def test_la_pausa_no_es_hueco(self):
+        horas = [self.hora(60), self.hora(1000)]
+        # 900 s de pausa dejan 40 s activos entre los dos conteos
+        pausas = [(self.hora(80), self.hora(980))]
+        self.assertEqual(tiempo_muerto.huecos(horas, self.inicio, 60, 3, pausas), [])
+        # Con una pausa corta el resto sigue siendo hueco
+        pausas = [(self.hora(80), self.hora(180))]
+        self.assertEqual(tiempo_muerto.huecos(horas, self.inicio, 60, 3, pausas), [(self.hora(90), self.hora(1000), 'hueco')])
+
+    def test_pausa_abierta_no_termina(self):
+        horas = [self.hora(60), self.hora(1000)]
+        self.assertEqual(tiempo_muerto.huecos(horas, self.inicio, 60, 3, [(self.hora(80), None)]), [])
+        self.assertEqual(
+            tiempo_muerto.intervalos_pausas([(self.hora(0), self.hora(10)), (self.hora(80), None)], hasta=self.hora(90)),
+            [(self.hora(0), self.hora(10), 'pausa'), (self.hora(80), self.hora(90), 'pausa')],
+        )
+
+
+class KpiTest(SimpleTestCase):
+    inicio = datetime(2026, 1, 1, 6)
+
+    def hora(self, segundos):
+        return self.inicio + timedelta(seconds=segundos)
+
+    def test_tiempo_activo_sin_pausas(self):
+        inicios, duraciones = kpi.arreglo_pausas([(self.hora(100), self.hora(400)), (self.hora(1000), None)], kpi.np.inf)
+        t = kpi.a_segundos([self.hora(s) for s in (50, 200, 500, 1200)])
+        activo = kpi.tiempo_activo(t, kpi.a_segundos([self.inicio])[0], inicios, duraciones)
+        # Dentro de una pausa el tiempo activo se queda al inicio de la pausa; la abierta no termina
+        self.assertEqual(list(activo), [50, 100, 200, 700])
+
+    def test_canales_hora_real(self):
+        pausas = [{'inicio_pausa': self.hora(1800), 'fin_pausa': self.hora(3600)}]
+        self.assertEqual(kpi.canales_hora_real(12, self.inicio, self.hora(5400), pausas), 12)
+        self.assertIsNone(kpi.canales_hora_real(1, self.inicio, self.hora(kpi.ACTIVO_MINIMO - 1), []))
+        self.assertEqual(kpi.canales_hora_real(5, None, None, []), 0)
+
+    def test_serie_incremental_igual_a_lote(self):
+        corte = SimpleNamespace(id=1, inicio=self.inicio, tiempo_entre_canales=300, canales_hora=12)
+        filas = [(i + 1, self.hora(150 * (i + 1) + (900 if i >= 10 else 0)), 0.5) for i in range(20)]
+        pausas = [(self.hora(1600), self.hora(2500))]
+        lote = kpi.SerieKpi(corte)
+        lote.agregar(filas, pausas)
+        vivo = kpi.SerieKpi(corte)
+        vivo.agregar(filas[:7], pausas)
+        vivo.agregar(filas, pausas)  # repite los primeros: se ignoran por id
+        fin = self.hora(4000)
+        self.assertEqual(vivo.resumen(pausas, fin), lote.resumen(pausas, fin))
+
+        resumen = lote.resumen(pausas, fin)
+        self.assertEqual(resumen['canales'], 10)
+        self.assertEqual(resumen['tiempo_pausado'], 900)
+        self.assertEqual(resumen['tiempo_activo'], 3100)
+        self.assertEqual(resumen['tiempo_entre_canales']['mediana'], 300)
+        # Entre 1500 y 2550 hay 1050 s de pared, pero la pausa deja 150 s activos como los demás
+        self.assertEqual(resumen['huecos'][0]['segundos'], 150)
+        self.assertEqual(resumen['huecos'][-1]['segundos'], 150)
+
+
+class ProyeccionCorteTest(SimpleTestCase):
+    inicio = datetime(2026, 1, 1, 6)
+
+    def setUp(self):
+        self.proyeccion = ProyeccionCorte(tau=300.0)
+        self.proyeccion.configurar(SimpleNamespace(
+            id=1, inicio=self.inicio, cantidad_canales=100, horas_jornada=8, canales_hora=12,
+        ))
+        self.proyeccion.pausas([])
+
+    def hora(self, segundos):
+        return self.inicio + timedelta(seconds=segundos)
+
+    def ritmo(self):
+        return self.proyeccion.ritmo * 3600
+
+    def test_peso_segun_intervalo(self):
+        # Un pulso a los 30 s (60 canales/h) pesa 1 - e^(-30/tau), no un paso fijo
+        self.proyeccion.conteo(1, self.hora(30), 0.5)
+        self.assertAlmostEqual(self.ritmo(), 12 + (1 - math.exp(-30 / 300)) * (60 - 12))
+
+        # Tras un intervalo mucho mayor que tau casi sólo cuenta el último ritmo
+        self.proyeccion.conteo(2, self.hora(30 + 3000), 25)
+        self.assertAlmostEqual(self.ritmo(), 30, delta=0.01)
+
+    def test_converge_al_ritmo_real(self):
+        t = 0
+        for i in range(1, 41):
+            t += 75
+            self.proyeccion.conteo(i, self.hora(t), 0.5)
+        self.assertAlmostEqual(self.ritmo(), 24, delta=0.01)
+        # Conteos repetidos o viejos no cuentan
+        self.proyeccion.conteo(40, self.hora(t + 1), 50)
+        self.assertEqual(self.proyeccion.canales, 20)
+
+    def test_la_pausa_no_es_intervalo(self):
+        self.proyeccion.pausas([(self.hora(100), self.hora(1000))])
+        self.proyeccion.conteo(1, self.hora(1050), 0.5)
+        self.assertAlmostEqual(self.ritmo(), 12)
+
+    def test_linea_parada_baja_el_ritmo(self):
+        self.proyeccion.conteo(1, self.hora(150), 0.5)
+        # Dentro del intervalo esperado entre pulsos el ritmo no baja
+        self.assertEqual(self.proyeccion.estado(self.hora(300))['ritmo_actual'], 12)
+        parado = self.proyeccion.estado(self.hora(300 + 300))
+        self.assertAlmostEqual(parado['ritmo_actual'], 12 * math.exp(-1), places=2)
+        self.assertFalse(parado['alcanza'])
+
+
+class KLLTest(SimpleTestCase):
+    n = 50000
+    qs = [0.01, 0.1, 0.5, 0.9, 0.99]
+
+    def setUp(self):
+        self.valores = list(range(self.n))
+        random.Random(7).shuffle(self.valores)
+
+    def boceto(self, valores):
+        boceto = KLL()
+        for valor in valores:
+            boceto.actualizar(valor)
+        return boceto
+
+    def assertCuantiles(self, boceto):
+        for q, valor in zip(self.qs, boceto.cuantiles(self.qs)):
+            # error de rango; con k=200 queda muy por debajo del 2 %
+            self.assertAlmostEqual(valor / self.n, q, delta=0.02)
+
+    def test_precision_y_memoria(self):
+        boceto = self.boceto(self.valores)
+        self.assertEqual(len(boceto), self.n)
+        self.assertLessEqual(sum(len(n) for n in boceto.niveles), 3 * boceto.k)
+        self.assertCuantiles(boceto)
+
+    def test_fusionar(self):
+        a = self.boceto(self.valores[:30000])
+        b = self.boceto(self.valores[30000:])
+        a.fusionar(KLL.desde_dict(b.a_dict()))
+        self.assertEqual(len(a), self.n)
+        self.assertLessEqual(sum(len(n) for n in a.niveles), 3 * a.k)
+        self.assertCuantiles(a)
+
+    def test_vacio_y_pocos_valores(self):
+        self.assertEqual(KLL().cuantiles([0.5]), [None])
+        boceto = self.boceto([3, 1, None, 2])
+        self.assertEqual(len(boceto), 3)
+        self.assertEqual(boceto.cuantiles([0, 0.5, 1]), [1, 2, 3])
+
+
+class SingleflightTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.llamadas = 0
+
+    async def calcular(self, resultado='listo', espera=0.05, error=None):
+        self.llamadas += 1
+        await asyncio.sleep(espera)
+        if error:
+            raise error
+        return resultado
+
+    def test_iguales_comparten_el_calculo(self):
+        async def correr():
+            return await asyncio.gather(*[singleflight.una_vez('a', self.calcular) for _ in range(5)])
+        self.assertEqual(asyncio.run(correr()), ['listo'] * 5)
+        self.assertEqual(self.llamadas, 1)
+        self.assertEqual(singleflight._en_vuelo, {})
+
+    def test_el_error_llega_a_todos_y_no_se_guarda(self):
+        async def correr():
+            return await asyncio.gather(*[
+                singleflight.una_vez('b', lambda: self.calcular(error=ValueError('falló'))) for _ in range(3)
+            ], return_exceptions=True)
+        resultados = asyncio.run(correr())
+        self.assertTrue(all(isinstance(r, ValueError) for r in resultados))
+        self.assertEqual(self.llamadas, 1)
+        # Sin resultado ni candado guardados: la siguiente vuelve a calcular
+        self.assertEqual(asyncio.run(singleflight.una_vez('b', self.calcular)), 'listo')
+        self.assertEqual(self.llamadas, 2)
+
+    def test_otro_toma_el_lugar_del_que_se_cancela(self):
+        async def correr():
+            lider = asyncio.create_task(singleflight.una_vez('c', lambda: self.calcular('lider', espera=10)))
+            await asyncio.sleep(0.01)
+            seguidor = asyncio.create_task(singleflight.una_vez('c', lambda: self.calcular('seguidor')))
+            await asyncio.sleep(0.01)
+            lider.cancel()
+            return await seguidor
+        self.assertEqual(asyncio.run(correr()), 'seguidor')
+        self.assertEqual(self.llamadas, 2)
+
+
+class SubirCentralTest(TestCase):
+    """sincronizacion.subir contra una central SQLite en memoria (en producción es PostgreSQL)."""
+    databases = {'default', CENTRAL}
+
+    @classmethod
+    def setUpClass(cls):
+        # La central no se migra desde aquí (RouterReplica.allow_migrate): sólo las tablas que recibe
+        with connections[CENTRAL].schema_editor() as editor:
+            for modelo in (Corte, Pausa, Conteo):
+                editor.create_model(modelo)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connections[CENTRAL].schema_editor() as editor:
+            for modelo in (Conteo, Pausa, Corte):
+                editor.delete_model(modelo)
+
+    def test_subida_idempotente_con_ids_de_la_central(self):
+        # La central ya tiene otros cortes: los ids locales no coinciden con los suyos
+        for _ in range(3):
+            nuevo_corte(using=CENTRAL)
+        corte = nuevo_corte()
+        Pausa.objects.create(corte=corte, inicio_pausa=datetime(2026, 1, 1, 7), fin_pausa=datetime(2026, 1, 1, 7, 10))
+        for _ in range(5):
+            Conteo.objects.create(corte=corte, cantidad=0.5)
+
+        sincronizacion.encolar_todo()
+        self.assertEqual(sincronizacion.subir(), 7)
+        self.assertEqual(Cambio.objects.count(), 0)
+        central = Corte.objects.using(CENTRAL).get(uuid=corte.uuid)
+        self.assertNotEqual(central.id, corte.id)
+        self.assertEqual(Pausa.objects.using(CENTRAL).get().corte_id, central.id)
+        self.assertEqual(set(Conteo.objects.using(CENTRAL).values_list('corte_id', flat=True)), {central.id})
+
+        # Subir todo otra vez (como tras un corte a la mitad) actualiza sin duplicar
+        Corte.objects.filter(id=corte.id).update(fin=datetime(2026, 1, 1, 14))
+        sincronizacion.encolar_todo()
+        sincronizacion.subir()
+        self.assertEqual(Corte.objects.using(CENTRAL).count(), 4)
+        self.assertEqual(Pausa.objects.using(CENTRAL).count(), 1)
+        self.assertEqual(Conteo.objects.using(CENTRAL).count(), 5)
+        self.assertEqual(Corte.objects.using(CENTRAL).get(uuid=corte.uuid).fin, datetime(2026, 1, 1, 14))
+
+
+class CargaMasivaTest(TestCase):
+
+    def escribir(self, nombre, filas):
+        with open(f'{self.directorio}/{nombre}.csv', 'w', newline='', encoding='utf-8') as archivo:
+            csv.writer(archivo).writerows(filas)
+
+    def setUp(self):
+        temporal = tempfile.TemporaryDirectory()
+        self.addCleanup(temporal.cleanup)
+        self.directorio = temporal.name
+        datos = [100, 8, 12, 300, 1, 1, 1, 0]
+        self.escribir('cortes', [
+            ['cantidad_canales', 'horas_jornada', 'canales_hora', 'tiempo_entre_canales', 'grasa_carne',
+             'hueso_carne', 'piezas_vendibles', 'tiempo_muerto', 'inicio', 'fin', 'uuid'],
+            datos + ['2020-03-01 08:00:00', '2020-03-01 16:00:00', 'FOLIO-1'],
+            datos + ['2020-03-02 08:00:00', '2020-03-02 16:00:00', ''],
+        ])
+        self.escribir('pausas', [
+            ['uuid', 'corte_uuid', 'inicio_pausa', 'fin_pausa'],
+            ['', 'FOLIO-1', '2020-03-01 10:00:00', '2020-03-01 10:30:00'],
+        ])
+        # Sin columna uuid; dos conteos con la misma hora son filas distintas
+        self.escribir('conteos', [['corte_uuid', 'hora', 'cantidad']] + [['FOLIO-1', '2020-03-01 09:00:00', 0.5]] * 2 + [
+            ['FOLIO-1', '2020-03-01 09:05:00', 0.5],
+        ])
+
+    def test_importar_dos_veces_no_duplica(self):
+        self.assertEqual(carga_masiva.importar(self.directorio), {'cortes': (2, 2), 'pausas': (1, 1), 'conteos': (3, 3)})
+        self.assertEqual(carga_masiva.importar(self.directorio), {'cortes': (2, 0), 'pausas': (1, 0), 'conteos': (3, 0)})
+        corte = Corte.objects.get(uuid=carga_masiva.clave_uuid('FOLIO-1'))
+        self.assertEqual((Corte.objects.count(), Pausa.objects.count(), Conteo.objects.count()), (2, 1, 3))
+        self.assertEqual(set(Conteo.objects.values_list('corte_id', flat=True)), {corte.id})
+        self.assertEqual(Pausa.objects.get().corte_id, corte.id)
+
+
+class AvisosCorteTest(TestCase):
+    """La base cambia en otro worker; a este proceso sólo le llega el aviso."""
+
+    def setUp(self):
+        self.addCleanup(views.filtro_conteo.desconfigurar)
+        self.addCleanup(views.detector_muerto.desconfigurar)
+        self.addCleanup(views.proyeccion_activa.desconfigurar)
+        views.filtro_conteo.desconfigurar()
+        self.corte = nuevo_corte()
+
+    def test_inicio_y_fin_de_otro_worker(self):
+        Corte.objects.filter(id=self.corte.id).update(inicio=datetime.now())
+        self.assertIsNone(views.filtro_conteo.procesar(0))
+
+        notificaciones.entregar({'t': 'corte', 'evento': 'iniciar'})
+        self.assertEqual(views.filtro_conteo.procesar(1000), self.corte.id)
+        self.assertEqual(views.detector_muerto.corte_id, self.corte.id)
+
+        # Con la forma en que lo publica diario.transicion
+        Corte.objects.filter(id=self.corte.id).update(fin=datetime.now())
+        notificaciones.entregar({'t': 'corte', 'corte': self.corte.id, 'evento': diario.FINALIZADO, 'version': 3})
+        self.assertIsNone(views.filtro_conteo.procesar(2000))
+        self.assertIsNone(views.detector_muerto.corte_id)
+
+    def test_al_reconectar_se_lee_la_base(self):
+        Corte.objects.filter(id=self.corte.id).update(inicio=datetime.now())
+        notificaciones.entregar({'t': notificaciones.RECONECTADO})
+        self.assertEqual(views.filtro_conteo.procesar(0), self.corte.id)
+
+        Corte.objects.filter(id=self.corte.id).update(fin=datetime.now())
+        notificaciones.entregar({'t': notificaciones.RECONECTADO})
+        self.assertIsNone(views.filtro_conteo.procesar(1000))
@@ -0,0 +1,164 @@
+# apps/core/tiempo_muerto.py
+# Detector de tiempo muerto: huecos del sensor (no llegó conteo en FACTOR *
+# tiempo_entre_canales) unidos con las pausas registradas. Los intervalos se
+# guardan en IntervaloMuerto y se mantienen incrementalmente, así el monitor
+# en vivo y los reportes leen la misma tabla sin recalcular.
+import threading
+
+import numpy as np
+from django.db import transaction
+
+from .kpi import a_segundos, a_fecha, arreglo_pausas, tiempo_activo
+
+
+def unir(intervalos):
+    """
+    Unión de intervalos (inicio, fin, tipo). Los que se traslapan se funden;
+    si mezclan una pausa con un hueco del sensor el resultado es 'mixto'.
+    """
+    resultado = []
+    for inicio, fin, tipo in sorted(intervalos):
+        if resultado and inicio <= resultado[-1][1]:
+            anterior = resultado[-1]
+            resultado[-1] = (anterior[0], max(anterior[1], fin), anterior[2] if anterior[2] == tipo else 'mixto')
+        else:
+            resultado.append((inicio, fin, tipo))
+    return resultado
+
+
+def huecos(horas, previo, tiempo_entre_canales, factor, pausas=()):
+    """
+    Huecos entre conteos consecutivos (vectorizado). `previo` es el conteo
+    anterior a `horas` (o el inicio del corte). La distancia se mide en tiempo
+    activo: una pausa registrada entre dos conteos no cuenta como hueco, sólo
+    lo que el sensor estuvo parado fuera de ella. El hueco va desde que se
+    esperaba el siguiente pulso (media canal) hasta que llegó.
+    """
+    if not horas or not tiempo_entre_canales:
+        return []
+    umbral = factor * tiempo_entre_canales
+    t = a_segundos([previo] + list(horas))
+    inicios, duraciones = arreglo_pausas(list(pausas), np.inf)
+    indices = np.nonzero(np.diff(tiempo_activo(t, 0, inicios, duraciones)) > umbral)[0]
+    esperado = tiempo_entre_canales / 2
+    return [(a_fecha(t[i] + esperado), horas[i], 'hueco') for i in indices]
+
+
+def registrar(corte_id, nuevos):
+    """
+    Une `nuevos` con los intervalos guardados que pueden traslaparse (los que
+    terminan después del primero nuevo) y reescribe sólo esos.
+    """
+    from .models import IntervaloMuerto
+    if not nuevos:
+        return
+    desde = min(n[0] for n in nuevos)
+    with transaction.atomic():
+        previos = list(IntervaloMuerto.objects.filter(corte_id=corte_id, fin__gte=desde))
+        unidos = unir([(p.inicio, p.fin, p.tipo) for p in previos] + list(nuevos))
+        IntervaloMuerto.objects.filter(id__in=[p.id for p in previos]).delete()
+        IntervaloMuerto.objects.bulk_create([
+            IntervaloMuerto(corte_id=corte_id, inicio=inicio, fin=fin, tipo=tipo, duracion=(fin - inicio).total_seconds())
+            for inicio, fin, tipo in unidos
+        ])
+
+
+def pausas_corte(corte):
+    """Pausas del corte como tuplas (inicio_pausa, fin_pausa)."""
+    from .models import Pausa
+    return list(Pausa.objects.filter(corte=corte).order_by('id').values_list('inicio_pausa', 'fin_pausa'))
+
+
+def intervalos_pausas(pausas, hasta=None):
+    """Pausas cerradas como intervalos; las abiertas se cierran en `hasta`."""
+    intervalos = []
+    for inicio, fin in pausas:
+        fin = fin or hasta
+        if fin and fin > inicio:
+            intervalos.append((inicio, fin, 'pausa'))
+    return intervalos
+
+
+def reconstruir(corte, factor):
+    """Recalcula en lote todos los intervalos de un corte (cortes viejos o después de un cambio de factor)."""
+    from .models import Conteo, IntervaloMuerto
+    if not corte.inicio:
+        return []
+    pausas = pausas_corte(corte)
+    horas = list(Conteo.objects.filter(corte=corte).order_by('id').values_list('hora', flat=True))
+    intervalos = huecos(horas, corte.inicio, corte.tiempo_entre_canales, factor, pausas)
+    if corte.fin:
+        intervalos += huecos([corte.fin], horas[-1] if horas else corte.inicio, corte.tiempo_entre_canales, factor, pausas)
+    unidos = unir(intervalos + intervalos_pausas(pausas, hasta=corte.fin))
+    with transaction.atomic():
+        IntervaloMuerto.objects.filter(corte=corte).delete()
+        registrar(corte.id, unidos)
+    return unidos
+
+
+class DetectorTiempoMuerto:
+    """
+    Mantiene los intervalos del corte activo:
+    - conteo(): desde el hilo de ingesta, sin consultas salvo cuando cierra un hueco
+    - transicion(): sigue pausas, reanudaciones y fin del corte (sin escribir)
+    """
+
+    def __init__(self, factor=3.0):
+        self.factor = factor
+        self._lock = threading.RLock()
+        self.corte_id = None
+        self.tiempo_entre_canales = None
+        self._pausas = []
+        self._ultimo_id = 0
+        self._ultima_hora = None
+
+    def configurar(self, corte):
+        """Toma el corte activo; la frontera es el último conteo ya guardado."""
+        from .models import Conteo
+        with self._lock:
+            self.corte_id = corte.id
+            self.tiempo_entre_canales = corte.tiempo_entre_canales
+            self._pausas = pausas_corte(corte)
+            ultimo = Conteo.objects.filter(corte=corte).order_by('id').values_list('id', 'hora').last()
+            self._ultimo_id, self._ultima_hora = ultimo or (0, corte.inicio)
+
+    def desconfigurar(self):
+        with self._lock:
+            self.corte_id = None
+            self._pausas = []
+
+    def conteo(self, conteo):
+        with self._lock:
+            if conteo.corte_id != self.corte_id or conteo.id <= self._ultimo_id:
+                return
+            registrar(self.corte_id, huecos([conteo.hora], self._ultima_hora, self.tiempo_entre_canales, self.factor, self._pausas))
+            self._ultimo_id, self._ultima_hora = conteo.id, conteo.hora
+
+    def transicion(self, evento, corte):
+        """
+        Sigue las transiciones del corte en memoria, sin escribir: llega en
+        cada proceso (views.py, por notificaciones); lo que se guarda lo hace
+        registrar_transicion() en el proceso que hizo la transición.
+        """
+        with self._lock:
+            if evento == 'iniciar':
+                self.configurar(corte)
+            elif corte.id != self.corte_id:
+                return
+            elif evento in ('pausar', 'reanudar'):
+                self._pausas = pausas_corte(corte)
+            elif evento == 'finalizar':
+                self.desconfigurar()
+
+
+def registrar_transicion(evento, corte, factor):
+    """
+    Intervalos que deja una transición: la pausa que se cierra al reanudar y,
+    al finalizar, el corte completo recalculado (hueco final y pausas que
+    quedaron abiertas incluidos), así no depende de qué proceso llevaba el
+    detector.
+    """
+    if evento == 'reanudar':
+        registrar(corte.id, intervalos_pausas(pausas_corte(corte)[-1:]))
+    elif evento == 'finalizar':
+        reconstruir(corte, factor)
@@ -0,0 +1,237 @@
+# apps/core/trabajos.py
+# Cola de trabajos de reporte en segundo plano. Los reportes de rangos largos
+# corren en un pool de hilos acotado en lugar de ocupar la petición; el
+# cliente consulta el avance y descarga el resultado, que queda en disco
+# hasta que vence su TTL. El mismo reporte pedido mientras otro igual está
+# en la cola o corriendo reutiliza ese trabajo; uno ya terminado no se
+# reutiliza (report2/report3 y los rangos que incluyen hoy cambian con el
+# tiempo), cada envío nuevo tiene su propio id.
+# Con varios workers el trabajo corre en el que lo recibió, pero su estado, la
+# reutilización y la cancelación pasan por archivos en el directorio común:
+# - <id>.estado.json: se escribe al encolar, cada GUARDAR_AVANCE segundos de
+#   avance y al terminar; cualquier worker lo lee
+# - <clave>.clave: id del último trabajo de ese reporte (bajo un flock)
+# - <id>.cancelar: marca que avanzar() revisa entre lotes
+import fcntl
+import hashlib
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+from django.conf import settings
+from django.db import connections
+
+from .renderers import a_json
+
+PENDIENTE, CORRIENDO, TERMINADO, CANCELADO, ERROR = 'pendiente', 'corriendo', 'terminado', 'cancelado', 'error'
+FINALES = (TERMINADO, CANCELADO, ERROR)
+GUARDAR_AVANCE = 1.0
+# Un trabajo vivo en disco que pasó su tiempo máximo por más de esto murió con su worker
+MARGEN_PERDIDO = 60
+
+
+class Cancelado(Exception):
+    pass
+
+
+class ColaLlena(Exception):
+    pass
+
+
+class Trabajo:
+
+    def __init__(self, cola, id, clave, tipo, parametros, tiempo_maximo, max_cortes):
+        self.cola = cola
+        self.id = id
+        self.clave = clave
+        self.tipo = tipo
+        self.parametros = parametros
+        self.estado = PENDIENTE
+        self.avance = 0.0
+        self.mensaje = None
+        self.creado = time.time()
+        self.terminado = None
+        self.limite = self.creado + tiempo_maximo
+        self.max_cortes = max_cortes
+        self.cancelar = threading.Event()
+        self.futuro = None
+        self._guardado = time.monotonic()
+
+    def limitar(self, cortes):
+        if cortes > self.max_cortes:
+            raise ValueError(f'Demasiados cortes ({cortes}, máximo {self.max_cortes})')
+
+    def avanzar(self, fraccion):
+        """Lo llama el generador entre lotes: reporta avance y corta si se canceló (aquí u otro worker) o se pasó de tiempo."""
+        self.avance = round(min(fraccion, 1.0), 3)
+        if self.cancelar.is_set() or os.path.exists(self.cola.ruta(self.id, 'cancelar')):
+            raise Cancelado('Cancelado')
+        if time.time() > self.limite:
+            raise Cancelado('Tiempo agotado')
+        if time.monotonic() - self._guardado >= GUARDAR_AVANCE:
+            self.cola.guardar(self)
+            self._guardado = time.monotonic()
+
+    def a_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'parametros': self.parametros,
+            'estado': self.estado,
+            'avance': self.avance,
+            'mensaje': self.mensaje,
+            'creado': self.creado,
+            'terminado': self.terminado,
+        }
+
+
+class ColaTrabajos:
+    """
+    Los trabajos de este worker están en memoria; su estado (<id>.estado.json)
+    y al terminar el resultado (<id>.json) se escriben en `directorio`, así
+    los demás workers los ven y sobreviven a un reinicio.
+    """
+
+    def __init__(self, directorio, hilos=2, pendientes=10, ttl=86400, tiempo_maximo=600, max_cortes=20000):
+        self.directorio = directorio
+        self.hilos = hilos
+        self.pendientes = pendientes
+        self.ttl = ttl
+        self.tiempo_maximo = tiempo_maximo
+        self.max_cortes = max_cortes
+        self._lock = threading.Lock()
+        self._trabajos = {}
+        self._pool = None
+
+    def ruta(self, id, sufijo='json'):
+        return os.path.join(self.directorio, f'{id}.{sufijo}')
+
+    def _leer_estado(self, id):
+        try:
+            with open(self.ruta(id, 'estado.json'), 'rb') as f:
+                estado = orjson.loads(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+        if estado['terminado'] and time.time() - estado['terminado'] > self.ttl:
+            return None
+        if estado['estado'] not in FINALES and time.time() > estado['creado'] + self.tiempo_maximo + MARGEN_PERDIDO:
+            estado.update(estado=ERROR, mensaje='El worker que lo corría terminó', terminado=estado['creado'] + self.tiempo_maximo)
+        return estado
+
+    def _escribir(self, id, sufijo, contenido):
+        # Escribe y renombra: una descarga nunca ve un archivo a medias
+        temporal = self.ruta(id, f'{sufijo}.tmp')
+        with open(temporal, 'wb') as f:
+            f.write(contenido)
+        os.replace(temporal, self.ruta(id, sufijo))
+
+    def guardar(self, trabajo):
+        self._escribir(trabajo.id, 'estado.json', a_json(trabajo.a_dict()))
+
+    def _vivo(self, clave):
+        """Estado del último trabajo de `clave` si sigue pendiente o corriendo (en cualquier worker)."""
+        try:
+            with open(self.ruta(clave, 'clave')) as f:
+                estado = self.estado(f.read().strip())
+        except FileNotFoundError:
+            return None
+        return estado if estado and estado['estado'] in (PENDIENTE, CORRIENDO) else None
+
+    def enviar(self, tipo, parametros, generar):
+        """
+        Encola generar(trabajo) y devuelve (estado, nuevo). Si el mismo reporte
+        ya está pendiente o corriendo (en este u otro worker) se devuelve ese.
+        """
+        clave = hashlib.sha1(a_json({'tipo': tipo, 'parametros': parametros})).hexdigest()
+        self.purgar()
+        os.makedirs(self.directorio, exist_ok=True)
+        with self._lock, open(self.ruta('cola', 'lock'), 'a') as candado:
+            fcntl.flock(candado, fcntl.LOCK_EX)
+            vivo = self._vivo(clave)
+            if vivo:
+                return vivo, False
+            if sum(t.estado in (PENDIENTE, CORRIENDO) for t in self._trabajos.values()) >= self.pendientes:
+                raise ColaLlena('Cola de reportes llena')
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix='reporte')
+            id = uuid.uuid4().hex[:20]
+            trabajo = self._trabajos[id] = Trabajo(self, id, clave, tipo, parametros, self.tiempo_maximo, self.max_cortes)
+            self.guardar(trabajo)
+            self._escribir(clave, 'clave', id.encode())
+            trabajo.futuro = self._pool.submit(self._ejecutar, trabajo, generar)
+            return trabajo.a_dict(), True
+
+    def _ejecutar(self, trabajo, generar):
+        trabajo.estado = CORRIENDO
+        try:
+            trabajo.avanzar(0.0)
+            resultado = generar(trabajo)
+            self._escribir(trabajo.id, 'json', a_json(resultado))
+            trabajo.avance, trabajo.estado = 1.0, TERMINADO
+        except Cancelado as e:
+            trabajo.estado, trabajo.mensaje = CANCELADO, str(e)
+        except Exception as e:
+            trabajo.estado, trabajo.mensaje = ERROR, str(e)
+        finally:
+            trabajo.terminado = time.time()
+            self.guardar(trabajo)
+            # El hilo del pool no pasa por request_finished
+            connections.close_all()
+
+    def estado(self, id):
+        trabajo = self._trabajos.get(id)
+        return trabajo.a_dict() if trabajo else self._leer_estado(id)
+
+    def cancelar(self, id):
+        """
+        Cancela un trabajo vivo de cualquier worker: si no ha empezado no
+        corre, si corre se detiene en el siguiente lote.
+        """
+        estado = self.estado(id)
+        if not estado or estado['estado'] in FINALES:
+            return False
+        self._escribir(id, 'cancelar', b'')
+        trabajo = self._trabajos.get(id)
+        if trabajo:
+            trabajo.cancelar.set()
+            if trabajo.futuro.cancel():
+                trabajo.estado, trabajo.mensaje, trabajo.terminado = CANCELADO, 'Cancelado', time.time()
+                self.guardar(trabajo)
+        return True
+
+    def resultado(self, id):
+        """Ruta del resultado si el trabajo terminó y no ha vencido."""
+        estado = self.estado(id)
+        if estado and estado['estado'] == TERMINADO and os.path.exists(self.ruta(id)):
+            return self.ruta(id)
+        return None
+
+    def purgar(self):
+        """Quita de memoria y de disco los trabajos terminados hace más de TTL."""
+        vencido = time.time() - self.ttl
+        with self._lock:
+            for id, trabajo in list(self._trabajos.items()):
+                if trabajo.terminado and trabajo.terminado < vencido:
+                    del self._trabajos[id]
+        if not os.path.isdir(self.directorio):
+            return
+        for nombre in os.listdir(self.directorio):
+            ruta = os.path.join(self.directorio, nombre)
+            try:
+                if os.path.getmtime(ruta) < vencido:
+                    os.remove(ruta)
+            except FileNotFoundError:
+                pass
+
+
+cola_reportes = ColaTrabajos(
+    settings.TRABAJOS_DIR,
+    hilos=settings.TRABAJOS_HILOS,
+    pendientes=settings.TRABAJOS_PENDIENTES,
+    ttl=settings.TRABAJOS_TTL,
+    tiempo_maximo=settings.TRABAJOS_TIEMPO_MAXIMO,
+    max_cortes=settings.TRABAJOS_MAX_CORTES,
+)
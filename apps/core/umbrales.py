@@ -0,0 +1,120 @@
+# apps/core/umbrales.py
+# Historial de umbrales (VersionConfiguracion). Configuracion guarda los
+# vigentes para la pantalla de configuración; cada cambio agrega una versión
+# con su fecha y un corte se clasifica siempre con la versión vigente a su
+# inicio, así editar los umbrales no cambia el color de los cortes pasados.
+# Las versiones sólo se agregan: el índice en memoria se recarga cuando
+# aparece un id nuevo. Con avisos entre procesos (notificaciones.py) una
+# versión nueva invalida el índice y no hace falta preguntar por el id.
+import threading
+from bisect import bisect_right
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Max
+
+from . import notificaciones
+from .models import TIPOS, VersionConfiguracion
+
+# Orden que esperan reportes.colores: grasa, hueso, piezas vendibles
+ORDEN_TIPOS = tuple(t for t, _ in TIPOS)
+
+
+class HistorialUmbrales:
+    """Por tipo, las fechas de vigencia ordenadas y sus versiones; búsqueda con bisect."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ultimo_id = None
+        self.generacion = 0
+        self._fechas = {}
+        self._versiones = {}
+
+    def cargar(self, versiones, generacion=None):
+        """
+        versiones ordenadas por (tipo, vigente_desde, id). Si se invalidó
+        después de leer `generacion`, el id no se guarda y se vuelve a revisar.
+        """
+        fechas, por_tipo = {}, {}
+        for version in versiones:
+            fechas.setdefault(version.tipo, []).append(version.vigente_desde)
+            por_tipo.setdefault(version.tipo, []).append(version)
+        with self._lock:
+            self._fechas, self._versiones = fechas, por_tipo
+            vigente = generacion is None or generacion == self.generacion
+            self.ultimo_id = max((v.id for v in versiones), default=None) if vigente else None
+
+    def invalidar(self):
+        with self._lock:
+            self.ultimo_id = None
+            self.generacion += 1
+
+    def vigente(self, tipo, fecha=None):
+        """
+        Versión del tipo vigente en `fecha` (la última si no hay fecha, p. ej.
+        un corte sin iniciar). Antes de la primera versión rige la primera.
+        """
+        with self._lock:
+            versiones = self._versiones.get(tipo)
+            if not versiones:
+                return None
+            if fecha is None:
+                return versiones[-1]
+            return versiones[max(bisect_right(self._fechas[tipo], fecha) - 1, 0)]
+
+    def configuraciones(self, fecha=None):
+        """[grasa, hueso, piezas] vigentes en `fecha`; vacía si falta algún tipo."""
+        vigentes = [self.vigente(tipo, fecha) for tipo in ORDEN_TIPOS]
+        return vigentes if all(vigentes) else []
+
+
+historial = HistorialUmbrales()
+
+
+@notificaciones.suscriptor
+def _al_cambiar_configuracion(evento):
+    if evento['t'] in ('configuracion', notificaciones.RECONECTADO):
+        historial.invalidar()
+
+
+def _al_dia():
+    return historial.ultimo_id is not None and notificaciones.conectado()
+
+
+def _versiones():
+    return VersionConfiguracion.objects.order_by('tipo', 'vigente_desde', 'id')
+
+
+def configuraciones_vigentes(fecha=None):
+    """
+    Umbrales para clasificar un corte que inició en `fecha` (sin avisos entre
+    procesos, una consulta barata para ver si hay versiones nuevas).
+    """
+    if not _al_dia():
+        generacion = historial.generacion
+        if VersionConfiguracion.objects.aggregate(ultimo=Max('id'))['ultimo'] != historial.ultimo_id:
+            historial.cargar(list(_versiones()), generacion)
+    return historial.configuraciones(fecha)
+
+
+async def aconfiguraciones_vigentes(fecha=None):
+    if not _al_dia():
+        generacion = historial.generacion
+        if (await VersionConfiguracion.objects.aaggregate(ultimo=Max('id')))['ultimo'] != historial.ultimo_id:
+            historial.cargar([v async for v in _versiones()], generacion)
+    return historial.configuraciones(fecha)
+
+
+def registrar_version(configuracion, vigente_desde=None):
+    """Guarda los umbrales actuales de `configuracion` y agrega su versión."""
+    with transaction.atomic():
+        configuracion.save()
+        VersionConfiguracion.objects.create(
+            tipo=configuracion.tipo,
+            verde=configuracion.verde,
+            amarillo=configuracion.amarillo,
+            rojo=configuracion.rojo,
+            vigente_desde=vigente_desde or datetime.now(),
+        )
+        notificaciones.publicar('configuracion', umbral=configuracion.tipo)
+    historial.invalidar()
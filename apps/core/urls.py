@@ -1,5 +1,7 @@
 from django.urls import path
-from .views import LedOnYellow, LedOnGreen, LedOnRed, SirenOn, SirenOff, CortesView, StatusCorte, PausaView, FinView, InicioView, MonitorView, LastFiveCortesView, CortesReportView, ReporteTopMayorView, ReporteTopMenorView, ConfiguracionView, Conteos40View
+from django.views.decorators.csrf import csrf_exempt
+from .views import LedOnYellow, LedOnGreen, LedOnRed, SirenOn, SirenOff, CortesView, PausaView, FinView, InicioView, ConfiguracionView, Conteos40View, WatchdogView, SensorView
+from .views_async import StatusCorte, MonitorView, LastFiveCortesView, CortesReportView, ReporteTopMayorView, ReporteTopMenorView, KpiView, HeatmapView, ComparacionView, PercentilesView, ColoresView, DiarioView, TableroView, EventosView, TrabajosView, TrabajoView, TrabajoResultadoView, TrabajoEventosView
 
 app_name = 'apps.core'
 
@@ -14,11 +16,25 @@ urlpatterns = [
     path('cortes/pausa/', PausaView.as_view(), name='pausa_create'),
     path('cortes/fin/', FinView.as_view(), name='fin_create'),
     path('cortes/inicio/', InicioView.as_view(), name='inicio_create'),
-    path('cortes/monitor/', MonitorView.as_view(), name='monitor'),
+    path('cortes/monitor/', csrf_exempt(MonitorView.as_view()), name='monitor'),
+    path('cortes/tablero/', TableroView.as_view(), name='tablero'),
     path('cortes/last5/', LastFiveCortesView.as_view(), name='last_five'),
     path('cortes/report1/', CortesReportView.as_view(), name='report1'),
     path('cortes/report2/', ReporteTopMayorView.as_view(), name='report2'),
     path('cortes/report3/', ReporteTopMenorView.as_view(), name='report3'),
     path('cortes/config/', ConfiguracionView.as_view(), name='configuracion'),
     path('cortes/conteos40/', Conteos40View.as_view(), name='conteos40'),
+    path('cortes/watchdog/', WatchdogView.as_view(), name='watchdog'),
+    path('cortes/sensor/', SensorView.as_view(), name='sensor'),
+    path('cortes/kpi/', KpiView.as_view(), name='kpi'),
+    path('cortes/heatmap/', HeatmapView.as_view(), name='heatmap'),
+    path('cortes/comparar/', ComparacionView.as_view(), name='comparar'),
+    path('cortes/percentiles/', PercentilesView.as_view(), name='percentiles'),
+    path('cortes/colores/', ColoresView.as_view(), name='colores'),
+    path('cortes/eventos/', EventosView.as_view(), name='eventos'),
+    path('cortes/diario/', DiarioView.as_view(), name='diario'),
+    path('cortes/trabajos/', csrf_exempt(TrabajosView.as_view()), name='trabajos'),
+    path('cortes/trabajos/<str:trabajo_id>/', csrf_exempt(TrabajoView.as_view()), name='trabajo'),
+    path('cortes/trabajos/<str:trabajo_id>/resultado/', TrabajoResultadoView.as_view(), name='trabajo_resultado'),
+    path('cortes/trabajos/<str:trabajo_id>/eventos/', TrabajoEventosView.as_view(), name='trabajo_eventos'),
 ]
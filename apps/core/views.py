@@ -9,6 +9,17 @@ from .models import Corte, Pausa, Conteo, Configuracion
 from datetime import datetime
 from datetime import timedelta
 from .hardware import HardwareJornada
+from .watchdog import WatchdogCorte
+from .sensor import FiltroConteo, IngestaConteos
+from .tiempo_muerto import DetectorTiempoMuerto, pausas_corte, registrar_transicion
+from .proyeccion import proyeccion_activa
+from .analitica import resumir_horas_corte, registrar_corte_dia
+from .reportes import asignar_colores, CAMPOS_COLOR
+from .umbrales import configuraciones_vigentes, registrar_version
+from . import diario
+from . import metricas
+from . import notificaciones
+from django.http import HttpResponse
 from django.utils import timezone
 
 import time
@@ -73,6 +84,16 @@ def actualizar_luces_estado():
             _ultimo_estado_luces = estado_actual
 
 # --- Helpers para transiciones de estado (unifican virtual/físico) ---
+def ejecutar_transicion(corte, tipo, accion, mensaje):
+    # La validación contra el estado y la escritura son atómicas (diario.transicion)
+    try:
+        diario.transicion(corte, tipo)
+    except diario.TransicionInvalida as e:
+        return False, str(e)
+    actualizar_luces_estado()
+    notificar_transicion(accion, corte)
+    return True, mensaje
+
 def accion_inicio_o_reanudar():
     """
     - Si no hay inicio: inicia jornada (sólo debería ocurrir desde pantalla)
@@ -83,44 +104,20 @@ def accion_inicio_o_reanudar():
         return False, 'No hay cortes'
     if not corte.inicio:
         # Inicio nuevo (sólo debería venir de botón virtual)
-        corte.inicio = datetime.now()
-        corte.save()
-        actualizar_luces_estado()
-        return True, 'Corte Iniciado'
-    else:
-        # Reanudar si hay pausa abierta
-        pausa = Pausa.objects.filter(corte=corte, fin_pausa__isnull=True).last()
-        if pausa:
-            pausa.fin_pausa = datetime.now()
-            pausa.save()
-            actualizar_luces_estado()
-            return True, 'Pausa finalizada'
-        return False, 'Nada que reanudar'
+        return ejecutar_transicion(corte, diario.INICIADO, 'iniciar', 'Corte Iniciado')
+    return ejecutar_transicion(corte, diario.REANUDADO, 'reanudar', 'Pausa finalizada')
 
 def accion_pausar():
     corte = Corte.objects.last()
     if not corte:
         return False, 'No hay cortes'
-    if corte.inicio and not corte.fin:
-        # Crea pausa nueva sólo si no hay una ya abierta
-        pausa_abierta = Pausa.objects.filter(corte=corte, fin_pausa__isnull=True).exists()
-        if not pausa_abierta:
-            Pausa.objects.create(corte=corte)
-            actualizar_luces_estado()
-            return True, 'Pausa Iniciada'
-        return False, 'Ya existe una pausa abierta'
-    return False, 'Corte no iniciado'
+    return ejecutar_transicion(corte, diario.PAUSADO, 'pausar', 'Pausa Iniciada')
 
 def accion_finalizar():
     corte = Corte.objects.last()
     if not corte:
         return False, 'No hay cortes'
-    if corte.inicio and not corte.fin:
-        corte.fin = datetime.now()
-        corte.save()
-        actualizar_luces_estado()
-        return True, 'Corte finalizado'
-    return False, 'Corte no finalizado'
+    return ejecutar_transicion(corte, diario.FINALIZADO, 'finalizar', 'Corte finalizado')
 
 
 # --- Conectar callbacks físicos si hay hardware ---
@@ -140,19 +137,220 @@ def conectar_callbacks_hardware():
 conectar_callbacks_hardware()
 
 
+# --- Watchdog de sensor y cierre de jornada ---
+def inicializar_watchdog():
+    if not getattr(settings, 'WATCHDOG_ACTIVO', False):
+        return None
+    return WatchdogCorte(
+        factor_paro=settings.WATCHDOG_FACTOR_PARO,
+        accion_paro=settings.WATCHDOG_ACCION_PARO,
+        accion_cierre=settings.WATCHDOG_ACCION_CIERRE,
+    )
+
+watchdog = inicializar_watchdog()
+
+def corte_activo():
+    """El corte que está corriendo según la base (el último, iniciado y sin fin), o None."""
+    corte = Corte.objects.last()
+    return corte if corte and corte.inicio and not corte.fin else None
+
+def sembrar_watchdog():
+    """Ajusta el watchdog al corte que está corriendo según la base (al arrancar y al reconectar)."""
+    corte = corte_activo()
+    if not corte:
+        if watchdog.corte_id is not None:
+            watchdog.finalizar()
+        return
+    pausas = Pausa.objects.filter(corte=corte)
+    pausado = pausas.filter(fin_pausa__isnull=True).exists()
+    if watchdog.corte_id == corte.id:
+        if pausado:
+            watchdog.pausar()
+        else:
+            watchdog.reanudar()
+        return
+    pausa_previa = sum((p.fin_pausa - p.inicio_pausa).total_seconds() for p in pausas if p.fin_pausa)
+    watchdog.iniciar(corte, pausado=pausado, inicio=corte.inicio, pausa_previa=pausa_previa)
+
+def conectar_callbacks_watchdog():
+    if not watchdog:
+        return
+    def _on_alarma(accion, motivo):
+        print(f'Watchdog: alarma de {motivo}')
+        if accion == 'sirena' and siren:
+            siren.off()  # la sirena suena en bajo (ver SirenOn/SirenOff)
+        elif accion == 'linea' and ledred:
+            if ledgreen:
+                ledgreen.off()
+            if ledyellow:
+                ledyellow.off()
+            ledred.on()
+    def _accion(motivo):
+        return watchdog.accion_paro if motivo == 'paro' else watchdog.accion_cierre
+    def _on_normal(motivo):
+        # Si la otra alarma sigue activa con la misma acción, la salida se queda encendida
+        accion = _accion(motivo)
+        if any(_accion(otra) == accion for otra in watchdog.alarmas):
+            return
+        if accion == 'sirena' and siren:
+            siren.on()
+        elif accion == 'linea' and ledred:
+            ledred.off()
+    watchdog.on_alarma = _on_alarma
+    watchdog.on_normal = _on_normal
+    watchdog.on_pausar = accion_pausar
+    watchdog.on_finalizar = accion_finalizar
+    watchdog.arrancar(sembrar=sembrar_watchdog)
+
+conectar_callbacks_watchdog()
+
+
+# --- Filtro del sensor de conteo e ingesta en segundo plano ---
+filtro_conteo = FiltroConteo(
+    factor_minimo=settings.SENSOR_FACTOR_MINIMO,
+    factor_sospechoso=settings.SENSOR_FACTOR_SOSPECHOSO,
+    rebote=settings.SENSOR_REBOTE,
+)
+detector_muerto = DetectorTiempoMuerto(factor=settings.TIEMPO_MUERTO_FACTOR)
+
+def conteo_guardado(conteo):
+    # Hilo de ingesta: cada componente se actualiza en O(1) con el conteo nuevo
+    detector_muerto.conteo(conteo)
+    proyeccion_activa.conteo(conteo.id, conteo.hora, conteo.cantidad)
+    diario.lote_conteos.agregar(conteo)
+    notificaciones.publicar('conteo', corte=conteo.corte_id, id=conteo.id, hora=conteo.hora, cantidad=conteo.cantidad)
+
+ingesta = IngestaConteos(al_guardar=conteo_guardado)
+
+def sembrar_filtro():
+    """
+    Ajusta el filtro, el detector de tiempo muerto y la proyección al corte
+    que está corriendo según la base (al arrancar y al reconectar). Lo que ya
+    seguía a ese corte no se reinicia.
+    """
+    corte = corte_activo()
+    if not corte:
+        filtro_conteo.desconfigurar()
+        detector_muerto.desconfigurar()
+        proyeccion_activa.desconfigurar()
+        return
+    if filtro_conteo.corte_id != corte.id:
+        filtro_conteo.configurar(corte)
+    if detector_muerto.corte_id != corte.id:
+        detector_muerto.configurar(corte)
+    else:
+        detector_muerto.transicion('reanudar', corte)  # sólo relee las pausas
+    if proyeccion_activa.corte_id != corte.id:
+        proyeccion_activa.configurar(corte)
+    diario.lote_conteos.ponerse_al_dia(corte)
+
+
+def guardar_colores(corte):
+    """Recalcula y guarda los colores del corte con los umbrales vigentes a su inicio."""
+    asignar_colores(corte, configuraciones_vigentes(corte.inicio))
+    Corte.objects.filter(id=corte.id).update(**{campo: getattr(corte, campo) for campo in CAMPOS_COLOR})
+
+
+def notificar_transicion(evento, corte):
+    """
+    Lo que se escribe una sola vez después de una transición, en el proceso
+    que la hizo. Los componentes en memoria de todos los procesos (este
+    incluido) la reciben por aplicar_transicion().
+    """
+    metricas.transiciones.inc(evento)
+    registrar_transicion(evento, corte, settings.TIEMPO_MUERTO_FACTOR)
+    if evento == 'finalizar':
+        guardar_colores(corte)
+        # Las horas ya cerradas del corte pasan a ResumenHora (el resto lo hace resumir_horas por cron)
+        resumir_horas_corte(corte, datetime.now())
+        registrar_corte_dia(corte)
+
+
+def aplicar_transicion(evento, corte):
+    """Lleva una transición, de este o de otro proceso, a los componentes que viven en memoria."""
+    if evento == 'iniciar':
+        filtro_conteo.configurar(corte)
+        proyeccion_activa.configurar(corte)
+    elif evento in ('pausar', 'reanudar') and proyeccion_activa.corte_id == corte.id:
+        proyeccion_activa.pausas(pausas_corte(corte))
+    elif evento == 'finalizar':
+        if filtro_conteo.corte_id == corte.id:
+            filtro_conteo.desconfigurar()
+        if proyeccion_activa.corte_id == corte.id:
+            proyeccion_activa.desconfigurar()
+    detector_muerto.transicion(evento, corte)
+    if watchdog:
+        if evento == 'iniciar':
+            watchdog.iniciar(corte)
+        elif watchdog.corte_id != corte.id:
+            return
+        elif evento == 'pausar':
+            watchdog.pausar()
+        elif evento == 'reanudar':
+            watchdog.reanudar()
+        elif evento == 'finalizar':
+            watchdog.finalizar()
+
+
+ACCIONES_DIARIO = {diario.INICIADO: 'iniciar', diario.PAUSADO: 'pausar', diario.REANUDADO: 'reanudar', diario.FINALIZADO: 'finalizar'}
+
+@notificaciones.suscriptor
+def _al_cambiar_corte(evento):
+    # Inicio, pausa, reanudación o fin desde cualquier worker, el agente o el admin
+    if evento['t'] == notificaciones.RECONECTADO:
+        sembrar_filtro()
+        if watchdog:
+            sembrar_watchdog()
+    elif evento['t'] == 'corte':
+        accion = ACCIONES_DIARIO.get(evento.get('evento'), evento.get('evento'))
+        if accion not in ACCIONES_DIARIO.values():
+            return
+        corte = Corte.objects.filter(id=evento['corte']).first() if 'corte' in evento else Corte.objects.last()
+        if corte:
+            aplicar_transicion(accion, corte)
+
+
 # --- Inicialización de sirena y botón físico ---
 if siren:
     siren.on()
 
 def input_pressed():
+    # O(1) y sin base de datos: el filtro descarta rebotes y dobles conteos,
+    # el Conteo lo guarda el hilo de ingesta
     if input_btn:
-        print('Input pressed')
-        if (corte := Corte.objects.last()) and corte.inicio and not corte.fin:
-            Conteo.objects.create(corte=corte, cantidad=0.5)
-        time.sleep(1)  # Evita doble conteo rápido
+        if (corte_id := filtro_conteo.procesar()) is not None:
+            ingesta.encolar(corte_id)
+            if watchdog:
+                watchdog.conteo()
 
 if input_btn:
     input_btn.when_pressed = input_pressed
+    ingesta.arrancar(sembrar=sembrar_filtro)
+
+# Avisos de los demás workers (notificaciones.py)
+notificaciones.arrancar()
+
+
+@metricas.registro.colector
+def metricas_sensor():
+    # Se leen los contadores del filtro y la cola sólo al exponer /metrics
+    stats = filtro_conteo.estadisticas()
+    familias = [
+        ('cortes_sensor_pulsos_total', 'counter', 'Pulsos del sensor por resultado del filtro', [
+            ({'resultado': 'recibido'}, stats['recibidos']),
+            ({'resultado': 'aceptado'}, stats['aceptados']),
+            ({'resultado': 'rechazado'}, stats['rechazados']),
+            ({'resultado': 'sospechoso'}, stats['sospechosos']),
+            ({'resultado': 'huerfano'}, stats['huerfanos']),
+        ]),
+        ('cortes_ingesta_cola', 'gauge', 'Conteos en cola esperando la base de datos', [({}, ingesta.pendientes())]),
+        ('cortes_ingesta_descartados_total', 'counter', 'Conteos descartados por cola llena', [({}, ingesta.descartados)]),
+    ]
+    if watchdog:
+        familias.append(('cortes_watchdog_alarma', 'gauge', 'Alarma activa del watchdog', [
+            ({'motivo': motivo}, 1 if motivo in watchdog.alarmas else 0) for motivo in ('paro', 'cierre')
+        ]))
+    return familias
 
 class LedOnYellow(APIView):
 
@@ -235,7 +433,7 @@ class CortesView(APIView):
 
     def post(self, request, format=None):
         data = request.data
-        Corte.objects.create(
+        corte = Corte(
             cantidad_canales=data['cantidad_canales'],
             horas_jornada=data['horas_jornada'],
             canales_hora=data['canales_hora'],
@@ -245,6 +443,10 @@ class CortesView(APIView):
             piezas_vendibles=data['piezas_vendibles'],
             tiempo_muerto=data['tiempo_muerto'],
         )
+        asignar_colores(corte, configuraciones_vigentes())
+        corte.save()
+        evento = diario.anotar(corte, diario.CREADO, datetime.now())
+        notificaciones.publicar('corte', corte=corte.id, evento=diario.CREADO, version=evento.secuencia)
 
         return Response({'message': 'Corte creado correctamente'}, status=status.HTTP_200_OK)
 
@@ -267,309 +469,33 @@ class CortesView(APIView):
             })
         return Response(list, status=status.HTTP_200_OK)
 
-class StatusCorte(APIView):
-
-    permission_classes = [AllowAny]
+def respuesta_accion(resultado):
+    ok, mensaje = resultado
+    return Response({'message': mensaje}, status=status.HTTP_200_OK if ok else status.HTTP_400_BAD_REQUEST)
 
-    def get(self, request):
-        corte = Corte.objects.last()
-        if corte:
-            pausa = Pausa.objects.filter(corte=corte).last()
-            if pausa:
-                pausa_actual = False if pausa.fin_pausa else True
-                response = {
-                    'status': False if corte.fin else True,
-                    'inicio': True if corte.inicio else False,
-                    'fecha_inicio': corte.inicio,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'hueso_carne': corte.hueso_carne,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'tiempo_muerto': corte.tiempo_muerto,
-                    'pausa': True if pausa_actual else False,
-                }
-                return Response(response, status=status.HTTP_200_OK)
-            else:
-                response = {
-                    'status': False if corte.fin else True,
-                    'inicio': True if corte.inicio else False,
-                    'fecha_inicio': corte.inicio,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'grasa_carne': corte.grasa_carne,
-                    'hueso_carne': corte.hueso_carne,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'tiempo_muerto': corte.tiempo_muerto,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'pausa': False,
-                }
-                return Response(response, status=status.HTTP_200_OK)
-        else:
-            return Response({'status': False}, status=status.HTTP_200_OK)
 
+# Botones virtuales: misma lógica que los físicos (accion_*)
 class InicioView(APIView):
 
     permission_classes = [AllowAny]
 
     def get(self, request):
-        corte = Corte.objects.last()
-        if corte:
-            if corte.inicio:
-                pausa = Pausa.objects.last()
-                if pausa:
-                    pausa.fin_pausa = datetime.now()
-                    pausa.save()
-
-                    # NUEVO: reflejar estado (debería quedar "running")
-                    actualizar_luces_estado()
-
-                return Response({'message': 'Pausa finalizada'}, status=status.HTTP_200_OK)
-            else:
-                corte.inicio = datetime.now()
-                corte.save()
-
-                # NUEVO: reflejar estado (debería quedar "running")
-                actualizar_luces_estado()
+        return respuesta_accion(accion_inicio_o_reanudar())
 
-                return Response({'message': 'Corte Iniciado'}, status=status.HTTP_200_OK)
-        else:
-            return Response({'message': 'No hay cortes'}, status=status.HTTP_400_BAD_REQUEST)
-                
 class PausaView(APIView):
 
     permission_classes = [AllowAny]
 
     def get(self, request):
-        corte = Corte.objects.last()
-        if corte:
-            if corte.inicio:
-                Pausa.objects.create(corte=corte)
-
-                # NUEVO: reflejar estado (debería quedar "paused")
-                actualizar_luces_estado()
+        return respuesta_accion(accion_pausar())
 
-                return Response({'message': 'Pausa Iniciada'}, status=status.HTTP_200_OK)
-            else:
-                return Response({'message': 'Corte no iniciado'}, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({'message': 'No hay cortes'}, status=status.HTTP_400_BAD_REQUEST)
-            
 class FinView(APIView):
 
     permission_classes = [AllowAny]
 
     def get(self, request):
-        corte = Corte.objects.last()
-        if corte:
-            if corte.inicio:
-                corte.fin = datetime.now()
-                corte.save()
+        return respuesta_accion(accion_finalizar())
 
-                # <<< NUEVO: reflejar estado en las 3 lámparas físicas >>>
-                actualizar_luces_estado()
-
-                return Response({'message':'Corte finalizado'}, status=status.HTTP_200_OK)
-            else:
-                return Response({'message':'Corte no finalizado'}, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({'message':'No hay cortes'}, status=status.HTTP_400_BAD_REQUEST)
-
-
-class MonitorView(APIView):
-
-    permission_classes = [AllowAny]
-
-    def get(self, request):
-        corte = Corte.objects.last()
-        if corte:
-            if corte.inicio and not corte.fin:
-                conteos = Conteo.objects.filter(corte=corte)
-                pausas = Pausa.objects.filter(corte=corte)
-                configuraciones = Configuracion.objects.all()
-
-                grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-                hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-                piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-                list = []
-                list2 = []
-                list3 = []
-                for conteo in conteos:
-                    list.append({
-                        'hora': conteo.hora,
-                        'cantidad': conteo.cantidad
-                    })
-                for pausa in pausas:
-                    list2.append({
-                        'inicio_pausa': pausa.inicio_pausa,
-                        'fin_pausa': pausa.fin_pausa,
-                        'duracion': pausa.fin_pausa - pausa.inicio_pausa
-                    })
-                for config in configuraciones:
-                    list3.append({
-                        'verde': config.verde,
-                        'amarillo': config.amarillo,
-                        'rojo': config.rojo
-                    })
-                corte_object = {
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'hueso_carne': corte.hueso_carne,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'tiempo_muerto': corte.tiempo_muerto,
-                    'inicio': corte.inicio,
-                    'conteos': list,
-                    'pausas': list2,
-                    'grasa_carne_config': list3[0] if configuraciones else None,
-                    'hueso_carne_config': list3[1] if configuraciones else None,
-                    'piezas_vendibles_config': list3[2] if configuraciones else None,
-                    'grasa_carne_color': grasa_carne_color,
-                    'hueso_carne_color': hueso_carne_color,
-                    'piezas_vendibles_color': piezas_vendibles_color,
-                }
-                return Response(corte_object, status=status.HTTP_200_OK)
-            else:
-                return Response({'message':'Corte no iniciado'}, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({'message':'No hay cortes'}, status=status.HTTP_400_BAD_REQUEST)
-
-    def post(self, request):
-        corte = Corte.objects.last()
-
-        if corte:
-            if corte.inicio and not corte.fin:
-                conteos = Conteo.objects.filter(corte=corte)
-                if conteos:
-                    count = 0
-                    for conteo in conteos:
-                        count += 1
-                    return Response({'conteo': count}, status=status.HTTP_200_OK)
-                else:
-                    return Response({'conteo': 0}, status=status.HTTP_200_OK)
-            else:
-                return Response({'message':'Corte no iniciado'}, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({'message':'No hay cortes'}, status=status.HTTP_400_BAD_REQUEST)
-
-class LastFiveCortesView(APIView):
-
-    permission_classes = [AllowAny]
-
-    def get(self, request):
-        cortes = Corte.objects.all().order_by('-id')[:5]
-        configuraciones = Configuracion.objects.all()
-        list = []
-        for corte in cortes:
-            conteos = Conteo.objects.filter(corte=corte)
-            pausa = Pausa.objects.filter(corte=corte)
-            canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-            conteo = 0
-            pausas = []
-
-            grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-            hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-            piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-            for c in conteos:
-                conteo += c.cantidad
-            for p in pausa:
-                pausas.append({
-                    'inicio_pausa': p.inicio_pausa,
-                    'fin_pausa': p.fin_pausa
-                })
-            tiempo_m = None
-            for ps in pausas:
-                if ps['fin_pausa']:
-                    if not tiempo_m:
-                        tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                    tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-            list.append({
-                'id': corte.id,
-                'cantidad_canales': corte.cantidad_canales,
-                'horas_jornada': corte.horas_jornada,
-                'canales_hora': corte.canales_hora,
-                'tiempo_entre_canales': corte.tiempo_entre_canales,
-                'grasa_carne': corte.grasa_carne,
-                'grasa_carne_color': grasa_carne_color,
-                'hueso_carne': corte.hueso_carne,
-                'hueso_carne_color': hueso_carne_color,
-                'piezas_vendibles': corte.piezas_vendibles,
-                'piezas_vendibles_color': piezas_vendibles_color,
-                'tiempo_muerto_max': corte.tiempo_muerto,
-                'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                'inicio': corte.inicio,
-                'fin': corte.fin,
-                'conteo': conteo,
-                'pausas': pausas,
-                'promedio_canales_hora': canales_hora,
-            })
-        return Response(list, status=status.HTTP_200_OK)
-
-class CortesReportView(APIView):
-
-    permission_classes = [AllowAny]
-
-    def get(self, request):
-        fecha_inicio = request.GET.get('fecha_inicio')
-        fecha_fin = request.GET.get('fecha_fin')
-        cortes = Corte.objects.filter(inicio__range=[datetime.strptime(fecha_inicio, '%Y-%m-%d'), datetime.strptime(fecha_fin, '%Y-%m-%d')])
-        configuraciones = Configuracion.objects.all()
-
-        list = []
-        for corte in cortes:
-            conteos = Conteo.objects.filter(corte=corte)
-            pausa = Pausa.objects.filter(corte=corte)
-            canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-            conteo = 0
-            pausas = []
-
-            for c in conteos:
-                conteo += c.cantidad
-            for p in pausa:
-                pausas.append({
-                    'inicio_pausa': p.inicio_pausa,
-                    'fin_pausa': p.fin_pausa
-                })
-            tiempo_m = None
-            for ps in pausas:
-                if ps['fin_pausa']:
-                    if not tiempo_m:
-                        tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                    tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-            grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-            hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-            piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-            list.append({
-                'id': corte.id,
-                'cantidad_canales': corte.cantidad_canales,
-                'horas_jornada': corte.horas_jornada,
-                'canales_hora': corte.canales_hora,
-                'tiempo_entre_canales': corte.tiempo_entre_canales,
-                'grasa_carne': corte.grasa_carne,
-                'grasa_carne_color': grasa_carne_color,
-                'hueso_carne': corte.hueso_carne,
-                'hueso_carne_color': hueso_carne_color,
-                'tiempo_muerto_max': corte.tiempo_muerto,
-                'piezas_vendibles': corte.piezas_vendibles,
-                'piezas_vendibles_color': piezas_vendibles_color,
-                'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                'inicio': corte.inicio,
-                'fin': corte.fin,
-                'conteo': conteo,
-                'pausas': pausas,
-                'promedio_canales_hora': canales_hora,
-            })
-        return Response(list, status=status.HTTP_200_OK)
 
 class ConfiguracionView(APIView):
     def get(self, request):
@@ -590,614 +516,41 @@ class ConfiguracionView(APIView):
         configuracion.verde = data['verde']
         configuracion.amarillo = data['amarillo']
         configuracion.rojo = data['rojo']
-        configuracion.save()
+        # Nueva versión: los cortes anteriores conservan sus umbrales
+        registrar_version(configuracion)
         return Response({'message': 'Configuracion actualizada'}, status=status.HTTP_200_OK)
 
-class ReporteTopMayorView(APIView):
+class WatchdogView(APIView):
 
     permission_classes = [AllowAny]
 
     def get(self, request):
-        rango_dias_atras = request.GET.get('rango')
-        tipo = request.GET.get('tipo')
-        configuraciones = Configuracion.objects.all()
-        cortes = Corte.objects.filter(inicio__range=[datetime.now() - timedelta(days=int(rango_dias_atras)), datetime.now()])
-        list = []
+        if watchdog:
+            return Response(watchdog.estado(), status=status.HTTP_200_OK)
+        return Response({'message': 'Watchdog desactivado'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if tipo == 'Canales Procesados':
-            for corte in cortes:
-                conteos = Conteo.objects.filter(corte=corte)
-                pausa = Pausa.objects.filter(corte=corte)
-                canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-                conteo = 0
-                pausas = []
-
-                for c in conteos:
-                    conteo += c.cantidad
-                for p in pausa:
-                    pausas.append({
-                        'inicio_pausa': p.inicio_pausa,
-                        'fin_pausa': p.fin_pausa
-                    })
-                tiempo_m = None
-                for ps in pausas:
-                    if ps['fin_pausa']:
-                        if not tiempo_m:
-                            tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                        tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-                grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-                hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-                piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-                list.append({
-                    'id': corte.id,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'grasa_carne_color': grasa_carne_color,
-                    'hueso_carne': corte.hueso_carne,
-                    'hueso_carne_color': hueso_carne_color,
-                    'tiempo_muerto_max': corte.tiempo_muerto,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'piezas_vendibles_color': piezas_vendibles_color,
-                    'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                    'inicio': corte.inicio,
-                    'fin': corte.fin,
-                    'conteo': conteo,
-                    'pausas': pausas,
-                    'promedio_canales_hora': canales_hora,
-                })
-                lista = sorted(list, key=lambda x: x['conteo'], reverse=True)
-            return Response(lista, status=status.HTTP_200_OK)
-
-        elif tipo == 'Tiempo Muerto':
-            for corte in cortes:
-                conteos = Conteo.objects.filter(corte=corte)
-                pausa = Pausa.objects.filter(corte=corte)
-                canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-                conteo = 0
-                pausas = []
-
-                for c in conteos:
-                    conteo += c.cantidad
-                for p in pausa:
-                    pausas.append({
-                        'inicio_pausa': p.inicio_pausa,
-                        'fin_pausa': p.fin_pausa
-                    })
-                tiempo_m = None
-                for ps in pausas:
-                    if ps['fin_pausa']:
-                        if not tiempo_m:
-                            tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                        tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-                grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-                hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-                piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-                list.append({
-                    'id': corte.id,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'grasa_carne_color': grasa_carne_color,
-                    'hueso_carne': corte.hueso_carne,
-                    'hueso_carne_color': hueso_carne_color,
-                    'tiempo_muerto_max': corte.tiempo_muerto,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'piezas_vendibles_color': piezas_vendibles_color,
-                    'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                    'inicio': corte.inicio,
-                    'fin': corte.fin,
-                    'conteo': conteo,
-                    'pausas': pausas,
-                    'promedio_canales_hora': canales_hora,
-                })
-                lista = sorted(list, key=lambda x: x['tiempo_muerto'], reverse=False)
-            return Response(lista, status=status.HTTP_200_OK)
-        elif tipo == 'Canales/Hora':
-            for corte in cortes:
-                conteos = Conteo.objects.filter(corte=corte)
-                pausa = Pausa.objects.filter(corte=corte)
-                canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-                conteo = 0
-                pausas = []
-
-                for c in conteos:
-                    conteo += c.cantidad
-                for p in pausa:
-                    pausas.append({
-                        'inicio_pausa': p.inicio_pausa,
-                        'fin_pausa': p.fin_pausa
-                    })
-                tiempo_m = None
-                for ps in pausas:
-                    if ps['fin_pausa']:
-                        if not tiempo_m:
-                            tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                        tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-                grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-                hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-                piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-                list.append({
-                    'id': corte.id,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'grasa_carne_color': grasa_carne_color,
-                    'hueso_carne': corte.hueso_carne,
-                    'hueso_carne_color': hueso_carne_color,
-                    'tiempo_muerto_max': corte.tiempo_muerto,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'piezas_vendibles_color': piezas_vendibles_color,
-                    'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                    'inicio': corte.inicio,
-                    'fin': corte.fin,
-                    'conteo': conteo,
-                    'pausas': pausas,
-                    'promedio_canales_hora': canales_hora,
-                })
-                lista = sorted(list, key=lambda x: x['canales_hora'], reverse=True)
-            return Response(lista, status=status.HTTP_200_OK)
-        elif tipo == 'Grasa Carne':
-            for corte in cortes:
-                conteos = Conteo.objects.filter(corte=corte)
-                pausa = Pausa.objects.filter(corte=corte)
-                canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-                conteo = 0
-                pausas = []
-
-                for c in conteos:
-                    conteo += c.cantidad
-                for p in pausa:
-                    pausas.append({
-                        'inicio_pausa': p.inicio_pausa,
-                        'fin_pausa': p.fin_pausa
-                    })
-                tiempo_m = None
-                for ps in pausas:
-                    if ps['fin_pausa']:
-                        if not tiempo_m:
-                            tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                        tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-                grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-                hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-                piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-                list.append({
-                    'id': corte.id,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'grasa_carne_color': grasa_carne_color,
-                    'hueso_carne': corte.hueso_carne,
-                    'hueso_carne_color': hueso_carne_color,
-                    'tiempo_muerto_max': corte.tiempo_muerto,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'piezas_vendibles_color': piezas_vendibles_color,
-                    'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                    'inicio': corte.inicio,
-                    'fin': corte.fin,
-                    'conteo': conteo,
-                    'pausas': pausas,
-                    'promedio_canales_hora': canales_hora,
-                })
-                lista = sorted(list, key=lambda x: x['grasa_carne'], reverse=False)
-            return Response(lista, status=status.HTTP_200_OK)
-        elif tipo == 'Hueso Carne':
-            for corte in cortes:
-                conteos = Conteo.objects.filter(corte=corte)
-                pausa = Pausa.objects.filter(corte=corte)
-                canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-                conteo = 0
-                pausas = []
-
-                for c in conteos:
-                    conteo += c.cantidad
-                for p in pausa:
-                    pausas.append({
-                        'inicio_pausa': p.inicio_pausa,
-                        'fin_pausa': p.fin_pausa
-                    })
-                tiempo_m = None
-                for ps in pausas:
-                    if ps['fin_pausa']:
-                        if not tiempo_m:
-                            tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                        tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-                grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-                hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-                piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-                list.append({
-                    'id': corte.id,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'grasa_carne_color': grasa_carne_color,
-                    'hueso_carne': corte.hueso_carne,
-                    'hueso_carne_color': hueso_carne_color,
-                    'tiempo_muerto_max': corte.tiempo_muerto,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'piezas_vendibles_color': piezas_vendibles_color,
-                    'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                    'inicio': corte.inicio,
-                    'fin': corte.fin,
-                    'conteo': conteo,
-                    'pausas': pausas,
-                    'promedio_canales_hora': canales_hora,
-                })
-                lista = sorted(list, key=lambda x: x['hueso_carne'], reverse=False)
-            return Response(lista, status=status.HTTP_200_OK)
-        elif tipo == 'Piezas Vendibles':
-            for corte in cortes:
-                conteos = Conteo.objects.filter(corte=corte)
-                pausa = Pausa.objects.filter(corte=corte)
-                canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-                conteo = 0
-                pausas = []
-
-                for c in conteos:
-                    conteo += c.cantidad
-                for p in pausa:
-                    pausas.append({
-                        'inicio_pausa': p.inicio_pausa,
-                        'fin_pausa': p.fin_pausa
-                    })
-                tiempo_m = None
-                for ps in pausas:
-                    if ps['fin_pausa']:
-                        if not tiempo_m:
-                            tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                        tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-                grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-                hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-                piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-                list.append({
-                    'id': corte.id,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'grasa_carne_color': grasa_carne_color,
-                    'hueso_carne': corte.hueso_carne,
-                    'hueso_carne_color': hueso_carne_color,
-                    'tiempo_muerto_max': corte.tiempo_muerto,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'piezas_vendibles_color': piezas_vendibles_color,
-                    'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                    'inicio': corte.inicio,
-                    'fin': corte.fin,
-                    'conteo': conteo,
-                    'pausas': pausas,
-                    'promedio_canales_hora': canales_hora,
-                })
-                lista = sorted(list, key=lambda x: x['piezas_vendibles'], reverse=True)
-            return Response(lista, status=status.HTTP_200_OK)
-        else:
-            return Response({'message':'Tipo no valido'}, status=status.HTTP_400_BAD_REQUEST)
 
-class ReporteTopMenorView(APIView):
+class SensorView(APIView):
 
     permission_classes = [AllowAny]
 
     def get(self, request):
-        rango_dias_atras = request.GET.get('rango')
-        tipo = request.GET.get('tipo')
-        configuraciones = Configuracion.objects.all()
-        cortes = Corte.objects.filter(inicio__range=[datetime.now() - timedelta(days=int(rango_dias_atras)), datetime.now()])
-        list = []
+        response = filtro_conteo.estadisticas()
+        response['cola_ingesta'] = ingesta.pendientes()
+        response['descartados_cola'] = ingesta.descartados
+        return Response(response, status=status.HTTP_200_OK)
 
-        if tipo == 'Canales Procesados':
-            for corte in cortes:
-                conteos = Conteo.objects.filter(corte=corte)
-                pausa = Pausa.objects.filter(corte=corte)
-                canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-                conteo = 0
-                pausas = []
-
-                for c in conteos:
-                    conteo += c.cantidad
-                for p in pausa:
-                    pausas.append({
-                        'inicio_pausa': p.inicio_pausa,
-                        'fin_pausa': p.fin_pausa
-                    })
-                tiempo_m = None
-                for ps in pausas:
-                    if ps['fin_pausa']:
-                        if not tiempo_m:
-                            tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                        tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-                grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-                hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-                piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-                list.append({
-                    'id': corte.id,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'grasa_carne_color': grasa_carne_color,
-                    'hueso_carne': corte.hueso_carne,
-                    'hueso_carne_color': hueso_carne_color,
-                    'tiempo_muerto_max': corte.tiempo_muerto,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'piezas_vendibles_color': piezas_vendibles_color,
-                    'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                    'inicio': corte.inicio,
-                    'fin': corte.fin,
-                    'conteo': conteo,
-                    'pausas': pausas,
-                    'promedio_canales_hora': canales_hora,
-                })
-                lista = sorted(list, key=lambda x: x['conteo'], reverse=False)
-            return Response(lista, status=status.HTTP_200_OK)
-
-        elif tipo == 'Tiempo Muerto':
-            for corte in cortes:
-                conteos = Conteo.objects.filter(corte=corte)
-                pausa = Pausa.objects.filter(corte=corte)
-                canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-                conteo = 0
-                pausas = []
-
-                for c in conteos:
-                    conteo += c.cantidad
-                for p in pausa:
-                    pausas.append({
-                        'inicio_pausa': p.inicio_pausa,
-                        'fin_pausa': p.fin_pausa
-                    })
-                tiempo_m = None
-                for ps in pausas:
-                    if ps['fin_pausa']:
-                        if not tiempo_m:
-                            tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                        tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-                grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-                hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-                piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-                list.append({
-                    'id': corte.id,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'grasa_carne_color': grasa_carne_color,
-                    'hueso_carne': corte.hueso_carne,
-                    'hueso_carne_color': hueso_carne_color,
-                    'tiempo_muerto_max': corte.tiempo_muerto,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'piezas_vendibles_color': piezas_vendibles_color,
-                    'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                    'inicio': corte.inicio,
-                    'fin': corte.fin,
-                    'conteo': conteo,
-                    'pausas': pausas,
-                    'promedio_canales_hora': canales_hora,
-                })
-                lista = sorted(list, key=lambda x: x['tiempo_muerto'], reverse=True)
-            return Response(lista, status=status.HTTP_200_OK)
-        elif tipo == 'Canales/Hora':
-            for corte in cortes:
-                conteos = Conteo.objects.filter(corte=corte)
-                pausa = Pausa.objects.filter(corte=corte)
-                canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-                conteo = 0
-                pausas = []
-
-                for c in conteos:
-                    conteo += c.cantidad
-                for p in pausa:
-                    pausas.append({
-                        'inicio_pausa': p.inicio_pausa,
-                        'fin_pausa': p.fin_pausa
-                    })
-                tiempo_m = None
-                for ps in pausas:
-                    if ps['fin_pausa']:
-                        if not tiempo_m:
-                            tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                        tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-                grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-                hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-                piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-                list.append({
-                    'id': corte.id,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'grasa_carne_color': grasa_carne_color,
-                    'hueso_carne': corte.hueso_carne,
-                    'hueso_carne_color': hueso_carne_color,
-                    'tiempo_muerto_max': corte.tiempo_muerto,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'piezas_vendibles_color': piezas_vendibles_color,
-                    'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                    'inicio': corte.inicio,
-                    'fin': corte.fin,
-                    'conteo': conteo,
-                    'pausas': pausas,
-                    'promedio_canales_hora': canales_hora,
-                })
-                lista = sorted(list, key=lambda x: x['canales_hora'], reverse=False)
-            return Response(lista, status=status.HTTP_200_OK)
-        elif tipo == 'Grasa Carne':
-            for corte in cortes:
-                conteos = Conteo.objects.filter(corte=corte)
-                pausa = Pausa.objects.filter(corte=corte)
-                canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-                conteo = 0
-                pausas = []
-
-                for c in conteos:
-                    conteo += c.cantidad
-                for p in pausa:
-                    pausas.append({
-                        'inicio_pausa': p.inicio_pausa,
-                        'fin_pausa': p.fin_pausa
-                    })
-                tiempo_m = None
-                for ps in pausas:
-                    if ps['fin_pausa']:
-                        if not tiempo_m:
-                            tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                        tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-                grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-                hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-                piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-                list.append({
-                    'id': corte.id,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'grasa_carne_color': grasa_carne_color,
-                    'hueso_carne': corte.hueso_carne,
-                    'hueso_carne_color': hueso_carne_color,
-                    'tiempo_muerto_max': corte.tiempo_muerto,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'piezas_vendibles_color': piezas_vendibles_color,
-                    'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                    'inicio': corte.inicio,
-                    'fin': corte.fin,
-                    'conteo': conteo,
-                    'pausas': pausas,
-                    'promedio_canales_hora': canales_hora,
-                })
-                lista = sorted(list, key=lambda x: x['grasa_carne'], reverse=True)
-            return Response(lista, status=status.HTTP_200_OK)
-        elif tipo == 'Hueso Carne':
-            for corte in cortes:
-                conteos = Conteo.objects.filter(corte=corte)
-                pausa = Pausa.objects.filter(corte=corte)
-                canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-                conteo = 0
-                pausas = []
-
-                for c in conteos:
-                    conteo += c.cantidad
-                for p in pausa:
-                    pausas.append({
-                        'inicio_pausa': p.inicio_pausa,
-                        'fin_pausa': p.fin_pausa
-                    })
-                tiempo_m = None
-                for ps in pausas:
-                    if ps['fin_pausa']:
-                        if not tiempo_m:
-                            tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                        tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-                grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-                hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-                piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-                list.append({
-                    'id': corte.id,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'grasa_carne_color': grasa_carne_color,
-                    'hueso_carne': corte.hueso_carne,
-                    'hueso_carne_color': hueso_carne_color,
-                    'tiempo_muerto_max': corte.tiempo_muerto,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'piezas_vendibles_color': piezas_vendibles_color,
-                    'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                    'inicio': corte.inicio,
-                    'fin': corte.fin,
-                    'conteo': conteo,
-                    'pausas': pausas,
-                    'promedio_canales_hora': canales_hora,
-                })
-                lista = sorted(list, key=lambda x: x['hueso_carne'], reverse=True)
-            return Response(lista, status=status.HTTP_200_OK)
-        elif tipo == 'Piezas Vendibles':
-            for corte in cortes:
-                conteos = Conteo.objects.filter(corte=corte)
-                pausa = Pausa.objects.filter(corte=corte)
-                canales_hora = (Pausa.objects.filter(corte=corte).count()/2) / corte.horas_jornada
-                conteo = 0
-                pausas = []
-
-                for c in conteos:
-                    conteo += c.cantidad
-                for p in pausa:
-                    pausas.append({
-                        'inicio_pausa': p.inicio_pausa,
-                        'fin_pausa': p.fin_pausa
-                    })
-                tiempo_m = None
-                for ps in pausas:
-                    if ps['fin_pausa']:
-                        if not tiempo_m:
-                            tiempo_m = ps['fin_pausa'] - ps['inicio_pausa']
-                        tiempo_m += ps['fin_pausa'] - ps['inicio_pausa']
-
-                grasa_carne_color = 'Verde' if corte.grasa_carne < configuraciones[0].verde else 'Amarillo' if corte.grasa_carne < configuraciones[0].amarillo else 'Rojo'
-                hueso_carne_color = 'Verde' if corte.hueso_carne < configuraciones[1].verde else 'Amarillo' if corte.hueso_carne < configuraciones[1].amarillo else 'Rojo'
-                piezas_vendibles_color = 'Verde' if corte.piezas_vendibles >= configuraciones[2].verde else 'Amarillo' if corte.piezas_vendibles < configuraciones[2].verde and corte.piezas_vendibles >= configuraciones[2].amarillo else 'Rojo'
-
-                list.append({
-                    'id': corte.id,
-                    'cantidad_canales': corte.cantidad_canales,
-                    'horas_jornada': corte.horas_jornada,
-                    'canales_hora': corte.canales_hora,
-                    'tiempo_entre_canales': corte.tiempo_entre_canales,
-                    'grasa_carne': corte.grasa_carne,
-                    'grasa_carne_color': grasa_carne_color,
-                    'hueso_carne': corte.hueso_carne,
-                    'hueso_carne_color': hueso_carne_color,
-                    'tiempo_muerto_max': corte.tiempo_muerto,
-                    'piezas_vendibles': corte.piezas_vendibles,
-                    'piezas_vendibles_color': piezas_vendibles_color,
-                    'tiempo_muerto': tiempo_m if tiempo_m else 0,
-                    'inicio': corte.inicio,
-                    'fin': corte.fin,
-                    'conteo': conteo,
-                    'pausas': pausas,
-                    'promedio_canales_hora': canales_hora,
-                })
-                lista = sorted(list, key=lambda x: x['piezas_vendibles'], reverse=False)
-            return Response(lista, status=status.HTTP_200_OK)
-        else:
-            return Response({'message':'Tipo no valido'}, status=status.HTTP_400_BAD_REQUEST)
+    def delete(self, request):
+        filtro_conteo.reiniciar_estadisticas()
+        return Response({'message': 'Estadisticas reiniciadas'}, status=status.HTTP_200_OK)
+
+
+class MetricasView(APIView):
+
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return HttpResponse(metricas.registro.exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
 class Conteos40View(APIView):
@@ -0,0 +1,729 @@
+# apps/core/views_async.py
+# Vistas de lectura asíncronas (ORM asíncrono de Django). Bajo ASGI no ocupan
+# un worker mientras esperan a la base de datos, así un solo proceso en la Pi
+# atiende a muchos kioscos y supervisores a la vez.
+import asyncio
+import hashlib
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import orjson
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Exists, Max, OuterRef, Q, Subquery, Sum
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework import status
+
+from .models import Corte, Pausa, Conteo, IntervaloMuerto, ResumenHora, ResumenDia
+from .reportes import fila_corte, colores, ordenar_ranking, ORDEN_RANKING, PlanFilas, CAMPOS_COLOR, COLORES
+from .renderers import negociar, codificar_filas, a_json
+from .diario import consulta_eventos, consulta_instantanea, linea_de_tiempo
+from .routers import de_replica, leer_de_replica
+from .singleflight import una_vez, clave_peticion
+from .trabajos import cola_reportes, ColaLlena, FINALES
+from .kpi import SerieKpi, serie_en_vivo
+from .proyeccion import proyeccion_activa
+from . import notificaciones
+from .umbrales import aconfiguraciones_vigentes, historial
+from .analitica import consultas_calor, limite_resumen, matriz_calor, agregados_comparacion, filtro_periodos, resultado_comparacion, percentiles
+
+
+def respuesta(request, data, status=status.HTTP_200_OK):
+    """JSON con orjson o MessagePack según el header Accept."""
+    serializar, content_type = negociar(request)
+    response = HttpResponse(serializar(data), status=status, content_type=content_type)
+    response['Vary'] = 'Accept'
+    return response
+
+
+def es_compacto(request):
+    return request.GET.get('compacto') in ('1', 'true')
+
+
+def consulta_filas(cortes, plan):
+    """Cortes con suma de conteos y de tiempo muerto, como tuplas con nombre (values_list), sin instanciar modelos."""
+    anotaciones = {}
+    if plan.conteo:
+        anotaciones['total_conteo'] = Sum('conteo__cantidad')
+    if plan.muerto:
+        # Subconsulta para no multiplicar filas con el JOIN de conteos
+        anotaciones['total_muerto'] = Subquery(
+            IntervaloMuerto.objects.filter(corte=OuterRef('pk')).values('corte').annotate(total=Sum('duracion')).values('total')
+        )
+    return cortes.annotate(**anotaciones).values_list(*plan.columnas, *anotaciones, named=True)
+
+
+def consulta_pausas(cortes):
+    return Pausa.objects.filter(corte_id__in=[c.id for c in cortes]).order_by('id').values_list('corte_id', 'inicio_pausa', 'fin_pausa')
+
+
+def armar_filas(cortes, filas_pausas, plan):
+    pausas = defaultdict(list)
+    for corte_id, inicio_pausa, fin_pausa in filas_pausas:
+        pausas[corte_id].append({
+            'inicio_pausa': inicio_pausa,
+            'fin_pausa': fin_pausa
+        })
+    return [fila_corte(corte, getattr(corte, 'total_conteo', None), pausas[corte.id], plan) for corte in cortes]
+
+
+async def filas_cortes(cortes, plan=None):
+    """
+    Construye las filas de reporte con a lo más dos consultas en total
+    (cortes con suma de conteos y de tiempo muerto, y pausas de todos los
+    cortes; los colores ya están guardados en el corte),
+    en lugar de tres consultas por corte. Con `plan` sólo se seleccionan
+    las columnas y relaciones que piden los campos.
+    """
+    plan = plan or PlanFilas()
+    cortes = [c async for c in consulta_filas(cortes, plan)]
+    filas_pausas = [p async for p in consulta_pausas(cortes)] if plan.pausas else []
+    return armar_filas(cortes, filas_pausas, plan)
+
+
+def filas_cortes_sincrono(cortes, plan=None):
+    """filas_cortes para los hilos de trabajos (fuera del event loop)."""
+    plan = plan or PlanFilas()
+    cortes = list(consulta_filas(cortes, plan))
+    return armar_filas(cortes, list(consulta_pausas(cortes)) if plan.pausas else [], plan)
+
+
+def filtrar_colores(cortes, parametros):
+    """?grasa_carne_color=Rojo (etc.) se filtra en SQL sobre las columnas indexadas."""
+    for campo in CAMPOS_COLOR:
+        color = parametros.get(campo)
+        if color is not None:
+            if color not in COLORES:
+                raise ValueError(f'Color no valido: {color}')
+            cortes = cortes.filter(**{campo: color})
+    return cortes
+
+
+def compactar(filas):
+    """Filas como {'campos', 'filas'}."""
+    if not filas:
+        return filas
+    campos = list(filas[0].keys())
+    return codificar_filas(campos, ([f[c] for c in campos] for f in filas), compacto=True)
+
+
+def filas_respuesta(request, filas):
+    """Con ?compacto=1 las filas van como {'campos', 'filas'}."""
+    return compactar(filas) if es_compacto(request) else filas
+
+
+def consulta_reporte(parametros):
+    """
+    Cortes y plan de filas de report1 (fecha_inicio, fecha_fin). Sólo arma la
+    consulta; ValueError trae el mensaje para el 400.
+    """
+    try:
+        fecha_inicio = datetime.strptime(parametros.get('fecha_inicio'), '%Y-%m-%d')
+        fecha_fin = datetime.strptime(parametros.get('fecha_fin'), '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ValueError('Fechas no validas')
+    plan = PlanFilas.desde_parametros(parametros)
+    return filtrar_colores(Corte.objects.filter(inicio__range=[fecha_inicio, fecha_fin]).order_by('id'), parametros), plan
+
+
+def consulta_ranking(parametros):
+    """Cortes, plan y tipo de los rankings (tipo, rango en días)."""
+    tipo = parametros.get('tipo')
+    if tipo not in ORDEN_RANKING:
+        raise ValueError('Tipo no valido')
+    try:
+        rango_dias_atras = int(parametros.get('rango'))
+    except (TypeError, ValueError):
+        raise ValueError('Rango no valido')
+    plan = PlanFilas.desde_parametros(parametros, pausas_por_defecto=False, extra=(ORDEN_RANKING[tipo][0],))
+    cortes = filtrar_colores(Corte.objects.filter(inicio__range=[datetime.now() - timedelta(days=rango_dias_atras), datetime.now()]).order_by('id'), parametros)
+    return cortes, plan, tipo
+
+
+@notificaciones.suscriptor
+def _al_cambiar_corte(evento):
+    if evento['t'] in ('corte', notificaciones.RECONECTADO):
+        proyeccion_activa.invalidar_pausas()
+
+
+async def proyeccion_corte(corte):
+    """
+    Proyección del corte activo. Si otro proceso guardó los conteos, aquí sólo
+    se procesan los que faltan (id mayor al último visto). Las pausas se leen
+    sólo si hubo una transición desde la última lectura (o sin avisos entre procesos).
+    """
+    if not corte.inicio or corte.fin:
+        return None
+    if proyeccion_activa.corte_id != corte.id:
+        proyeccion_activa.configurar(corte)
+    generacion = proyeccion_activa.generacion
+    if proyeccion_activa.pausas_leidas != generacion or not notificaciones.conectado():
+        proyeccion_activa.pausas([p async for p in Pausa.objects.filter(corte=corte).order_by('id').values_list('inicio_pausa', 'fin_pausa')], generacion)
+    async for conteo_id, hora, cantidad in Conteo.objects.filter(corte=corte, id__gt=proyeccion_activa.ultimo_id).order_by('id').values_list('id', 'hora', 'cantidad'):
+        proyeccion_activa.conteo(conteo_id, hora, cantidad)
+    return proyeccion_activa.estado()
+
+
+def datos_status(corte, pausa_abierta, proyeccion):
+    return {
+        'status': False if corte.fin else True,
+        'inicio': True if corte.inicio else False,
+        'fecha_inicio': corte.inicio,
+        'cantidad_canales': corte.cantidad_canales,
+        'horas_jornada': corte.horas_jornada,
+        'canales_hora': corte.canales_hora,
+        'tiempo_entre_canales': corte.tiempo_entre_canales,
+        'grasa_carne': corte.grasa_carne,
+        'hueso_carne': corte.hueso_carne,
+        'piezas_vendibles': corte.piezas_vendibles,
+        'tiempo_muerto': corte.tiempo_muerto,
+        'pausa': pausa_abierta,
+        'proyeccion': proyeccion,
+    }
+
+
+async def datos_monitor(corte, configuraciones, proyeccion, compacto=False):
+    """Monitor del corte en curso (conteos, pausas, tiempos muertos, umbrales y colores)."""
+    grasa_carne_color, hueso_carne_color, piezas_vendibles_color = colores(corte, configuraciones)
+
+    list = codificar_filas(('hora', 'cantidad'), [c async for c in Conteo.objects.filter(corte=corte).values_list('hora', 'cantidad')], compacto=compacto)
+    list2 = []
+    async for pausa in Pausa.objects.filter(corte=corte).values('inicio_pausa', 'fin_pausa'):
+        pausa['duracion'] = pausa['fin_pausa'] - pausa['inicio_pausa'] if pausa['fin_pausa'] else None
+        list2.append(pausa)
+    list3 = [{'verde': c.verde, 'amarillo': c.amarillo, 'rojo': c.rojo} for c in configuraciones]
+    muertos = [m async for m in IntervaloMuerto.objects.filter(corte=corte).values('inicio', 'fin', 'tipo', 'duracion')]
+
+    return {
+        'cantidad_canales': corte.cantidad_canales,
+        'horas_jornada': corte.horas_jornada,
+        'canales_hora': corte.canales_hora,
+        'tiempo_entre_canales': corte.tiempo_entre_canales,
+        'grasa_carne': corte.grasa_carne,
+        'hueso_carne': corte.hueso_carne,
+        'piezas_vendibles': corte.piezas_vendibles,
+        'tiempo_muerto': corte.tiempo_muerto,
+        'inicio': corte.inicio,
+        'conteos': list,
+        'pausas': list2,
+        'tiempos_muertos': muertos,
+        'tiempo_muerto_total': sum(m['duracion'] for m in muertos),
+        'proyeccion': proyeccion,
+        'grasa_carne_config': list3[0] if configuraciones else None,
+        'hueso_carne_config': list3[1] if configuraciones else None,
+        'piezas_vendibles_config': list3[2] if configuraciones else None,
+        'grasa_carne_color': grasa_carne_color,
+        'hueso_carne_color': hueso_carne_color,
+        'piezas_vendibles_color': piezas_vendibles_color,
+    }
+
+
+class StatusCorte(View):
+
+    async def get(self, request):
+        corte = await Corte.objects.alast()
+        if not corte:
+            return respuesta(request, {'status': False})
+        pausa = await Pausa.objects.filter(corte=corte).alast()
+        return respuesta(request, datos_status(corte, bool(pausa and not pausa.fin_pausa), await proyeccion_corte(corte)))
+
+
+class MonitorView(View):
+
+    async def get(self, request):
+        corte = await Corte.objects.alast()
+        if not corte:
+            return respuesta(request, {'message':'No hay cortes'}, status=status.HTTP_400_BAD_REQUEST)
+        if not corte.inicio or corte.fin:
+            return respuesta(request, {'message':'Corte no iniciado'}, status=status.HTTP_400_BAD_REQUEST)
+
+        configuraciones = await aconfiguraciones_vigentes(corte.inicio)
+        return respuesta(request, await datos_monitor(corte, configuraciones, await proyeccion_corte(corte), es_compacto(request)))
+
+    async def post(self, request):
+        corte = await Corte.objects.alast()
+        if not corte:
+            return respuesta(request, {'message':'No hay cortes'}, status=status.HTTP_400_BAD_REQUEST)
+        if not corte.inicio or corte.fin:
+            return respuesta(request, {'message':'Corte no iniciado'}, status=status.HTTP_400_BAD_REQUEST)
+        return respuesta(request, {'conteo': await Conteo.objects.filter(corte=corte).acount()})
+
+
+class LastFiveCortesView(View):
+
+    async def get(self, request):
+        try:
+            plan = PlanFilas.desde_parametros(request.GET)
+            cortes = filtrar_colores(Corte.objects.order_by('-id'), request.GET)[:5]
+        except ValueError as e:
+            return respuesta(request, {'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return respuesta(request, filas_respuesta(request, await filas_cortes(cortes, plan)))
+
+
+SECCIONES_TABLERO = ('status', 'monitor', 'conteo', 'config', 'last5')
+
+
+def version_seccion(*sello):
+    return hashlib.sha1(a_json(sello)).hexdigest()[:12]
+
+
+def fila_sello(corte):
+    """Todas las columnas del corte más sus sellos de conteos, tiempo muerto y pausa abierta."""
+    return [getattr(corte, f.attname) for f in Corte._meta.concrete_fields] + [corte.ultimo_conteo, corte.ultimo_muerto, corte.pausa_abierta]
+
+
+class TableroView(View):
+    """
+    Pantalla de inicio del kiosco en una sola petición: status, monitor (GET),
+    conteo (POST de monitor), config y last5, a partir de una consulta
+    compartida de los últimos cinco cortes con sus sellos (último conteo,
+    último intervalo muerto, pausa abierta).
+    - ?secciones=status,conteo: sólo esas (por defecto todas).
+    - ?versiones=status:<v>,last5:<v>: versiones que ya tiene el cliente; las
+      que no cambiaron no se calculan y quedan en 'sin_cambios'.
+    Las versiones salen de los sellos, antes de calcular nada. Con el corte
+    corriendo, status y monitor cambian al menos cada minuto (la proyección
+    avanza con el reloj).
+    """
+
+    async def get(self, request):
+        pedidas = [s.strip() for s in request.GET.get('secciones', '').split(',') if s.strip()] or list(SECCIONES_TABLERO)
+        desconocidas = [s for s in pedidas if s not in SECCIONES_TABLERO]
+        if desconocidas:
+            return respuesta(request, {'message': f'Secciones no validas: {", ".join(desconocidas)}'}, status=status.HTTP_400_BAD_REQUEST)
+        conocidas = dict(v.split(':', 1) for v in request.GET.get('versiones', '').split(',') if ':' in v)
+
+        cortes = [c async for c in Corte.objects.order_by('-id').annotate(
+            ultimo_conteo=Subquery(Conteo.objects.filter(corte=OuterRef('pk')).order_by('-id').values('id')[:1]),
+            ultimo_muerto=Subquery(IntervaloMuerto.objects.filter(corte=OuterRef('pk')).order_by('-id').values('id')[:1]),
+            pausa_abierta=Exists(Pausa.objects.filter(corte=OuterRef('pk'), fin_pausa__isnull=True)),
+        )[:5]]
+        corte = cortes[0] if cortes else None
+        await aconfiguraciones_vigentes()
+        minuto = int(time.time() // 60) if corte and corte.inicio and not corte.fin else None
+        sello = fila_sello(corte) if corte else None
+        versiones = {
+            'status': version_seccion(sello, minuto),
+            'monitor': version_seccion(sello, historial.ultimo_id, minuto),
+            'conteo': version_seccion(corte and corte.id, corte and corte.ultimo_conteo),
+            'config': version_seccion(historial.ultimo_id),
+            'last5': version_seccion([fila_sello(c) for c in cortes]),
+        }
+        cambiadas = [s for s in pedidas if conocidas.get(s) != versiones[s]]
+
+        secciones, errores = {}, {}
+        proyeccion = await proyeccion_corte(corte) if corte and {'status', 'monitor'}.intersection(cambiadas) else None
+        for seccion in cambiadas:
+            if seccion == 'config':
+                secciones[seccion] = [{'tipo': c.tipo, 'verde': c.verde, 'amarillo': c.amarillo, 'rojo': c.rojo} for c in historial.configuraciones()]
+            elif seccion == 'last5':
+                filas = await filas_cortes(Corte.objects.filter(id__in=[c.id for c in cortes]).order_by('-id'))
+                secciones[seccion] = filas_respuesta(request, filas)
+            elif seccion == 'status':
+                secciones[seccion] = datos_status(corte, corte.pausa_abierta, proyeccion) if corte else {'status': False}
+            elif not corte:
+                errores[seccion] = 'No hay cortes'
+            elif not corte.inicio or corte.fin:
+                errores[seccion] = 'Corte no iniciado'
+            elif seccion == 'monitor':
+                secciones[seccion] = await datos_monitor(corte, historial.configuraciones(corte.inicio), proyeccion, es_compacto(request))
+            else:
+                secciones[seccion] = {'conteo': await Conteo.objects.filter(corte=corte).acount()}
+
+        return respuesta(request, {
+            'versiones': {s: versiones[s] for s in pedidas},
+            'secciones': secciones,
+            'sin_cambios': [s for s in pedidas if s not in cambiadas],
+            'errores': errores,
+        })
+
+
+class CortesReportView(View):
+
+    @de_replica
+    async def get(self, request):
+        try:
+            cortes, plan = consulta_reporte(request.GET)
+        except ValueError as e:
+            return respuesta(request, {'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        async def calcular():
+            return filas_respuesta(request, await filas_cortes(cortes, plan))
+        return respuesta(request, await una_vez(clave_peticion(request), calcular))
+
+
+class ReporteTopView(View):
+    """
+    Base de los rankings: `mayor` define el sentido del orden.
+    Las tablas de ranking no muestran pausas: sólo se incluyen con include=pausas.
+    """
+
+    mayor = True
+
+    @de_replica
+    async def get(self, request):
+        try:
+            cortes, plan, tipo = consulta_ranking(request.GET)
+        except ValueError as e:
+            return respuesta(request, {'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        async def calcular():
+            filas = ordenar_ranking(await filas_cortes(cortes, plan), tipo, mayor=self.mayor)
+            return filas_respuesta(request, plan.recortar(filas))
+        # Pantallas abiertas a la vez con el mismo reporte comparten un solo cálculo
+        return respuesta(request, await una_vez(clave_peticion(request), calcular))
+
+
+class ReporteTopMayorView(ReporteTopView):
+    mayor = True
+
+
+class ReporteTopMenorView(ReporteTopView):
+    mayor = False
+
+
+class KpiView(View):
+    """
+    Ritmo real de un corte (?corte=<id>, por defecto el último): canales/hora
+    sin pausas, ritmos móviles, huecos más largos y tiempo entre canales real
+    contra el planeado. El corte en vivo se extiende con los conteos nuevos.
+    """
+
+    async def get(self, request):
+        try:
+            corte_id = request.GET.get('corte')
+            corte = await Corte.objects.aget(id=int(corte_id)) if corte_id else await Corte.objects.alast()
+        except (ValueError, Corte.DoesNotExist):
+            corte = None
+        if not corte:
+            return respuesta(request, {'message':'No hay cortes'}, status=status.HTTP_400_BAD_REQUEST)
+        if not corte.inicio:
+            return respuesta(request, {'message':'Corte no iniciado'}, status=status.HTTP_400_BAD_REQUEST)
+        pausas = [p async for p in Pausa.objects.filter(corte=corte).values_list('inicio_pausa', 'fin_pausa')]
+        serie = SerieKpi(corte) if corte.fin else serie_en_vivo(corte)
+        conteos = Conteo.objects.filter(corte=corte, id__gt=serie.ultimo_id).order_by('id').values_list('id', 'hora', 'cantidad')
+        serie.agregar([c async for c in conteos], pausas)
+        response = serie.resumen(pausas, fin=corte.fin)
+        response['en_vivo'] = not corte.fin
+        return respuesta(request, response)
+
+
+class HeatmapView(View):
+    """
+    Canales por día de la semana × hora del día entre fecha_inicio y fecha_fin
+    (inclusive, YYYY-MM-DD); con ?semanal=1 también una matriz por semana.
+    Lee ResumenHora hasta donde existe y los conteos crudos para el resto.
+    """
+
+    @de_replica
+    async def get(self, request):
+        try:
+            desde = datetime.strptime(request.GET.get('fecha_inicio'), '%Y-%m-%d')
+            hasta = datetime.strptime(request.GET.get('fecha_fin'), '%Y-%m-%d') + timedelta(days=1)
+        except (TypeError, ValueError):
+            return respuesta(request, {'message':'Fechas no validas'}, status=status.HTTP_400_BAD_REQUEST)
+        semanal = request.GET.get('semanal') in ('1', 'true')
+        limite = limite_resumen((await ResumenHora.objects.aaggregate(ultima=Max('hora')))['ultima'])
+        filas = []
+        for consulta in consultas_calor(desde, hasta, limite, semanal=semanal):
+            filas += [f async for f in consulta]
+        response = matriz_calor(filas, semanal=semanal)
+        response['desde'] = desde
+        response['hasta'] = hasta
+        return respuesta(request, response)
+
+
+class ComparacionView(View):
+    """
+    Compara dos periodos (inicio_a, fin_a, inicio_b, fin_b; YYYY-MM-DD,
+    fin inclusive) con una sola consulta de agregación condicional.
+    delta y porcentaje son b respecto a a.
+    """
+
+    @de_replica
+    async def get(self, request):
+        try:
+            rangos = [
+                (datetime.strptime(request.GET.get(f'inicio_{p}'), '%Y-%m-%d'),
+                 datetime.strptime(request.GET.get(f'fin_{p}'), '%Y-%m-%d') + timedelta(days=1))
+                for p in ('a', 'b')
+            ]
+        except (TypeError, ValueError):
+            return respuesta(request, {'message':'Fechas no validas'}, status=status.HTTP_400_BAD_REQUEST)
+        valores = await Corte.objects.filter(filtro_periodos(rangos)).aaggregate(**agregados_comparacion(rangos))
+        return respuesta(request, resultado_comparacion(valores, rangos))
+
+
+class PercentilesView(View):
+    """
+    Percentiles (?q=50,90,99) de canales/hora, tiempo muerto y calidad de los
+    cortes cerrados entre fecha_inicio y fecha_fin (inclusive). Fusiona los
+    bocetos de ResumenDia: el costo depende de los días, no de los conteos.
+    """
+
+    @de_replica
+    async def get(self, request):
+        try:
+            desde = datetime.strptime(request.GET.get('fecha_inicio'), '%Y-%m-%d').date()
+            hasta = datetime.strptime(request.GET.get('fecha_fin'), '%Y-%m-%d').date()
+        except (TypeError, ValueError):
+            return respuesta(request, {'message':'Fechas no validas'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            qs = [float(q) for q in request.GET.get('q', '50,90,99').split(',')]
+            if not all(0 <= q <= 100 for q in qs):
+                raise ValueError
+        except ValueError:
+            return respuesta(request, {'message':'Percentiles no validos'}, status=status.HTTP_400_BAD_REQUEST)
+        dias = [d async for d in ResumenDia.objects.filter(fecha__range=[desde, hasta]).values_list('bocetos', flat=True)]
+        return respuesta(request, {'dias': len(dias), 'metricas': percentiles(dias, qs)})
+
+
+class ColoresView(View):
+    """
+    Cortes por color de cada indicador entre fecha_inicio y fecha_fin
+    (YYYY-MM-DD, mismo rango que report1), contados en una sola consulta.
+    """
+
+    @de_replica
+    async def get(self, request):
+        try:
+            fecha_inicio = datetime.strptime(request.GET.get('fecha_inicio'), '%Y-%m-%d')
+            fecha_fin = datetime.strptime(request.GET.get('fecha_fin'), '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return respuesta(request, {'message':'Fechas no validas'}, status=status.HTTP_400_BAD_REQUEST)
+        conteos = await Corte.objects.filter(inicio__range=[fecha_inicio, fecha_fin]).aaggregate(**{
+            f'{campo}__{color}': Count('id', filter=Q(**{campo: color})) for campo in CAMPOS_COLOR for color in COLORES
+        })
+        response = {campo: {color: conteos[f'{campo}__{color}'] for color in COLORES} for campo in CAMPOS_COLOR}
+        return respuesta(request, response)
+
+
+class DiarioView(View):
+    """
+    Línea de tiempo de un corte (?corte=<id>, por defecto el último): cada
+    evento del diario con el estado después de aplicarlo, en un recorrido
+    secuencial. Con ?desde=<secuencia> sólo los eventos posteriores, partiendo
+    de la última instantánea hasta esa secuencia (para consultas incrementales).
+    """
+
+    async def get(self, request):
+        try:
+            corte_id = request.GET.get('corte')
+            corte = await Corte.objects.aget(id=int(corte_id)) if corte_id else await Corte.objects.alast()
+            desde = int(request.GET.get('desde', 0))
+        except (ValueError, Corte.DoesNotExist):
+            corte = None
+        if not corte:
+            return respuesta(request, {'message':'No hay cortes'}, status=status.HTTP_400_BAD_REQUEST)
+        base, estado = 0, None
+        if desde:
+            base, estado = next(iter([i async for i in consulta_instantanea(corte.id, hasta=desde)]), (0, None))
+        linea = linea_de_tiempo([e async for e in consulta_eventos(corte.id, base)], estado, desde)
+        return respuesta(request, {
+            'corte': corte.id,
+            'eventos': linea,
+            'estado': linea[-1]['estado'] if linea else estado,
+        })
+
+
+DURACION_EVENTOS_WSGI = 300
+
+
+def es_asgi(request):
+    """Bajo WSGI un generador asíncrono se consume completo antes de enviar nada: los flujos van síncronos."""
+    return isinstance(request, ASGIRequest)
+
+
+def respuesta_eventos(flujo):
+    response = StreamingHttpResponse(flujo, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def mensajes_buzon(origen, nuevos):
+    if not nuevos:
+        return [b': latido\n\n']
+    return [f'id: {origen}:{numero}\n'.encode() + b'data: ' + a_json(evento) + b'\n\n' for numero, evento in nuevos]
+
+
+def reiniciar_buzon(origen, numero):
+    return f'event: reiniciar\nid: {origen}:{numero}\ndata: {{}}\n\n'.encode()
+
+
+async def eventos_buzon(buzon, origen, numero):
+    if numero is None:
+        numero = buzon.numero
+        yield reiniciar_buzon(origen, numero)
+    while True:
+        nuevos = await buzon.esperar(numero, notificaciones.LATIDO)
+        for mensaje in mensajes_buzon(origen, nuevos):
+            yield mensaje
+        numero = nuevos[-1][0] if nuevos else numero
+
+
+def eventos_buzon_hilo(buzon, origen, numero):
+    """Ocupa el hilo del worker: termina a los DURACION_EVENTOS_WSGI segundos y el navegador reconecta."""
+    if numero is None:
+        numero = buzon.numero
+        yield reiniciar_buzon(origen, numero)
+    fin = time.monotonic() + DURACION_EVENTOS_WSGI
+    while time.monotonic() < fin:
+        nuevos = buzon.esperar_hilo(numero, min(notificaciones.LATIDO, max(fin - time.monotonic(), 0)))
+        for mensaje in mensajes_buzon(origen, nuevos):
+            yield mensaje
+        numero = nuevos[-1][0] if nuevos else numero
+
+
+class EventosView(View):
+    """
+    Cambios de cortes, conteos y configuración como server-sent events, en
+    cuanto llegan por notificaciones.py (sin consultar la base). Se reanuda con
+    Last-Event-ID; si el id es de otro worker o se perdieron eventos llega
+    `event: reiniciar` y el cliente debe recargar su estado. Bajo WSGI el
+    flujo se cierra cada DURACION_EVENTOS_WSGI segundos para liberar el hilo.
+    """
+
+    async def get(self, request):
+        notificaciones.arrancar()
+        buzon = notificaciones.buzon
+        numero = buzon.continuar(request.headers.get('Last-Event-ID') or request.GET.get('desde'))
+        origen = notificaciones.origen()
+        flujo = eventos_buzon if es_asgi(request) else eventos_buzon_hilo
+        return respuesta_eventos(flujo(buzon, origen, numero))
+
+
+# --- Reportes en segundo plano ---
+
+REPORTES_TRABAJO = ('report1', 'report2', 'report3')
+LOTE_TRABAJO = 500
+
+
+def generar_reporte(trabajo):
+    """
+    Corre en un hilo de cola_reportes (lee de la réplica si hay). Las filas
+    se arman por lotes de ids para reportar avance y poder cancelar entre
+    lotes; el resultado es el mismo que el GET del reporte.
+    """
+    parametros = trabajo.parametros
+    if trabajo.tipo == 'report1':
+        cortes, plan = consulta_reporte(parametros)
+    else:
+        cortes, plan, tipo = consulta_ranking(parametros)
+    filas = []
+    with leer_de_replica():
+        ids = list(cortes.values_list('id', flat=True))
+        trabajo.limitar(len(ids))
+        for i in range(0, len(ids), LOTE_TRABAJO):
+            filas += filas_cortes_sincrono(Corte.objects.filter(id__in=ids[i:i + LOTE_TRABAJO]).order_by('id'), plan)
+            trabajo.avanzar((i + LOTE_TRABAJO) / len(ids))
+    if trabajo.tipo != 'report1':
+        filas = plan.recortar(ordenar_ranking(filas, tipo, mayor=trabajo.tipo == 'report2'))
+    return compactar(filas) if parametros.get('compacto') in ('1', 'true') else filas
+
+
+def parametros_peticion(request):
+    """Cuerpo JSON o de formulario como dict de texto (igual que request.GET)."""
+    if request.content_type == 'application/json':
+        datos = orjson.loads(request.body or b'{}')
+        if not isinstance(datos, dict):
+            raise ValueError
+    else:
+        datos = request.POST.dict()
+    return {llave: str(valor) for llave, valor in datos.items()}
+
+
+class TrabajosView(View):
+    """
+    POST encola un reporte largo: {'reporte': 'report1' | 'report2' | 'report3'}
+    más los mismos parámetros del GET. 202 con el estado del trabajo nuevo, o
+    200 con el existente si el mismo reporte ya está en cola o corriendo.
+    """
+
+    async def post(self, request):
+        try:
+            parametros = parametros_peticion(request)
+        except ValueError:
+            return respuesta(request, {'message':'Parametros no validos'}, status=status.HTTP_400_BAD_REQUEST)
+        reporte = parametros.pop('reporte', None)
+        if reporte not in REPORTES_TRABAJO:
+            return respuesta(request, {'message':'Reporte no valido'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # Valida los parámetros antes de encolar (sólo arma la consulta)
+            consulta_reporte(parametros) if reporte == 'report1' else consulta_ranking(parametros)
+            estado, nuevo = cola_reportes.enviar(reporte, parametros, generar_reporte)
+        except ValueError as e:
+            return respuesta(request, {'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ColaLlena as e:
+            return respuesta(request, {'message': str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        return respuesta(request, estado, status=status.HTTP_202_ACCEPTED if nuevo else status.HTTP_200_OK)
+
+
+class TrabajoView(View):
+    """GET: estado y avance del trabajo; DELETE: lo cancela."""
+
+    async def get(self, request, trabajo_id):
+        estado = cola_reportes.estado(trabajo_id)
+        if not estado:
+            return respuesta(request, {'message':'Trabajo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        return respuesta(request, estado)
+
+    async def delete(self, request, trabajo_id):
+        if not cola_reportes.cancelar(trabajo_id):
+            return respuesta(request, {'message':'Trabajo no encontrado o terminado'}, status=status.HTTP_404_NOT_FOUND)
+        return respuesta(request, cola_reportes.estado(trabajo_id))
+
+
+class TrabajoResultadoView(View):
+    """Descarga el resultado guardado en disco (JSON) mientras no venza su TTL."""
+
+    async def get(self, request, trabajo_id):
+        ruta = cola_reportes.resultado(trabajo_id)
+        if ruta:
+            return FileResponse(open(ruta, 'rb'), content_type='application/json')
+        estado = cola_reportes.estado(trabajo_id)
+        if not estado:
+            return respuesta(request, {'message':'Trabajo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        return respuesta(request, estado, status=status.HTTP_409_CONFLICT)
+
+
+ESPERA_AVANCE = 0.5
+
+
+def cambio_trabajo(trabajo_id, anterior):
+    """(estado actual, mensaje si cambió o None, True si ya terminó)."""
+    estado = cola_reportes.estado(trabajo_id)
+    mensaje = b'data: ' + a_json(estado) + b'\n\n' if estado != anterior else None
+    return estado, mensaje, not estado or estado['estado'] in FINALES
+
+
+async def avance_trabajo(trabajo_id):
+    anterior = None
+    while True:
+        anterior, mensaje, termino = cambio_trabajo(trabajo_id, anterior)
+        if mensaje:
+            yield mensaje
+        if termino:
+            return
+        await asyncio.sleep(ESPERA_AVANCE)
+
+
+def avance_trabajo_hilo(trabajo_id):
+    anterior = None
+    while True:
+        anterior, mensaje, termino = cambio_trabajo(trabajo_id, anterior)
+        if mensaje:
+            yield mensaje
+        if termino:
+            return
+        time.sleep(ESPERA_AVANCE)
+
+
+class TrabajoEventosView(View):
+    """Avance del trabajo como server-sent events hasta que termina."""
+
+    async def get(self, request, trabajo_id):
+        if not cola_reportes.estado(trabajo_id):
+            return respuesta(request, {'message':'Trabajo no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        flujo = avance_trabajo if es_asgi(request) else avance_trabajo_hilo
+        return respuesta_eventos(flujo(trabajo_id))
@@ -0,0 +1,277 @@
+# apps/core/watchdog.py
+import threading
+import time
+import itertools
+from datetime import datetime
+
+# Acciones válidas para las reglas del watchdog
+ACCIONES_PARO = ('sirena', 'linea', 'pausar')
+ACCIONES_CIERRE = ('sirena', 'linea', 'pausar', 'finalizar')
+
+
+class RuedaTemporizadores:
+    """
+    Rueda de temporizadores (hashed timing wheel) de un solo nivel.
+    - programar() y cancelar() son O(1)
+    - avanzar() sólo revisa la ranura del tick actual, así que el costo
+      por tick no depende de cuántas reglas haya programadas en total
+    Los callbacks se ejecutan fuera del lock, en el hilo que llama avanzar().
+    """
+
+    def __init__(self, ranuras=512, tick=1.0):
+        self.tick = tick
+        self._ranuras = [dict() for _ in range(ranuras)]
+        self._ubicacion = {}  # id -> indice de ranura
+        self._tick_actual = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def programar(self, segundos, callback):
+        """Programa callback dentro de `segundos`. Devuelve el id del temporizador."""
+        ticks = max(1, int(round(segundos / self.tick)))
+        with self._lock:
+            vencimiento = self._tick_actual + ticks
+            indice = vencimiento % len(self._ranuras)
+            tid = next(self._ids)
+            self._ranuras[indice][tid] = (vencimiento, callback)
+            self._ubicacion[tid] = indice
+        return tid
+
+    def cancelar(self, tid):
+        if tid is None:
+            return
+        with self._lock:
+            indice = self._ubicacion.pop(tid, None)
+            if indice is not None:
+                self._ranuras[indice].pop(tid, None)
+
+    def avanzar(self):
+        """Avanza un tick y ejecuta los temporizadores vencidos."""
+        with self._lock:
+            self._tick_actual += 1
+            ranura = self._ranuras[self._tick_actual % len(self._ranuras)]
+            vencidos = [tid for tid, (vencimiento, _) in ranura.items() if vencimiento <= self._tick_actual]
+            callbacks = []
+            for tid in vencidos:
+                callbacks.append(ranura.pop(tid)[1])
+                self._ubicacion.pop(tid, None)
+        for callback in callbacks:
+            callback()
+        return len(callbacks)
+
+    def __len__(self):
+        return len(self._ubicacion)
+
+
+class WatchdogCorte:
+    """
+    Vigila el corte activo sin consultar la base de datos:
+      - paro de sensor: no llega conteo en `factor_paro * tiempo_entre_canales`
+      - cierre de jornada: el corte sigue corriendo después de `horas_jornada`
+    El estado vive en memoria y se actualiza desde las transiciones de views.py
+    (iniciar/pausar/reanudar/finalizar) y desde cada conteo del sensor.
+    Las dos alarmas son independientes (`alarmas` tiene las activas: un paro
+    se avisa aunque ya sonara el cierre). Las acciones se inyectan desde views.py:
+      - on_alarma(accion, motivo), on_normal(motivo), on_pausar(), on_finalizar()
+    """
+
+    def __init__(self, factor_paro=3.0, accion_paro='sirena', accion_cierre='sirena', rueda=None, reloj=time.monotonic):
+        if accion_paro not in ACCIONES_PARO:
+            raise ValueError(f'Acción de paro no válida: {accion_paro}')
+        if accion_cierre not in ACCIONES_CIERRE:
+            raise ValueError(f'Acción de cierre no válida: {accion_cierre}')
+        self.factor_paro = factor_paro
+        self.accion_paro = accion_paro
+        self.accion_cierre = accion_cierre
+        self.rueda = rueda or RuedaTemporizadores()
+        self.reloj = reloj
+
+        # Callbacks a inyectar desde views.py
+        self.on_alarma = lambda accion, motivo: None
+        self.on_normal = lambda motivo: None
+        self.on_pausar = lambda: None
+        self.on_finalizar = lambda: None
+
+        self._lock = threading.RLock()
+        self._limpiar()
+        self._hilo = None
+        self._detener = threading.Event()
+
+    def _limpiar(self):
+        self.corte_id = None
+        self.limite_paro = None
+        self.duracion_jornada = None
+        self.ultimo_conteo = None
+        self.inicio = None
+        self.pausado_desde = None
+        self.pausa_acumulada = 0.0
+        self.alarmas = set()
+        self._t_paro = None
+        self._t_cierre = None
+
+    # --- EVENTOS (llamados desde views.py) ---
+
+    def iniciar(self, corte, pausado=False, inicio=None, pausa_previa=0.0):
+        """
+        Empieza a vigilar `corte`. `inicio` y `pausa_previa` (segundos) permiten
+        sembrar el estado de un corte que ya venía corriendo (arranque del proceso).
+        """
+        with self._lock:
+            self._cancelar_todo()
+            self._limpiar()
+            ahora = self.reloj()
+            self.corte_id = corte.id
+            self.limite_paro = max(1.0, self.factor_paro * segundos_entre_canales(corte))
+            self.duracion_jornada = corte.horas_jornada * 3600
+            transcurrido = (datetime.now() - inicio).total_seconds() if inicio else 0.0
+            self.inicio = ahora - max(0.0, transcurrido)
+            self.ultimo_conteo = ahora
+            self.pausa_acumulada = pausa_previa
+            if pausado:
+                self.pausado_desde = ahora
+            else:
+                self._t_paro = self.rueda.programar(self.limite_paro, self._revisar_paro)
+            self._t_cierre = self.rueda.programar(max(1.0, self.duracion_jornada - transcurrido), self._revisar_cierre)
+
+    def conteo(self):
+        """O(1): sólo actualiza la marca de tiempo; el temporizador se revisa al vencer."""
+        self.ultimo_conteo = self.reloj()
+        if 'paro' in self.alarmas:
+            with self._lock:
+                if 'paro' in self.alarmas:
+                    self._normalizar('paro')
+                    self.rueda.cancelar(self._t_paro)
+                    self._t_paro = self.rueda.programar(self.limite_paro, self._revisar_paro)
+
+    def pausar(self):
+        with self._lock:
+            if self.corte_id is None or self.pausado_desde is not None:
+                return
+            self.pausado_desde = self.reloj()
+            self.rueda.cancelar(self._t_paro)
+            self._t_paro = None
+            if 'paro' in self.alarmas:
+                self._normalizar('paro')
+
+    def reanudar(self):
+        with self._lock:
+            if self.corte_id is None or self.pausado_desde is None:
+                return
+            ahora = self.reloj()
+            self.pausa_acumulada += ahora - self.pausado_desde
+            self.pausado_desde = None
+            self.ultimo_conteo = ahora
+            self._t_paro = self.rueda.programar(self.limite_paro, self._revisar_paro)
+
+    def finalizar(self):
+        with self._lock:
+            for motivo in list(self.alarmas):
+                self._normalizar(motivo)
+            self._cancelar_todo()
+            self._limpiar()
+
+    # --- REGLAS ---
+
+    def _revisar_paro(self):
+        with self._lock:
+            self._t_paro = None
+            if self.corte_id is None or self.pausado_desde is not None:
+                return
+            sin_conteo = self.reloj() - self.ultimo_conteo
+            if sin_conteo < self.limite_paro:
+                # Hubo conteos: reprogramar al nuevo vencimiento
+                self._t_paro = self.rueda.programar(self.limite_paro - sin_conteo, self._revisar_paro)
+                return
+            disparar = 'paro' not in self.alarmas
+            self.alarmas.add('paro')
+            if self.accion_paro != 'pausar':
+                # Sigue revisando para apagar la alarma cuando vuelva el sensor
+                self._t_paro = self.rueda.programar(self.limite_paro, self._revisar_paro)
+        if disparar:
+            self._ejecutar(self.accion_paro, 'paro')
+
+    def _revisar_cierre(self):
+        with self._lock:
+            self._t_cierre = None
+            if self.corte_id is None:
+                return
+            ahora = self.reloj()
+            pausado = self.pausa_acumulada + (ahora - self.pausado_desde if self.pausado_desde is not None else 0.0)
+            restante = self.duracion_jornada - (ahora - self.inicio - pausado)
+            if restante > 0:
+                # El tiempo en pausa no cuenta para la jornada
+                self._t_cierre = self.rueda.programar(restante, self._revisar_cierre)
+                return
+            self.alarmas.add('cierre')
+        self._ejecutar(self.accion_cierre, 'cierre')
+
+    def _ejecutar(self, accion, motivo):
+        if accion == 'pausar':
+            self.on_pausar()
+        elif accion == 'finalizar':
+            self.on_finalizar()
+        else:
+            self.on_alarma(accion, motivo)
+
+    def _normalizar(self, motivo):
+        self.alarmas.discard(motivo)
+        self.on_normal(motivo)
+
+    def _cancelar_todo(self):
+        self.rueda.cancelar(self._t_paro)
+        self.rueda.cancelar(self._t_cierre)
+        self._t_paro = None
+        self._t_cierre = None
+
+    # --- HILO ---
+
+    def arrancar(self, sembrar=None):
+        """
+        Inicia el hilo que avanza la rueda. `sembrar` se llama una sola vez
+        dentro del hilo para cargar el corte activo al arrancar el proceso.
+        """
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._loop, args=(sembrar,), name='watchdog-corte', daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def _loop(self, sembrar):
+        if sembrar:
+            try:
+                sembrar()
+            except Exception as e:
+                print(f'Watchdog: no se pudo cargar el corte activo ({e})')
+        siguiente = self.reloj()
+        while not self._detener.is_set():
+            siguiente += self.rueda.tick
+            espera = siguiente - self.reloj()
+            if espera > 0 and self._detener.wait(espera):
+                break
+            try:
+                self.rueda.avanzar()
+            except Exception as e:
+                print(f'Watchdog: error en temporizador ({e})')
+
+    def estado(self):
+        with self._lock:
+            if self.corte_id is None:
+                return {'activo': False, 'alarmas': sorted(self.alarmas)}
+            ahora = self.reloj()
+            return {
+                'activo': True,
+                'corte': self.corte_id,
+                'pausado': self.pausado_desde is not None,
+                'segundos_sin_conteo': round(ahora - self.ultimo_conteo, 1),
+                'limite_paro': self.limite_paro,
+                'alarmas': sorted(self.alarmas),
+                'temporizadores': len(self.rueda),
+            }
+
+
+def segundos_entre_canales(corte):
+    """`tiempo_entre_canales` se captura en segundos por canal."""
+    return float(corte.tiempo_entre_canales or 0)